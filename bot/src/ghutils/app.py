@@ -3,22 +3,33 @@ import asyncio
 from ghutils.core.bot import GHUtilsBot
 from ghutils.core.env import GHUtilsEnv
 from ghutils.db.models import create_db_and_tables
+from ghutils.launcher import launch
 from ghutils.utils.logging import setup_logging
 
 
-async def main():
+async def main(env: GHUtilsEnv):
     setup_logging()
-    env = GHUtilsEnv.get()
     async with GHUtilsBot(env) as bot:
         create_db_and_tables(bot.engine)
         await bot.load_translator()
         await bot.load_cogs()
-        await bot.start(env.token.get_secret_value())
+        if env.gateway:
+            await bot.start(env.token.get_secret_value())
+        else:
+            await bot.start_without_gateway(env.token.get_secret_value())
 
 
-if __name__ == "__main__":
+def run(env: GHUtilsEnv):
     # catch KeyboardInterrupt to hide the long unnecessary traceback
     try:
-        asyncio.run(main())
+        asyncio.run(main(env))
     except KeyboardInterrupt:
         pass
+
+
+if __name__ == "__main__":
+    env = GHUtilsEnv.get()
+    if env.gateway and env.shard_processes > 1:
+        launch(env, run)
+    else:
+        run(env)
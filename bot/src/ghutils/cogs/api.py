@@ -1,33 +1,123 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import math
+import threading
 from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from timeit import default_timer as timer
-from typing import Annotated
+from typing import Annotated, Any, Sized
 
 import sqlalchemy as sa
-from fastapi import Depends, FastAPI, HTTPException, Response
-from fastapi.responses import HTMLResponse
+from discord import InteractionResponseType, InteractionType
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+)
 from githubkit import GitHub
+from githubkit.exception import RequestFailed
+from githubkit.webhooks import verify
 from pydantic import BaseModel, ValidationError
-from sqlmodel import Session
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+from starlette.status import (
+    HTTP_202_ACCEPTED,
+    HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_404_NOT_FOUND,
+    HTTP_410_GONE,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 from uvicorn import Config, Server
 
+from ghutils.cogs.shards import STATUS_MAX_AGE
 from ghutils.core.bot import GHUtilsBot
 from ghutils.core.cog import GHUtilsCog
 from ghutils.core.env import GHUtilsEnv
-from ghutils.db.models import UserGitHubTokens, UserLogin
+from ghutils.core.exceptions import RateLimitedError
+from ghutils.core.interactions import (
+    dispatch_http_interaction,
+    verify_interaction_signature,
+)
+from ghutils.core.jobs import OVERDUE_INTERVALS
+from ghutils.core.metrics import REGISTRY
+from ghutils.core.ratelimit import current_consumer
+from ghutils.db.invalidation import send_notification
+from ghutils.db.models import JobStatus, ShardStatus, UserGitHubTokens, UserLogin
 from ghutils.resources import load_resource
+from ghutils.utils.actions import parse_workflow_id
+from ghutils.utils.cache import LRUCache, TTLCache
+from ghutils.utils.discord.transformers import APP_CACHE_SCOPE
+from ghutils.utils.event_loop import LoopHandle
+from ghutils.utils.github import RepositoryName
+from ghutils.utils.github_cache import ResponseCache
+from ghutils.utils.metrics import Metric, Snapshot
+from ghutils.utils.shared_cache import MemoryCacheBackend, ModelCache
+from ghutils.utils.webhooks import (
+    WEBHOOK_CHANNEL,
+    GitHubWebhookEvent,
+    WebhookPayload,
+)
+from ghutils.utils.workers import WorkerPoolStats
 
 SUCCESS_PAGE = load_resource("web/success.html")
 
+WEBHOOK_EVENTS = frozenset([
+    "issues",
+    "pull_request",
+    "push",
+    "release",
+    "workflow_run",
+    "check_suite",
+])
+
 logger = logging.getLogger(__name__)
 
 
+class ShardHealth(BaseModel):
+    shard_id: int
+    latency: float | None
+    """WebSocket latency in seconds, or `None` if the shard isn't connected or hasn't
+    reported its status recently."""
+    update_time: datetime | None
+    checked: bool
+    """Whether this shard being unhealthy makes `/health` fail. By default, this is
+    only true for shards in this process."""
+
+
+class JobHealth(BaseModel):
+    name: str
+    leader: bool
+    """Whether this instance is the one running the job."""
+    healthy: bool
+    """False if the job hasn't succeeded recently in any instance."""
+    running: bool
+    """False if no instance has run the job recently."""
+    last_run_time: datetime | None
+    last_success_time: datetime | None
+    last_duration: float | None
+    last_error: str | None
+
+
 class HealthInfo(BaseModel):
     websocket_latency: float
+    """Average WebSocket latency of the shards in this process."""
+    event_loop_latency: float
+    """Seconds taken to run a task in the bot's event loop from the API server."""
     database_latency: float
+    shards: list[ShardHealth]
+    """Status of every shard, including shards in other processes."""
+    jobs: list[JobHealth]
+    """Status of every background job, including jobs run by other instances."""
+    workers: WorkerPoolStats
 
 
 app = FastAPI()
@@ -39,6 +129,16 @@ def get_bot():
     return bot
 
 
+def get_bot_loop(bot: BotDependency):
+    """Returns a handle to the bot's event loop.
+
+    The API server may run in a different thread from the bot, so anything that uses
+    the bot's async state (eg. caches, GitHub clients, dispatching events) must be run
+    through this handle.
+    """
+    return LoopHandle(bot.loop)
+
+
 def get_env(bot: BotDependency):
     return bot.env
 
@@ -49,6 +149,7 @@ def get_session(bot: BotDependency):
 
 
 BotDependency = Annotated[GHUtilsBot, Depends(get_bot)]
+BotLoopDependency = Annotated[LoopHandle, Depends(get_bot_loop)]
 EnvDependency = Annotated[GHUtilsEnv, Depends(get_env)]
 SessionDependency = Annotated[Session, Depends(get_session)]
 
@@ -56,6 +157,7 @@ SessionDependency = Annotated[Session, Depends(get_session)]
 @app.get("/health")
 async def get_health(
     bot: BotDependency,
+    bot_loop: BotLoopDependency,
     session: SessionDependency,
     response: Response,
 ) -> HealthInfo:
@@ -63,6 +165,10 @@ async def get_health(
         logger.error(f"WebSocket latency too high: {bot.latency:.2f}")
         response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
 
+    start_time = timer()
+    await bot_loop.run(asyncio.sleep(0))
+    event_loop_latency = timer() - start_time
+
     try:
         start_time = timer()
         session.execute(sa.text("SELECT 1"))  # pyright: ignore[reportDeprecated]
@@ -72,16 +178,268 @@ async def get_health(
         response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
         database_latency = float("inf")
 
+    try:
+        shards = _get_shard_health(bot, session)
+    except Exception as e:
+        logger.error(f"Failed to get shard status: {e.__class__.__name__}: {e}")
+        response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
+        shards = []
+
+    for shard in shards:
+        if shard.checked and (shard.latency is None or shard.latency > 180):
+            logger.error(f"Shard {shard.shard_id} unhealthy: {shard}")
+            response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
+
+    try:
+        jobs = _get_job_health(bot, session)
+    except Exception as e:
+        logger.error(f"Failed to get job status: {e.__class__.__name__}: {e}")
+        response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
+        jobs = []
+
+    # other instances check the jobs that they're running, so only fail if this instance
+    # is the one with the problem, or if nobody is running the job
+    for job in jobs:
+        if (job.leader and not job.healthy) or not job.running:
+            logger.error(f"Job {job.name} unhealthy: {job}")
+            response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
+
     return HealthInfo(
         websocket_latency=bot.latency,
+        event_loop_latency=event_loop_latency,
         database_latency=database_latency,
+        shards=shards,
+        jobs=jobs,
+        workers=bot.workers.stats,
     )
 
 
+def _get_shard_health(bot: GHUtilsBot, session: Session) -> list[ShardHealth]:
+    if not bot.shards:
+        return []  # not connected to the gateway
+    shard_count = bot.shard_count
+    now = datetime.now(UTC)
+
+    # use this process's shards directly, rather than their last stored status
+    latencies = dict(bot.latencies)
+    checked_ids = set(bot.env.health_shard_ids or latencies)
+
+    statuses = {
+        status.shard_id: status
+        for status in session.exec(
+            select(ShardStatus).where(ShardStatus.shard_count == shard_count)
+        )
+    }
+
+    shards = list[ShardHealth]()
+    for shard_id in range(shard_count):
+        if shard_id in latencies:
+            latency = latencies[shard_id]
+            shards.append(
+                ShardHealth(
+                    shard_id=shard_id,
+                    latency=latency if math.isfinite(latency) else None,
+                    update_time=now,
+                    checked=shard_id in checked_ids,
+                )
+            )
+            continue
+
+        match statuses.get(shard_id):
+            case ShardStatus() as status if not status.is_stale(STATUS_MAX_AGE):
+                latency, update_time = status.latency, status.update_time
+            case ShardStatus(update_time=update_time):
+                latency = None
+            case None:
+                latency = update_time = None
+        shards.append(
+            ShardHealth(
+                shard_id=shard_id,
+                latency=latency,
+                update_time=update_time,
+                checked=shard_id in checked_ids,
+            )
+        )
+    return shards
+
+
+def _get_job_health(bot: GHUtilsBot, session: Session) -> list[JobHealth]:
+    scheduler = bot.scheduler
+    jobs = list[JobHealth]()
+    for job in list(scheduler.jobs.values()):
+        cutoff = datetime.now(UTC) - job.interval * OVERDUE_INTERVALS
+        match session.get(JobStatus, job.name):
+            case JobStatus() as status:
+                healthy = not status.is_overdue(job.interval, OVERDUE_INTERVALS)
+                jobs.append(
+                    JobHealth(
+                        name=job.name,
+                        leader=scheduler.is_leader(job.name),
+                        healthy=healthy,
+                        running=status.last_run_time > cutoff,
+                        **status.model_dump(exclude={"name"}),
+                    )
+                )
+            case None:
+                # give new jobs a chance to run before reporting them
+                jobs.append(
+                    JobHealth(
+                        name=job.name,
+                        leader=scheduler.is_leader(job.name),
+                        healthy=scheduler.start_time > cutoff,
+                        running=scheduler.start_time > cutoff,
+                        last_run_time=None,
+                        last_success_time=None,
+                        last_duration=None,
+                        last_error=None,
+                    )
+                )
+    return jobs
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(bot: BotDependency, bot_loop: BotLoopDependency):
+    """Returns metrics in the Prometheus text format."""
+
+    # the bot's state isn't thread-safe, so read it from the bot's loop
+    async def collect():
+        return _collect_bot_metrics(bot)
+
+    return PlainTextResponse(
+        REGISTRY.render(await bot_loop.run(collect())),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _collect_bot_metrics(bot: GHUtilsBot) -> list[Metric]:
+    """Returns metrics for values that are tracked by the bot itself, eg. caches."""
+
+    response_caches: dict[str, ResponseCache[Any]] = {
+        "page_cache": bot.page_cache,
+        "workflows": bot.artifact_cache.workflows,
+        "runs": bot.artifact_cache.runs,
+        "artifacts": bot.artifact_cache.artifacts,
+    }
+    caches: dict[str, LRUCache[Any, Any] | TTLCache[Any, Any]] = {
+        "tree_shas": bot.tree_shas,
+        "path_indexes": bot.path_indexes,
+        "configs": bot.config_cache,
+        "user_tokens": bot.user_tokens_cache,
+    }
+    shared_caches: list[ModelCache[Any]] = [
+        bot.repo_cache,
+        bot.user_cache,
+        bot.search_cache,
+    ]
+
+    lookups = list[tuple[tuple[str, str], float]]()
+    for name, cache in response_caches.items():
+        lookups += [
+            ((name, "hit"), cache.hits),
+            ((name, "revalidation"), cache.revalidations),
+            ((name, "miss"), cache.misses),
+        ]
+    for name, cache in caches.items():
+        lookups += [
+            ((name, "hit"), cache.hits),
+            ((name, "miss"), cache.misses),
+        ]
+    for cache in shared_caches:
+        lookups += [
+            ((cache.namespace, "hit"), cache.hits),
+            ((cache.namespace, "miss"), cache.misses),
+        ]
+
+    sizes = [
+        ((name,), len(cache)) for name, cache in (response_caches | caches).items()
+    ]
+    if isinstance(bot.shared_cache, MemoryCacheBackend):
+        sizes.append((("shared",), len(bot.shared_cache)))
+
+    # views are stored once per component, so count each view once
+    view_store = bot._connection._view_store  # pyright: ignore[reportPrivateUsage]
+    views = {
+        id(item.view)
+        for items in view_store._views.values()  # pyright: ignore[reportPrivateUsage]
+        for item in items.values()
+    }
+
+    stats = bot.workers.stats
+    live_cog = bot.get_cog("Live")
+
+    return [
+        Snapshot(
+            "counter",
+            "ghutils_cache_lookups",
+            "Number of cache lookups, by result.",
+            ["cache", "result"],
+            lookups,
+        ),
+        Snapshot(
+            "gauge",
+            "ghutils_cache_size",
+            "Number of entries in each cache.",
+            ["cache"],
+            sizes,
+        ),
+        Snapshot(
+            "gauge",
+            "ghutils_active_views",
+            "Number of views currently listening for interactions.",
+            [],
+            [((), len(views))],
+        ),
+        Snapshot(
+            "gauge",
+            "ghutils_live_messages",
+            "Number of live messages being kept up to date by this instance.",
+            [],
+            [((), len(live_cog) if isinstance(live_cog, Sized) else 0)],
+        ),
+        Snapshot(
+            "counter",
+            "ghutils_worker_tasks_submitted",
+            "Number of tasks submitted to the worker pool.",
+            [],
+            [((), stats.submitted)],
+        ),
+        Snapshot(
+            "counter",
+            "ghutils_worker_tasks_completed",
+            "Number of worker pool tasks that finished running.",
+            [],
+            [((), stats.completed)],
+        ),
+        Snapshot(
+            "gauge",
+            "ghutils_worker_tasks",
+            "Number of worker pool tasks, by state.",
+            ["state"],
+            [(("queued",), stats.queued), (("running",), stats.running)],
+        ),
+        Snapshot(
+            "counter",
+            "ghutils_worker_wait_seconds",
+            "Total seconds that worker pool tasks spent waiting for a free worker.",
+            [],
+            [((), stats.wait_time)],
+        ),
+        Snapshot(
+            "counter",
+            "ghutils_worker_run_seconds",
+            "Total seconds that worker pool tasks spent running.",
+            [],
+            [((), stats.run_time)],
+        ),
+    ]
+
+
 @app.get("/login")
 async def get_login(
     code: str,
     state: str,
+    bot: BotDependency,
+    bot_loop: BotLoopDependency,
     env: EnvDependency,
     session: SessionDependency,
 ):
@@ -101,11 +459,15 @@ async def get_login(
             raise HTTPException(HTTP_400_BAD_REQUEST, "Invalid login state")
 
     # get the access/refresh tokens from GitHub
-    github = GitHub(env.gh.get_oauth_app_auth())
-    auth = await github.auth.as_web_user(
-        code=code,
-        redirect_uri=env.gh.redirect_uri,
-    ).async_exchange_token(github)  # pyright: ignore[reportUnknownMemberType]
+    # the throttler belongs to the bot's loop, so make the request there
+    async def exchange_token():
+        github = GitHub(env.gh.get_oauth_app_auth(), throttler=bot.github_throttler)
+        return await github.auth.as_web_user(
+            code=code,
+            redirect_uri=env.gh.redirect_uri,
+        ).async_exchange_token(github)  # pyright: ignore[reportUnknownMemberType]
+
+    auth = await bot_loop.run(exchange_token())
 
     # insert the tokens into the database
     match session.get(UserGitHubTokens, login.user_id):
@@ -117,18 +479,179 @@ async def get_login(
 
     # commit the delete and insert
     session.commit()
+    bot_loop.call_soon(bot.invalidate_user_tokens, login.user_id)
 
     return HTMLResponse(SUCCESS_PAGE)
 
 
+@app.get("/artifacts/{owner}/{repo}/{workflow}/{branch:path}/{name}")
+async def get_latest_artifact(
+    owner: str,
+    repo: str,
+    workflow: str,
+    branch: str,
+    name: str,
+    bot: BotDependency,
+    bot_loop: BotLoopDependency,
+):
+    """Redirects to the artifact with the given name from the latest successful run of
+    a workflow on a branch.
+
+    `workflow` may be either a workflow id or the name of a file in `.github/workflows`.
+    """
+
+    repo_name = RepositoryName(owner=owner, repo=repo)
+    workflow_id = parse_workflow_id(workflow)
+
+    async def get_latest():
+        current_consumer.set("api")
+        async with bot.get_default_installation_app() as github:
+            return await bot.artifact_cache.get_latest_artifact(
+                github,
+                repo_name,
+                workflow_id,
+                branch,
+                name,
+                scope=APP_CACHE_SCOPE,
+            )
+
+    try:
+        latest = await bot_loop.run(get_latest())
+    except RequestFailed as e:
+        if e.response.status_code == 404:
+            raise HTTPException(HTTP_404_NOT_FOUND, "Repository or workflow not found")
+        raise
+    except RateLimitedError as e:
+        retry_after = max(int((e.reset_time - datetime.now(UTC)).total_seconds()), 1)
+        raise HTTPException(
+            HTTP_429_TOO_MANY_REQUESTS,
+            "Shared GitHub rate limit exceeded",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    if latest is None:
+        raise HTTPException(HTTP_404_NOT_FOUND, "Artifact not found")
+
+    if latest.artifact.expired:
+        raise HTTPException(HTTP_410_GONE, "Artifact has expired")
+
+    return RedirectResponse(
+        f"https://github.com/{repo_name}/actions/runs/{latest.workflow_run.id}"
+        + f"/artifacts/{latest.artifact.id}"
+    )
+
+
+@app.post("/webhooks/github", status_code=HTTP_204_NO_CONTENT)
+async def post_github_webhook(
+    request: Request,
+    bot: BotDependency,
+    bot_loop: BotLoopDependency,
+    env: EnvDependency,
+    x_github_event: Annotated[str, Header()],
+    x_hub_signature_256: Annotated[str, Header()],
+    x_github_delivery: Annotated[str | None, Header()] = None,
+) -> None:
+    """Receives webhook events from the GitHub app, and dispatches them to the bot as
+    `on_github_webhook`."""
+
+    if env.gh.webhook_secret is None:
+        raise HTTPException(HTTP_404_NOT_FOUND, "Webhooks are not enabled")
+
+    body = await request.body()
+    if not verify(env.gh.webhook_secret.get_secret_value(), body, x_hub_signature_256):
+        logger.warning(f"Invalid webhook signature (delivery {x_github_delivery})")
+        raise HTTPException(HTTP_401_UNAUTHORIZED, "Invalid signature")
+
+    if x_github_event not in WEBHOOK_EVENTS:
+        logger.debug(f"Ignoring webhook event: {x_github_event}")
+        return
+
+    try:
+        payload = WebhookPayload.model_validate_json(body)
+    except ValidationError as e:
+        logger.warning(f"Failed to parse webhook payload ({x_github_event}): {e}")
+        raise HTTPException(HTTP_400_BAD_REQUEST, "Failed to parse payload")
+
+    event = GitHubWebhookEvent(
+        name=x_github_event,
+        delivery_id=x_github_delivery,
+        payload=payload,
+    )
+
+    if bot.invalidation_listener:
+        # every process (including this one) receives the event from the listener
+        try:
+            await asyncio.to_thread(
+                send_notification, bot.engine, WEBHOOK_CHANNEL, event.to_payload()
+            )
+            return
+        except (ValueError, SQLAlchemyError) as e:
+            logger.warning(
+                "Failed to send webhook event to other processes, only handling it"
+                + f" here (delivery {x_github_delivery}): {e}"
+            )
+
+    bot_loop.call_soon(bot.dispatch, "github_webhook", event)
+
+
+@app.post("/interactions")
+async def post_interaction(
+    request: Request,
+    bot: BotDependency,
+    bot_loop: BotLoopDependency,
+    env: EnvDependency,
+    x_signature_ed25519: Annotated[str, Header()],
+    x_signature_timestamp: Annotated[str, Header()],
+):
+    """Receives interactions from Discord over HTTP, and dispatches them to the bot's
+    command tree and views.
+
+    The initial response is sent using the interaction callback endpoint (as it would
+    be for interactions received over the gateway), so this just returns 202 once that
+    has happened.
+    """
+
+    if not env.http_interactions:
+        raise HTTPException(HTTP_404_NOT_FOUND, "HTTP interactions are not enabled")
+
+    if bot.application is None:
+        raise HTTPException(HTTP_503_SERVICE_UNAVAILABLE, "Bot is not logged in yet")
+
+    body = await request.body()
+    if not verify_interaction_signature(
+        bot.application.verify_key,
+        x_signature_ed25519,
+        x_signature_timestamp,
+        body,
+    ):
+        raise HTTPException(HTTP_401_UNAUTHORIZED, "Invalid signature")
+
+    try:
+        data = json.loads(body)
+        interaction_type = data["type"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(HTTP_400_BAD_REQUEST, "Failed to parse interaction")
+
+    if interaction_type == InteractionType.ping.value:
+        return JSONResponse({"type": InteractionResponseType.pong.value})
+
+    await bot_loop.run(dispatch_http_interaction(bot, data))
+    return Response(status_code=HTTP_202_ACCEPTED)
+
+
 @dataclass(eq=False)
 class APICog(GHUtilsCog):
     server: Server | None = field(default=None, init=False)
+    thread: threading.Thread | None = field(default=None, init=False)
 
     async def cog_load(self):
         await super().cog_load()
+        if not self.env.api_server:
+            logger.info("API server disabled")
+            return
+
         app.state.bot = self.bot
-        self.server = Server(
+        self.server = server = Server(
             Config(
                 app,
                 host="0.0.0.0",
@@ -136,9 +659,27 @@ class APICog(GHUtilsCog):
                 root_path=self.env.api_root_path,
             )
         )
-        self.bot.loop.create_task(self.server.serve())
+        if self.env.api_thread:
+            logger.info("Starting API server in a separate thread")
+            self.thread = threading.Thread(
+                target=lambda: asyncio.run(server.serve()),
+                name="ghutils-api",
+                daemon=True,
+            )
+            self.thread.start()
+        else:
+            self.bot.loop.create_task(server.serve())
 
     async def cog_unload(self):
-        if self.server:
+        if self.server is None:
+            return
+
+        if self.thread:
+            # shutdown() must be called from the server's own loop, so just ask it
+            # to exit and wait for the thread
+            self.server.should_exit = True
+            await asyncio.to_thread(self.thread.join)
+            self.thread = None
+        else:
             await self.server.shutdown()
-            self.server = None
+        self.server = None
@@ -9,8 +9,8 @@ from discord.app_commands import ContextMenu
 from discord.utils import Coro
 
 from ghutils.core.cog import GHUtilsCog
-from ghutils.ui.components.refresh import RefreshIssuesButton
-from ghutils.ui.embeds.issues import create_issue_embeds
+from ghutils.ui.components.refresh import RefreshIssuesButton, store_issue_references
+from ghutils.ui.embeds.issues import create_issue_embeds, find_issue_references
 
 logger = logging.getLogger(__name__)
 
@@ -74,8 +74,11 @@ class ContextMenusCog(GHUtilsCog):
         await interaction.response.defer()
 
         async with self.bot.github_app(interaction) as (github, _):
-            contents = await create_issue_embeds(github, interaction, message)
+            issues = await find_issue_references(github, interaction, message)
 
-        contents.items.append(RefreshIssuesButton(message))
+        store_issue_references(self.bot, message.id, issues)
+
+        contents = create_issue_embeds(interaction, issues)
+        contents.items.append(RefreshIssuesButton(message.id))
 
         await contents.send(interaction, "public")
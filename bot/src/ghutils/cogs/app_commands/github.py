@@ -3,43 +3,77 @@ from __future__ import annotations
 import logging
 import textwrap
 import uuid
+from contextlib import aclosing
 from datetime import datetime
-from pathlib import Path
+from typing import Any, Callable
 
-import pfzy
 from discord import Color, Embed, Interaction, app_commands
-from discord.app_commands import Range
+from discord.app_commands import Choice, Range
 from discord.ext.commands import GroupCog
-from discord.ui import Button, View
-from githubkit.exception import RequestFailed
-from more_itertools import consecutive_groups, ilen
+from discord.ui import ActionRow, Button, LayoutView, View
+from githubkit import GitHub
+from githubkit.exception import GitHubException, RequestFailed
+from githubkit.rest import FullRepository
+from more_itertools import ilen
 from Pylette import extract_colors  # pyright: ignore[reportUnknownVariableType]
-from yarl import URL
 
+from ghutils.cogs.live import LiveCog
 from ghutils.common.__version__ import VERSION
 from ghutils.core.cog import GHUtilsCog, SubGroup
-from ghutils.core.exceptions import InvalidInputError, NotLoggedInError
+from ghutils.core.exceptions import (
+    InvalidInputError,
+    NotLoggedInError,
+    UnavailableError,
+)
 from ghutils.core.types import LoginState
 from ghutils.db.models import (
     UserGitHubTokens,
     UserLogin,
 )
+from ghutils.ui.components.artifacts import ArtifactContainer
 from ghutils.ui.components.refresh import RefreshCommitButton, RefreshIssueButton
-from ghutils.ui.components.visibility import MessageVisibility, respond_with_visibility
+from ghutils.ui.components.visibility import (
+    PRIVATE_VIEW_TIMEOUT,
+    MessageVisibility,
+    add_visibility_buttons,
+    respond_with_visibility,
+)
 from ghutils.ui.embeds.commits import create_commit_embed
 from ghutils.ui.embeds.issues import create_issue_embed
 from ghutils.ui.embeds.releases import create_release_embed, create_release_items
+from ghutils.ui.views.file_search import MAX_RESULTS, FileSearchView
 from ghutils.ui.views.get_artifact import GetArtifactView
 from ghutils.ui.views.get_release import GetReleaseView
+from ghutils.utils.actions import WORKFLOW_PREFIX, parse_workflow_id
+from ghutils.utils.discord.commands import AnyInteractionCommand
 from ghutils.utils.discord.embeds import set_embed_author
 from ghutils.utils.discord.references import (
     CommitReference,
     IssueReference,
     PRReference,
 )
-from ghutils.utils.discord.transformers import RepositoryOption, UserOption
-from ghutils.utils.github import ReleaseState, RepositoryName, gh_request
+from ghutils.utils.discord.transformers import (
+    REPO_URL_PATTERN,
+    RepositoryOption,
+    UserOption,
+    get_cache_scope,
+)
+from ghutils.utils.file_search import (
+    PathIndex,
+    PathItem,
+    PathMatcher,
+    PathSearchResults,
+    walk_tree,
+)
+from ghutils.utils.github import (
+    ReleaseState,
+    RepositoryName,
+    gh_request,
+    search_branches,
+)
 from ghutils.utils.l10n import translate_text
+from ghutils.utils.live import LiveResource, LiveResourceKind
+from ghutils.utils.strings import truncate_str
 
 logger = logging.getLogger(__name__)
 
@@ -56,17 +90,29 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
         interaction: Interaction,
         reference: IssueReference,
         visibility: MessageVisibility = "private",
+        live: bool = False,
     ):
+        live_cog = self._get_live_cog(interaction, visibility) if live else None
+
         async with self.bot.github_app(interaction) as (github, _):
             button = await RefreshIssueButton.from_reference(github, reference)
 
+        embed = create_issue_embed(*reference)
         await respond_with_visibility(
             interaction,
             visibility,
-            embed=create_issue_embed(*reference),
+            embed=embed,
             items=[button],
         )
 
+        if live_cog:
+            await live_cog.register(
+                interaction,
+                LiveResource(button.repo_id, LiveResourceKind.ISSUE, str(button.issue)),
+                reference[0],
+                embed,
+            )
+
     @app_commands.command()
     @app_commands.rename(reference="pr")
     async def pr(
@@ -74,17 +120,29 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
         interaction: Interaction,
         reference: PRReference,
         visibility: MessageVisibility = "private",
+        live: bool = False,
     ):
+        live_cog = self._get_live_cog(interaction, visibility) if live else None
+
         async with self.bot.github_app(interaction) as (github, _):
             button = await RefreshIssueButton.from_reference(github, reference)
 
+        embed = create_issue_embed(*reference)
         await respond_with_visibility(
             interaction,
             visibility,
-            embed=create_issue_embed(*reference),
+            embed=embed,
             items=[button],
         )
 
+        if live_cog:
+            await live_cog.register(
+                interaction,
+                LiveResource(button.repo_id, LiveResourceKind.ISSUE, str(button.issue)),
+                reference[0],
+                embed,
+            )
+
     @app_commands.command()
     @app_commands.rename(reference="commit")
     async def commit(
@@ -92,7 +150,10 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
         interaction: Interaction,
         reference: CommitReference,
         visibility: MessageVisibility = "private",
+        live: bool = False,
     ):
+        live_cog = self._get_live_cog(interaction, visibility) if live else None
+
         async with self.bot.github_app(interaction) as (github, _):
             embed = await create_commit_embed(github, *reference)
             button = await RefreshCommitButton.from_reference(github, reference)
@@ -104,6 +165,14 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
             items=[button],
         )
 
+        if live_cog:
+            await live_cog.register(
+                interaction,
+                LiveResource(button.repo_id, LiveResourceKind.COMMIT, button.sha),
+                reference[0],
+                embed,
+            )
+
     @app_commands.command()
     async def repo(
         self,
@@ -297,6 +366,7 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
             if user_tokens := session.get(UserGitHubTokens, interaction.user.id):
                 session.delete(user_tokens)
                 session.commit()
+                self.bot.invalidate_user_tokens(interaction.user.id)
 
                 await interaction.response.send_message(
                     "✅ Successfully logged out.",
@@ -370,6 +440,17 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
 
         await respond_with_visibility(interaction, visibility, embed=embed)
 
+    def _get_live_cog(
+        self,
+        interaction: Interaction,
+        visibility: MessageVisibility,
+    ) -> LiveCog:
+        cog = self.bot.get_cog("Live")
+        if not isinstance(cog, LiveCog):
+            raise UnavailableError("Live messages are not available.")
+        cog.check_available(interaction, visibility)
+        return cog
+
     class Actions(SubGroup):
         @app_commands.command()
         async def artifact(self, interaction: Interaction, repo: RepositoryOption):
@@ -377,6 +458,241 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
             view = await GetArtifactView.new(interaction, repo)
             await interaction.followup.send(view=view, ephemeral=True)
 
+        @app_commands.command()
+        async def latest_artifact(
+            self,
+            interaction: Interaction,
+            repo: RepositoryOption,
+            workflow: Range[str, 1, 255],
+            artifact: Range[str, 1, 255],
+            branch: Range[str, 1, 255] | None = None,
+            visibility: MessageVisibility = "private",
+        ):
+            await interaction.response.defer(
+                ephemeral=visibility == "private",
+                thinking=True,
+            )
+
+            repo_name = RepositoryName.from_repo(repo)
+            cache = self.bot.artifact_cache
+
+            async with self.bot.github_app(interaction) as (github, state):
+                scope = get_cache_scope(interaction, state)
+                try:
+                    workflow_info = await cache.get_workflow(
+                        github,
+                        repo_name,
+                        parse_workflow_id(workflow),
+                        scope=scope,
+                    )
+                except RequestFailed as e:
+                    if e.response.status_code == 404:  # pyright: ignore[reportUnknownMemberType]
+                        raise InvalidInputError(
+                            value=workflow,
+                            message="Workflow not found.",
+                        )
+                    raise
+
+                latest = await cache.get_latest_artifact(
+                    github,
+                    repo_name,
+                    workflow_info.id,
+                    branch,
+                    artifact,
+                    scope=scope,
+                )
+
+            if latest is None:
+                raise InvalidInputError(
+                    value=artifact,
+                    message="No artifact with this name was found in the latest successful workflow run.",
+                )
+
+            def create_container():
+                container = ArtifactContainer()
+                container.set_artifact(
+                    self.bot,
+                    repo,
+                    branch,
+                    workflow_info,
+                    latest.workflow_run,
+                    latest.artifact,
+                )
+                return container
+
+            await self._send_artifact(
+                interaction, interaction.command, create_container, visibility
+            )
+
+        @latest_artifact.autocomplete("workflow")
+        async def latest_artifact_workflow_autocomplete(
+            self,
+            interaction: Interaction,
+            current: str,
+        ) -> list[Choice[str]]:
+            if not (repo := _get_repo_from_namespace(interaction)):
+                return []
+
+            async with self.bot.github_app(interaction) as (github, state):
+                try:
+                    response = await self.bot.page_cache.get(
+                        (
+                            get_cache_scope(interaction, state),
+                            str(repo).lower(),
+                            "actions/workflows",
+                            1,
+                            100,
+                        ),
+                        lambda headers: github.rest.actions.async_list_repo_workflows(
+                            owner=repo.owner,
+                            repo=repo.repo,
+                            per_page=100,
+                            headers=headers,
+                        ),
+                    )
+                except GitHubException as e:
+                    logger.warning(e)
+                    return []
+
+            current = current.casefold()
+            choices = list[Choice[str]]()
+            for workflow in response.data.workflows:
+                if not workflow.path.startswith(WORKFLOW_PREFIX):
+                    # dynamic workflows (eg. Dependabot) can only be looked up by id
+                    value = str(workflow.id)
+                else:
+                    value = workflow.path.removeprefix(WORKFLOW_PREFIX)
+
+                if current in workflow.name.casefold() or current in value.casefold():
+                    choices.append(
+                        Choice(
+                            name=truncate_str(f"{workflow.name} ({value})", 100),
+                            value=value,
+                        )
+                    )
+            return choices[:25]
+
+        @latest_artifact.autocomplete("branch")
+        async def latest_artifact_branch_autocomplete(
+            self,
+            interaction: Interaction,
+            current: str,
+        ) -> list[Choice[str]]:
+            if not (repo := _get_repo_from_namespace(interaction)):
+                return []
+
+            async with self.bot.github_app(interaction) as (github, state):
+                try:
+                    if current:
+                        branches = await search_branches(github, repo, current, 25)
+                    else:
+                        response = await self.bot.page_cache.get(
+                            (
+                                get_cache_scope(interaction, state),
+                                str(repo).lower(),
+                                "branches",
+                                1,
+                                25,
+                            ),
+                            lambda headers: github.rest.repos.async_list_branches(
+                                owner=repo.owner,
+                                repo=repo.repo,
+                                per_page=25,
+                                headers=headers,
+                            ),
+                        )
+                        branches = [branch.name for branch in response.data]
+                except GitHubException as e:
+                    logger.warning(e)
+                    return []
+
+            return [Choice(name=branch, value=branch) for branch in branches]
+
+        @latest_artifact.autocomplete("artifact")
+        async def latest_artifact_artifact_autocomplete(
+            self,
+            interaction: Interaction,
+            current: str,
+        ) -> list[Choice[str]]:
+            if not (repo := _get_repo_from_namespace(interaction)):
+                return []
+
+            workflow: str | None = interaction.namespace.workflow
+            branch: str | None = interaction.namespace.branch
+            if not workflow:
+                return []
+
+            cache = self.bot.artifact_cache
+            async with self.bot.github_app(interaction) as (github, state):
+                scope = get_cache_scope(interaction, state)
+                try:
+                    run = await cache.get_latest_run(
+                        github,
+                        repo,
+                        parse_workflow_id(workflow),
+                        branch or None,
+                        scope=scope,
+                    )
+                    if run is None:
+                        return []
+                    response = await cache.list_artifacts(
+                        github, repo, run.id, scope=scope
+                    )
+                except GitHubException as e:
+                    logger.warning(e)
+                    return []
+
+            current = current.casefold()
+            return [
+                Choice(name=artifact.name, value=artifact.name)
+                for artifact in response.data.artifacts
+                if current in artifact.name.casefold()
+            ][:25]
+
+        async def _send_artifact(
+            self,
+            interaction: Interaction,
+            command: AnyInteractionCommand,
+            create_container: Callable[[], ArtifactContainer],
+            visibility: MessageVisibility,
+            show_usage: bool = False,
+        ):
+            # public views only contain links and dynamic items, so discord.py doesn't
+            # need to keep them in memory
+            view = LayoutView(
+                timeout=PRIVATE_VIEW_TIMEOUT if visibility == "private" else None
+            )
+            view.add_item(create_container())
+
+            async def send_as_public(interaction: Interaction):
+                view.stop()
+                # the button's interaction doesn't have the command
+                await self._send_artifact(
+                    interaction, command, create_container, "public", show_usage=True
+                )
+
+            row = ActionRow[Any]()
+            add_visibility_buttons(
+                row,
+                interaction,
+                visibility,
+                command=command,
+                show_usage=show_usage,
+                send_as_public=send_as_public,
+            )
+            view.add_item(row)
+
+            if interaction.response.is_done():
+                await interaction.followup.send(
+                    view=view,
+                    ephemeral=visibility == "private",
+                )
+            else:
+                await interaction.response.send_message(
+                    view=view,
+                    ephemeral=visibility == "private",
+                )
+
     class Search(SubGroup):
         @app_commands.command()
         async def files(
@@ -401,99 +717,119 @@ class GitHubCog(GHUtilsCog, GroupCog, group_name="gh"):
                 if ref is None:
                     ref = repo.default_branch
 
-                try:
-                    tree = await gh_request(
-                        github.rest.git.async_get_tree(
-                            repo.owner.login,
-                            repo.name,
-                            ref,
-                            recursive="1",
-                        )
-                    )
-                except RequestFailed as e:
-                    if e.response.status_code in [404, 422]:  # pyright: ignore[reportUnknownMemberType]
-                        raise InvalidInputError(
-                            value=ref,
-                            message=f"Ref does not exist in `{repo.full_name}`.",
-                        )
-                    raise
+                tree_sha, results = await self._search_tree(
+                    github, repo, ref, query, exact, limit
+                )
 
-                sha = tree.sha[:12]
-                tree_dict = {item.path: item for item in tree.tree if item.path}
+            view = await FileSearchView.new(
+                interaction,
+                repo=repo,
+                ref=ref,
+                query=query,
+                tree_sha=tree_sha,
+                results=results,
+                per_page=limit,
+                visibility=visibility,
+            )
+            await view.send(interaction)
 
-                matches = await pfzy.fuzzy_match(
-                    query,
-                    list(tree_dict.keys()),
-                    scorer=pfzy.substr_scorer if exact else pfzy.fzy_scorer,
+        async def _search_tree(
+            self,
+            github: GitHub[Any],
+            repo: FullRepository,
+            ref: str,
+            query: str,
+            exact: bool,
+            limit: int,
+        ) -> tuple[str, PathSearchResults]:
+            """Returns the tree sha and the search results.
+
+            Up to `MAX_RESULTS` matches are returned. If the tree is too large to
+            search all at once, the search may stop after finding `limit` good matches.
+            """
+
+            workers = self.bot.workers
+
+            # avoid downloading the tree again if it was indexed recently
+            if (tree_sha := self.bot.tree_shas.get((repo.id, ref))) and (
+                index := self.bot.path_indexes.get(tree_sha)
+            ):
+                return tree_sha, await workers.run(
+                    index.search, query, exact=exact, limit=MAX_RESULTS
                 )
 
-                embed = (
-                    Embed(
-                        title="File search results",
-                    )
-                    .set_author(
-                        name=repo.full_name,
-                        url=repo.html_url,
-                        icon_url=repo.owner.avatar_url,
-                    )
-                    .set_footer(
-                        text=f"{repo.full_name}@{ref}  •  Total results: {len(matches)}",
-                    )
+            try:
+                response = await github.rest.git.async_get_tree(
+                    repo.owner.login,
+                    repo.name,
+                    ref,
+                    recursive="1",
                 )
+            except RequestFailed as e:
+                if e.response.status_code in [404, 422]:  # pyright: ignore[reportUnknownMemberType]
+                    raise InvalidInputError(
+                        value=ref,
+                        message=f"Ref does not exist in `{repo.full_name}`.",
+                    )
+                raise
 
-                # code search only works on the default branch
-                # so don't add the link otherwise, since it won't be useful
-                if ref == repo.default_branch:
-                    embed.url = str(
-                        URL("https://github.com/search").with_query(
-                            type="code",
-                            q=f'repo:{repo.full_name} path:"{query}"',
-                        )
+            # validating a large tree can take a while
+            tree = await workers.run(lambda: response.parsed_data)
+
+            self.bot.tree_shas.set((repo.id, ref), tree.sha)
+
+            if (index := self.bot.path_indexes.get(tree.sha)) is None:
+                if tree.truncated:
+                    return tree.sha, await self._search_truncated_tree(
+                        github, repo, tree.sha, query, exact, limit
                     )
 
-                if matches:
-                    embed.color = Color.green()
-                else:
-                    embed.description = "⚠️ No matches found."
-                    embed.color = Color.red()
-
-                size = 0
-                for match in matches[:limit]:
-                    path: str = match["value"]
-                    indices: list[int] = match["indices"]
-
-                    item = tree_dict[path]
-
-                    icon = "📁" if item.type == "tree" else "📄"
-                    url = f"https://github.com/{repo.full_name}/{item.type}/{sha}/{item.path}"
-
-                    parts = list[str]()
-                    index = 0
-                    for group in consecutive_groups(indices):
-                        group = list(group)
-                        parts += [
-                            # everything before the start of the group
-                            path[index : group[0]],
-                            "**",
-                            # everything in the group
-                            path[group[0] : group[-1] + 1],
-                            "**",
-                        ]
-                        index = group[-1] + 1
-                    # everything after the last group
-                    parts.append(path[index:])
-                    highlighted_path = "".join(parts)
+                index = await workers.run(PathIndex.from_tree, tree)
+                self.bot.path_indexes.set(tree.sha, index)
 
-                    name = f"{icon} {Path(path).name}"
-                    value = f"[{highlighted_path}]({url})"
+            return tree.sha, await workers.run(
+                index.search, query, exact=exact, limit=MAX_RESULTS
+            )
 
-                    size += len(name) + len(value)
-                    if size > 5000:
+        async def _search_truncated_tree(
+            self,
+            github: GitHub[Any],
+            repo: FullRepository,
+            tree_sha: str,
+            query: str,
+            exact: bool,
+            limit: int,
+        ) -> PathSearchResults:
+            logger.info(
+                f"Tree is truncated, walking subtrees: {repo.full_name}@{tree_sha}"
+            )
+
+            matcher = PathMatcher(query, exact=exact, limit=MAX_RESULTS)
+            items = list[PathItem]()
+            complete = True
+
+            async with aclosing(
+                walk_tree(
+                    github,
+                    RepositoryName.from_repo(repo),
+                    tree_sha,
+                    workers=self.bot.workers,
+                )
+            ) as batches:
+                async for batch in batches:
+                    await self.bot.workers.run(matcher.add_all, batch)
+                    items += batch
+                    # stop early instead of walking the entire tree
+                    if matcher.strong_matches >= limit:
+                        complete = False
                         break
 
-                    embed.add_field(name=name, value=value, inline=False)
+            # only cache the index if we actually got the whole tree
+            if complete:
+                index = await self.bot.workers.run(PathIndex, tree_sha, items)
+                self.bot.path_indexes.set(tree_sha, index)
 
-                await respond_with_visibility(interaction, visibility, embed=embed)
+            return matcher.results(complete=complete)
 
 
 def _discord_date(timestamp: int | float | datetime):
@@ -505,3 +841,13 @@ def _discord_date(timestamp: int | float | datetime):
         case datetime():
             timestamp = int(timestamp.timestamp())
     return f"<t:{timestamp}:f> (<t:{timestamp}:R>)"
+
+
+def _get_repo_from_namespace(interaction: Interaction) -> RepositoryName | None:
+    """Returns the repo option entered so far, for use in autocomplete callbacks."""
+    value: str = interaction.namespace.repo or ""
+    if not value:
+        return None
+    if match := REPO_URL_PATTERN.match(value):
+        value = match["value"]
+    return RepositoryName.try_parse(value)
@@ -9,7 +9,7 @@ from ghutils.ui.components.refresh import (
     RefreshIssueButton,
     RefreshIssuesButton,
 )
-from ghutils.ui.components.visibility import DeleteButton
+from ghutils.ui.components.visibility import CommandUsageButton, DeleteButton
 from ghutils.utils.discord.commands import get_command, print_command
 
 logger = logging.getLogger(__name__)
@@ -18,15 +18,21 @@ logger = logging.getLogger(__name__)
 class EventsCog(GHUtilsCog):
     """Cog for event handlers that don't fit anywhere else."""
 
-    @Cog.listener()
-    async def on_ready(self):
-        logger.info(f"Logged in as {self.bot.user}")
+    async def cog_load(self):
+        await super().cog_load()
+        # add these here instead of in on_ready, since that isn't called if the bot
+        # isn't connected to the gateway
         self.bot.add_dynamic_items(
+            CommandUsageButton,
             DeleteButton,
             RefreshCommitButton,
             RefreshIssueButton,
             RefreshIssuesButton,
         )
+
+    @Cog.listener()
+    async def on_ready(self):
+        logger.info(f"Logged in as {self.bot.user}")
         await self.bot.fetch_custom_emojis()
 
     @Cog.listener()
@@ -0,0 +1,488 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from discord import DMChannel, Embed, Forbidden, Interaction, NotFound
+from discord.ext.commands import Cog
+from githubkit import GitHub
+from githubkit.exception import GraphQLFailed, RequestFailed
+from githubkit.rest import FullRepository
+from more_itertools import chunked
+from sqlmodel import col, delete, select, update
+
+from ghutils.core.cog import GHUtilsCog
+from ghutils.core.exceptions import InvalidInputError, UnavailableError
+from ghutils.db.models import LiveMessage
+from ghutils.ui.components.refresh import fetch_commit_embed, fetch_issue_embed
+from ghutils.ui.components.visibility import MessageVisibility
+from ghutils.utils.discord.embeds import hash_embed
+from ghutils.utils.github import RepositoryName, gh_request
+from ghutils.utils.live import (
+    ChannelEditQueue,
+    LiveResource,
+    LiveResourceKind,
+    PollSchedule,
+    get_fingerprints,
+)
+from ghutils.utils.webhooks import GitHubWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+LIVE_DURATION = timedelta(days=7)
+"""How long a live message is kept up to date after it was sent."""
+
+BATCH_DELAY = 2
+"""Seconds to wait after an event before updating messages, so bursts of events (eg.
+opening and labelling an issue) only cause one update."""
+
+EDIT_INTERVAL = 1
+"""Minimum seconds between edits in the same channel."""
+
+UPDATE_INTERVAL = timedelta(seconds=15)
+"""Time between checking if any repos need to be polled."""
+
+MIN_POLL_INTERVAL = 60
+MAX_POLL_INTERVAL = 30 * 60
+
+POLL_BATCH_SIZE = 50
+"""Maximum number of resources to fetch in a single GraphQL query."""
+
+POLL_CONCURRENCY = 4
+
+UPDATE_JOB = "update_live_messages"
+
+CLEANUP_INTERVAL = timedelta(hours=1)
+"""Time between deleting expired live messages from the database."""
+
+
+@dataclass(eq=False)
+class LiveCog(GHUtilsCog):
+    """Cog for keeping live issue, PR, and commit messages up to date.
+
+    Repos where the GitHub app is installed are updated using webhook events. Other
+    repos are polled in the background, with one GraphQL query per batch of resources
+    in each repo. Repos are polled less often while nothing changes in them.
+
+    Live messages can be sent from any instance of the bot, but they're only updated
+    by the leader of the `update_live_messages` job, which loads them from the
+    database.
+
+    Messages are only edited if their rendered embed changed.
+    """
+
+    _flush_task: asyncio.Task[None] | None = field(default=None, init=False)
+
+    def __post_init__(self):
+        # resource -> message id -> message
+        self._index = dict[LiveResource, dict[int, LiveMessage]]()
+        # resource -> installation id to fetch it with
+        self._dirty = dict[LiveResource, int | None]()
+        self._edits = ChannelEditQueue(self._edit_message, interval=EDIT_INTERVAL)
+        # repo id -> schedule
+        self._polls = dict[int, PollSchedule]()
+        # resource -> fingerprint from the last poll
+        self._fingerprints = dict[LiveResource, str | None]()
+        self._poll_semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.bot.scheduler.add_job(UPDATE_JOB, UPDATE_INTERVAL, self._update)
+        self.bot.scheduler.add_job(
+            "delete_expired_live_messages",
+            CLEANUP_INTERVAL,
+            self._delete_expired,
+        )
+
+    async def cog_unload(self):
+        self.bot.scheduler.remove_job(UPDATE_JOB)
+        self.bot.scheduler.remove_job("delete_expired_live_messages")
+        if self._flush_task:
+            self._flush_task.cancel()
+        self._edits.close()
+
+    def __len__(self) -> int:
+        """Returns the number of live messages that this instance is updating."""
+        return sum(len(messages) for messages in self._index.values())
+
+    def check_available(
+        self,
+        interaction: Interaction,
+        visibility: MessageVisibility,
+    ):
+        """Raises `InvalidInputError` or `UnavailableError` if a live message can't be
+        sent in response to this interaction."""
+
+        if visibility != "public":
+            raise InvalidInputError(
+                visibility, "Live messages must be sent with `visibility: public`."
+            )
+
+        # we edit messages through the channel, so the bot needs to be able to see it
+        if not (
+            interaction.is_guild_integration()
+            or isinstance(interaction.channel, DMChannel)
+        ):
+            raise UnavailableError(
+                "Live messages can only be sent in servers where the bot is installed."
+            )
+
+    async def register(
+        self,
+        interaction: Interaction,
+        resource: LiveResource,
+        repo: RepositoryName,
+        embed: Embed,
+    ):
+        """Starts updating the response to an interaction whenever `resource` changes.
+
+        `embed` should be the embed that was sent in the response.
+
+        Callers should use `check_available` before sending the response. The message
+        is picked up by the leader of `update_live_messages` on its next run.
+        """
+
+        message = await interaction.original_response()
+        row = LiveMessage(
+            message_id=message.id,
+            channel_id=message.channel.id,
+            repo_id=resource.repo_id,
+            repo=repo,
+            installation_id=await self._get_installation_id(repo),
+            kind=resource.kind.value,
+            key=resource.key,
+            expire_time=datetime.now(UTC) + LIVE_DURATION,
+            embed_hash=hash_embed(embed),
+        )
+
+        def add():
+            with self.bot.db_session() as session:
+                session.add(row)
+                session.commit()
+
+        await asyncio.to_thread(add)
+
+    async def unregister(self, row: LiveMessage):
+        self._forget(row)
+
+        def remove():
+            with self.bot.db_session() as session:
+                session.exec(
+                    delete(LiveMessage).where(
+                        col(LiveMessage.message_id) == row.message_id
+                    )
+                )
+                session.commit()
+
+        await asyncio.to_thread(remove)
+
+    def _forget(self, row: LiveMessage):
+        resource = row.resource
+        if messages := self._index.get(resource):
+            messages.pop(row.message_id, None)
+            if not messages:
+                del self._index[resource]
+                self._fingerprints.pop(resource, None)
+
+    @Cog.listener()
+    async def on_github_webhook(self, event: GitHubWebhookEvent):
+        if not self.bot.scheduler.is_leader(UPDATE_JOB):
+            return
+
+        payload = event.payload
+        if payload.repository is None:
+            return
+
+        repo_id = payload.repository.id
+        resources = list[LiveResource]()
+        match event.name:
+            case "issues" if payload.issue:
+                resources.append(_issue(repo_id, payload.issue.number))
+            case "pull_request" if payload.pull_request:
+                resources.append(_issue(repo_id, payload.pull_request.number))
+            case "check_suite" if payload.check_suite:
+                resources.append(_commit(repo_id, payload.check_suite.head_sha))
+            case "workflow_run" if payload.workflow_run:
+                resources.append(_commit(repo_id, payload.workflow_run.head_sha))
+            case _:
+                pass
+
+        installation_id = payload.installation.id if payload.installation else None
+        for resource in resources:
+            self._dirty[resource] = installation_id
+
+        if self._dirty and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(BATCH_DELAY)
+
+        # anything after this point goes in the next batch
+        dirty, self._dirty = self._dirty, {}
+        self._flush_task = None
+
+        # pick up messages that were sent since the last update
+        await self._load_index()
+
+        by_installation = dict[int | None, list[LiveResource]]()
+        for resource, installation_id in dirty.items():
+            if resource in self._index:
+                by_installation.setdefault(installation_id, []).append(resource)
+
+        for installation_id, resources in by_installation.items():
+            github = (
+                self.bot.get_installation_app(installation_id)
+                if installation_id is not None
+                else self.bot.get_default_installation_app()
+            )
+            async with github:
+                await asyncio.gather(
+                    *(
+                        self._render_and_queue_edits(github, resource)
+                        for resource in resources
+                    )
+                )
+
+    async def _delete_expired(self):
+        """Deletes expired live messages from the database. They aren't loaded by
+        `_load_index`, so this just keeps the table small."""
+
+        def delete_expired():
+            with self.bot.db_session() as session:
+                session.exec(
+                    delete(LiveMessage).where(
+                        col(LiveMessage.expire_time) <= datetime.now(UTC)
+                    )
+                )
+                session.commit()
+
+        await asyncio.to_thread(delete_expired)
+
+    async def _load_index(self):
+        """Replaces the index with the unexpired live messages in the database."""
+
+        def load():
+            with self.bot.db_session() as session:
+                return session.exec(
+                    select(LiveMessage).where(
+                        col(LiveMessage.expire_time) > datetime.now(UTC)
+                    )
+                ).all()
+
+        index = dict[LiveResource, dict[int, LiveMessage]]()
+        for row in await asyncio.to_thread(load):
+            index.setdefault(row.resource, {})[row.message_id] = row
+        self._index = index
+
+        for resource in self._fingerprints.keys() - index.keys():
+            del self._fingerprints[resource]
+
+    async def _update(self):
+        await self._load_index()
+        await self._poll()
+
+    async def _poll(self):
+        # repo id -> (repo name, resources)
+        groups = dict[int, tuple[RepositoryName, list[LiveResource]]]()
+        for resource, messages in self._index.items():
+            for row in messages.values():
+                if row.installation_id is None:
+                    _, resources = groups.setdefault(row.repo_id, (row.repo, []))
+                    resources.append(resource)
+                    break
+
+        for repo_id in self._polls.keys() - groups.keys():
+            del self._polls[repo_id]
+
+        due = {
+            repo_id: group
+            for repo_id, group in groups.items()
+            if self._polls.setdefault(
+                repo_id, PollSchedule(MIN_POLL_INTERVAL, MAX_POLL_INTERVAL)
+            ).is_due
+        }
+        if not due:
+            return
+
+        async with self.bot.get_default_installation_app() as github:
+            await asyncio.gather(
+                *(
+                    self._poll_repo(github, repo_id, repo, resources)
+                    for repo_id, (repo, resources) in due.items()
+                )
+            )
+
+    async def _poll_repo(
+        self,
+        github: GitHub[Any],
+        repo_id: int,
+        repo: RepositoryName,
+        resources: list[LiveResource],
+    ):
+        changed = False
+        try:
+            async with self._poll_semaphore:
+                try:
+                    changed = await self._poll_resources(github, repo, resources)
+                except GraphQLFailed:
+                    # GraphQL doesn't follow renames, so check if the repo has a new
+                    # name and try again
+                    new_repo = await self._get_repo_name(github, repo_id)
+                    if new_repo == repo:
+                        raise
+                    logger.info(f"Live message repo renamed: {repo} -> {new_repo}")
+                    await self._rename_repo(repo_id, new_repo)
+                    repo = new_repo
+                    changed = await self._poll_resources(github, repo, resources)
+        except Exception:
+            logger.warning(f"Failed to poll live messages in {repo}", exc_info=True)
+        finally:
+            if schedule := self._polls.get(repo_id):
+                schedule.update(changed)
+
+    async def _poll_resources(
+        self,
+        github: GitHub[Any],
+        repo: RepositoryName,
+        resources: list[LiveResource],
+    ) -> bool:
+        """Polls resources in a repo, and queues edits for any that changed.
+
+        Returns true if any of them changed since the last poll.
+        """
+
+        changed = False
+        for batch in chunked(resources, POLL_BATCH_SIZE):
+            fingerprints = await get_fingerprints(github, repo, batch)
+            for resource, fingerprint in zip(batch, fingerprints):
+                if resource in self._fingerprints:
+                    if self._fingerprints[resource] == fingerprint:
+                        continue
+                    changed = True
+                self._fingerprints[resource] = fingerprint
+
+                # if it's the first poll since startup, the resource might have
+                # changed while we were offline, so render it anyway
+                if fingerprint is not None:
+                    await self._render_and_queue_edits(github, resource)
+        return changed
+
+    async def _get_repo_name(self, github: GitHub[Any], repo_id: int):
+        repo = await gh_request(
+            github.arequest(  # pyright: ignore[reportUnknownMemberType]
+                "GET",
+                f"/repositories/{repo_id}",
+                response_model=FullRepository,
+            )
+        )
+        return RepositoryName.from_repo(repo)
+
+    async def _rename_repo(self, repo_id: int, repo: RepositoryName):
+        for messages in self._index.values():
+            for row in messages.values():
+                if row.repo_id == repo_id:
+                    row.repo = repo
+
+        def rename():
+            with self.bot.db_session() as session:
+                session.exec(
+                    update(LiveMessage)
+                    .where(col(LiveMessage.repo_id) == repo_id)
+                    .values(repo=repo)
+                )
+                session.commit()
+
+        await asyncio.to_thread(rename)
+
+    async def _render_and_queue_edits(
+        self,
+        github: GitHub[Any],
+        resource: LiveResource,
+    ):
+        try:
+            embed = await self._render(github, resource)
+        except Exception:
+            logger.warning(f"Failed to render live message: {resource}", exc_info=True)
+        else:
+            self._queue_edits(resource, embed)
+
+    def _queue_edits(self, resource: LiveResource, embed: Embed):
+        embed_hash = hash_embed(embed)
+        # copy, since unregister modifies the index
+        for row in list(self._index.get(resource, {}).values()):
+            if row.is_expired():
+                # the row is deleted from the database by `_delete_expired`
+                self._forget(row)
+            elif row.embed_hash != embed_hash:
+                self._edits.put(row.channel_id, row.message_id, embed)
+
+    async def _render(self, github: GitHub[Any], resource: LiveResource) -> Embed:
+        match resource.kind:
+            case LiveResourceKind.ISSUE:
+                return await fetch_issue_embed(
+                    github, resource.repo_id, int(resource.key)
+                )
+            case LiveResourceKind.COMMIT:
+                return await fetch_commit_embed(github, resource.repo_id, resource.key)
+
+    async def _edit_message(self, channel_id: int, message_id: int, embed: Embed):
+        message = self.bot.get_partial_messageable(channel_id).get_partial_message(
+            message_id
+        )
+        row = self._find_row(message_id)
+        if row is None:
+            return
+
+        try:
+            await message.edit(embed=embed)
+        except (NotFound, Forbidden) as e:
+            logger.info(f"Stopping live message {message_id}: {e}")
+            await self.unregister(row)
+            return
+
+        row.embed_hash = embed_hash = hash_embed(embed)
+
+        def store_hash():
+            with self.bot.db_session() as session:
+                session.exec(
+                    update(LiveMessage)
+                    .where(col(LiveMessage.message_id) == message_id)
+                    .values(embed_hash=embed_hash)
+                )
+                session.commit()
+
+        await asyncio.to_thread(store_hash)
+
+    def _find_row(self, message_id: int) -> LiveMessage | None:
+        for messages in self._index.values():
+            if row := messages.get(message_id):
+                return row
+
+    async def _get_installation_id(self, repo: RepositoryName) -> int | None:
+        """Returns the id of the app's installation in a repo, or `None` if the app
+        isn't installed there (or webhooks aren't enabled)."""
+
+        if self.env.gh.webhook_secret is None:
+            return None
+
+        async with self.bot.get_app() as github:
+            try:
+                installation = await gh_request(
+                    github.rest.apps.async_get_repo_installation(repo.owner, repo.repo)
+                )
+            except RequestFailed as e:
+                if e.response.status_code == 404:
+                    return None
+                raise
+        return installation.id
+
+
+def _issue(repo_id: int, number: int):
+    return LiveResource(repo_id, LiveResourceKind.ISSUE, str(number))
+
+
+def _commit(repo_id: int, sha: str):
+    return LiveResource(repo_id, LiveResourceKind.COMMIT, sha)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import logging
+import math
+from datetime import UTC, datetime, timedelta
+
+from discord.ext import tasks
+from sqlmodel import col, delete
+
+from ghutils.core.cog import GHUtilsCog
+from ghutils.db.models import ShardStatus
+
+logger = logging.getLogger(__name__)
+
+STATUS_INTERVAL = 30
+"""Seconds between updating the status of each shard in the database."""
+
+STATUS_MAX_AGE = timedelta(seconds=STATUS_INTERVAL * 4)
+"""How long a shard's status can go without being updated before the shard is
+considered unhealthy."""
+
+
+class ShardsCog(GHUtilsCog):
+    """Cog for reporting the status of this process's gateway shards.
+
+    The bot may be split across several processes, but only one of them runs the API
+    server, so each process stores its shards' latencies in the database for
+    `/health`.
+    """
+
+    async def cog_load(self):
+        await super().cog_load()
+        if self.env.gateway:
+            self._update_status.start()
+
+    async def cog_unload(self):
+        self._update_status.cancel()
+
+    @tasks.loop(seconds=STATUS_INTERVAL)
+    async def _update_status(self):
+        shard_count = self.bot.shard_count
+        now = datetime.now(UTC)
+        with self.bot.db_session() as session:
+            # remove shards from a previous configuration
+            session.exec(
+                delete(ShardStatus).where(col(ShardStatus.shard_count) != shard_count)
+            )
+            for shard_id, latency in self.bot.latencies:
+                session.merge(
+                    ShardStatus(
+                        shard_id=shard_id,
+                        shard_count=shard_count,
+                        latency=latency if math.isfinite(latency) else None,
+                        update_time=now,
+                    )
+                )
+            session.commit()
+
+    @_update_status.before_loop
+    async def _before_update_status(self):
+        await self.bot.wait_until_ready()
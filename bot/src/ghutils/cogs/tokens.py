@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+
+from githubkit import GitHub
+from githubkit.exception import GitHubException
+from sqlmodel import col, select
+
+from ghutils.core.cog import GHUtilsCog
+from ghutils.db.models import UserGitHubTokens
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = timedelta(minutes=10)
+
+REFRESH_BEFORE = timedelta(minutes=30)
+"""How long before a token expires to refresh it."""
+
+REFRESH_CONCURRENCY = 4
+
+
+class TokensCog(GHUtilsCog):
+    """Cog for refreshing users' GitHub tokens before they expire, so commands don't
+    have to wait for a refresh."""
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.bot.scheduler.add_job(
+            "refresh_user_tokens",
+            REFRESH_INTERVAL,
+            self._refresh_tokens,
+        )
+
+    async def cog_unload(self):
+        self.bot.scheduler.remove_job("refresh_user_tokens")
+
+    async def _refresh_tokens(self):
+        cutoff = datetime.now(UTC) + REFRESH_BEFORE
+        with self.bot.db_session() as session:
+            expiring = [
+                user_tokens
+                for user_tokens in session.exec(
+                    select(UserGitHubTokens).where(
+                        col(UserGitHubTokens.refresh_token).is_not(None),
+                        col(UserGitHubTokens.expire_time) <= cutoff,
+                    )
+                )
+                if not user_tokens.is_refresh_expired()
+            ]
+        if not expiring:
+            return
+
+        logger.info(f"Refreshing {len(expiring)} expiring GitHub tokens")
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+        async def refresh(user_tokens: UserGitHubTokens):
+            auth = self.env.gh.get_user_auth(user_tokens)
+            github = GitHub(
+                self.env.gh.get_oauth_app_auth(),
+                throttler=self.bot.github_throttler,
+            )
+            try:
+                async with semaphore:
+                    await auth.async_refresh(github)  # pyright: ignore[reportUnknownMemberType]
+            except GitHubException as e:
+                logger.warning(
+                    f"Failed to refresh GitHub token for user {user_tokens.user_id}: {e}"
+                )
+                return
+
+            with self.bot.db_session() as session:
+                # the user may have logged out or logged in again while we were
+                # refreshing, in which case the refreshed tokens are outdated
+                current = session.exec(
+                    select(UserGitHubTokens)
+                    .where(col(UserGitHubTokens.user_id) == user_tokens.user_id)
+                    .with_for_update()
+                ).one_or_none()
+                if (
+                    current is None
+                    or current.refresh_token != user_tokens.refresh_token
+                ):
+                    logger.debug(
+                        f"Discarding refreshed GitHub token for user {user_tokens.user_id}"
+                    )
+                    return
+                current.refresh(auth)
+                session.add(current)
+                session.commit()
+            self.bot.invalidate_user_tokens(user_tokens.user_id)
+
+        await asyncio.gather(*(refresh(user_tokens) for user_tokens in expiring))
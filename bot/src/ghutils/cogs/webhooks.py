@@ -0,0 +1,70 @@
+import logging
+
+from discord.ext.commands import Cog
+
+from ghutils.core.cog import GHUtilsCog
+from ghutils.utils.actions import WORKFLOW_PREFIX, parse_workflow_id
+from ghutils.utils.github import RepositoryName
+from ghutils.utils.webhooks import GitHubWebhookEvent, WebhookPayload
+
+logger = logging.getLogger(__name__)
+
+
+class WebhooksCog(GHUtilsCog):
+    """Cog for invalidating cached GitHub data when webhook events are received."""
+
+    @Cog.listener()
+    async def on_github_webhook(self, event: GitHubWebhookEvent):
+        payload = event.payload
+        if payload.repository is None:
+            return
+
+        repo_id = payload.repository.id
+        repo = payload.repository.name
+
+        match event.name:
+            case "push":
+                self._on_push(repo_id, repo, payload)
+            case "release":
+                self._invalidate_pages(repo, "releases")
+            case "workflow_run" if payload.workflow_run:
+                run = payload.workflow_run
+                self.bot.artifact_cache.invalidate_runs(
+                    repo,
+                    workflows={run.workflow_id, parse_workflow_id(run.path)},
+                    branch=run.head_branch,
+                )
+                self.bot.artifact_cache.invalidate_artifacts(repo, run.id)
+            case "check_suite" if payload.check_suite:
+                self.bot.artifact_cache.invalidate_runs(
+                    repo,
+                    branch=payload.check_suite.head_branch,
+                )
+            case _:
+                # issues and pull requests aren't cached in memory
+                pass
+
+        logger.debug(
+            f"Handled webhook event: {event.name}"
+            + (f".{payload.action}" if payload.action else "")
+            + f" ({repo}, delivery {event.delivery_id})"
+        )
+
+    def _on_push(self, repo_id: int, repo: RepositoryName, payload: WebhookPayload):
+        # refs can be given as branch names, tags, etc, so just drop the whole repo
+        self.bot.tree_shas.pop_where(lambda key: key[0] == repo_id)
+
+        if payload.created or payload.deleted:
+            self._invalidate_pages(repo, "branches")
+
+        if any(
+            path.startswith(WORKFLOW_PREFIX)
+            for commit in payload.commits
+            for path in commit.paths
+        ):
+            self._invalidate_pages(repo, "actions/workflows")
+            self.bot.artifact_cache.invalidate_workflows(repo)
+
+    def _invalidate_pages(self, repo: RepositoryName, endpoint: str):
+        repo_key = str(repo).lower()
+        self.bot.page_cache.pop_where(lambda key: key[1:3] == (repo_key, endpoint))
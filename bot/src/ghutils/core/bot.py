@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
@@ -8,17 +9,52 @@ import yaml
 from discord import Color, CustomActivity, Emoji, Intents, Interaction
 from discord.app_commands import AppCommandContext, AppInstallationType
 from discord.ext import commands
-from discord.ext.commands import Bot, Context, NoEntryPointError
+from discord.ext.commands import AutoShardedBot, Context, NoEntryPointError
+from discord.utils import MISSING
 from githubkit import GitHub
+from githubkit.rest import FullRepository, PrivateUser, PublicUser
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, create_engine
 
 from ghutils import cogs
 from ghutils.common.__version__ import VERSION
-from ghutils.db.models import UserGitHubTokens
+from ghutils.db.config import ConfigCache
+from ghutils.db.invalidation import (
+    CHANNEL,
+    InvalidationListener,
+    RowKey,
+    get_table_name,
+    track_changes,
+)
+from ghutils.db.models import (
+    GuildConfig,
+    UserConfig,
+    UserGitHubTokens,
+    UserGuildConfig,
+)
 from ghutils.resources import load_resource
+from ghutils.utils.actions import ArtifactCache
+from ghutils.utils.cache import LRUCache, TTLCache
+from ghutils.utils.event_loop import LoopHandle
+from ghutils.utils.file_search import PathIndex
+from ghutils.utils.github_cache import PageKey, ResponseCache
 from ghutils.utils.imports import iter_modules
+from ghutils.utils.shared_cache import (
+    ModelCache,
+    create_cache_backend,
+)
+from ghutils.utils.webhooks import WEBHOOK_CHANNEL, GitHubWebhookEvent
+from ghutils.utils.workers import WorkerPool
 
 from .env import GHUtilsEnv
+from .jobs import create_job_scheduler
+from .metrics import (
+    MetricsThrottler,
+    create_discord_trace_config,
+    create_event_loop_monitor,
+    instrument_engine,
+)
+from .ratelimit import SharedRateLimit, SharedRateLimitThrottler
 from .translator import GHUtilsTranslator
 from .tree import GHUtilsCommandTree
 from .types import CustomEmoji, LoginState
@@ -33,7 +69,7 @@ GHUtilsInteraction = Interaction["GHUtilsBot"]
 
 
 @dataclass
-class GHUtilsBot(Bot):
+class GHUtilsBot(AutoShardedBot):
     env: GHUtilsEnv
 
     def __post_init__(self):
@@ -46,11 +82,93 @@ class GHUtilsBot(Bot):
                 guild=True, dm_channel=True, private_channel=True
             ),
             tree_cls=GHUtilsCommandTree,
+            http_trace=create_discord_trace_config(),
+            **self._get_shard_options(),
         )
         self.engine = create_engine(self.env.db_url)
+        instrument_engine(self.engine)
+        self.session_factory = sessionmaker(self.engine, class_=Session)
+        # shared by all GitHub clients, so requests are throttled and measured together
+        self.github_throttler = MetricsThrottler()
+        # the default installation's rate limit is shared by every instance
+        self.shared_ratelimit = SharedRateLimit(self.db_session)
+        self.default_installation_throttler = SharedRateLimitThrottler(
+            self.shared_ratelimit, self.github_throttler
+        )
+        self.loop_monitor = create_event_loop_monitor(self.env.slow_callback_duration)
+        # periodic jobs that only run in one instance
+        self.scheduler = create_job_scheduler(self.engine)
+        self._closed_event = asyncio.Event()
         self.start_time = datetime.now()
         self.language_colors = self._load_language_colors()
         self._custom_emoji = dict[CustomEmoji, Emoji]()
+        self.workers = WorkerPool(self.env.worker_threads)
+
+        # (repo id, ref) -> tree sha
+        self.tree_shas = TTLCache[tuple[int, str], str](maxsize=1024, ttl=60)
+        # tree sha -> index
+        self.path_indexes = LRUCache[str, PathIndex](maxsize=16)
+        # pages of list endpoints shared between views (eg. workflows, branches)
+        self.page_cache = ResponseCache[PageKey](maxsize=1024, ttl=60)
+        # latest successful workflow runs and their artifacts
+        self.artifact_cache = ArtifactCache()
+
+        # config rows, invalidated when they're changed by any process
+        self.config_cache: ConfigCache = TTLCache(maxsize=4096, ttl=5 * 60)
+        # user id -> tokens (or None if not logged in)
+        # these are credentials, so they're never stored in the shared cache
+        self.user_tokens_cache = TTLCache[int, UserGitHubTokens | None](
+            maxsize=4096, ttl=5 * 60
+        )
+
+        # caches that are shared between instances, if a cache server is configured
+        self.shared_cache = create_cache_backend(self.env.cache_url)
+        # (scope, lowercase repo name) -> repo
+        self.repo_cache = ModelCache[FullRepository](
+            self.shared_cache, "repos", FullRepository, ttl=60
+        )
+        # (scope, lowercase username) -> user
+        self.user_cache = ModelCache[PrivateUser | PublicUser](
+            self.shared_cache, "users", PrivateUser | PublicUser, ttl=5 * 60
+        )
+        # (kind, scope, query) -> search result names, for autocomplete
+        self.search_cache = ModelCache[list[str]](
+            self.shared_cache, "search", list[str], ttl=60
+        )
+
+        track_changes(
+            self.session_factory,
+            [UserGitHubTokens, UserConfig, UserGuildConfig, GuildConfig],
+            on_commit=self._on_rows_committed,
+        )
+        # notifications are only supported by Postgres
+        self.invalidation_listener = (
+            InvalidationListener(
+                self.engine,
+                {
+                    CHANNEL: lambda payload: self._invalidate_row(
+                        RowKey.from_payload(payload)
+                    ),
+                    WEBHOOK_CHANNEL: lambda payload: self.dispatch(
+                        "github_webhook",
+                        GitHubWebhookEvent.from_payload(payload),
+                    ),
+                },
+                on_connect=self._clear_invalidated_caches,
+            )
+            if self.engine.dialect.name == "postgresql"
+            else None
+        )
+
+    def _get_shard_options(self) -> dict[str, Any]:
+        # if these are missing, discord.py uses the recommended number of shards, and
+        # runs all of them in this process
+        options = dict[str, Any]()
+        if self.env.shard_count is not None:
+            options["shard_count"] = self.env.shard_count
+        if self.env.shard_ids is not None:
+            options["shard_ids"] = self.env.shard_ids
+        return options
 
     @classmethod
     def of(cls, interaction: Interaction):
@@ -79,11 +197,45 @@ class GHUtilsBot(Bot):
                 logger.warning(f"No entry point found: {cog}")
         logger.info("Loaded cogs: " + ", ".join(self.cogs.keys()))
 
+    async def setup_hook(self):
+        await super().setup_hook()
+
+        if (duration := self.env.slow_callback_duration) is not None:
+            logger.info(f"Enabling slow callback detection (threshold: {duration}s)")
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = duration
+
+        self.loop_monitor.start()
+
+        if self.invalidation_listener:
+            self.invalidation_listener.start()
+
+        self.scheduler.start()
+
+    async def start_without_gateway(self, token: str):
+        """Logs in without connecting to the gateway, and waits until the bot is
+        closed.
+
+        This is used for instances that only receive interactions over HTTP.
+        """
+        await self.login(token)
+        logger.info("Logged in without connecting to the gateway")
+        await self.fetch_custom_emojis()
+        await self._closed_event.wait()
+
+    async def close(self):
+        self._closed_event.set()
+        self.loop_monitor.stop()
+        if self.invalidation_listener:
+            await self.invalidation_listener.stop()
+        await self.scheduler.stop()
+        await super().close()
+        await self.shared_cache.close()
+        self.workers.shutdown()
+
     def db_session(self, expire_on_commit: bool = False):
-        return Session(
-            self.engine,
-            expire_on_commit=expire_on_commit,
-        )
+        return self.session_factory(expire_on_commit=expire_on_commit)
 
     @asynccontextmanager
     async def github_app(self, user_id: int | Interaction):
@@ -93,22 +245,21 @@ class GHUtilsBot(Bot):
             case Interaction(user=user):
                 user_id = user.id
 
-        with self.db_session() as session:
-            user_tokens = session.get(UserGitHubTokens, user_id)
+        user_tokens = await self.get_user_tokens(user_id)
 
         if user_tokens is None:
-            async with self._get_default_installation_app() as github:
+            async with self.get_default_installation_app() as github:
                 yield github, LoginState.LOGGED_OUT
             return
 
         if user_tokens.is_refresh_expired():
-            async with self._get_default_installation_app() as github:
+            async with self.get_default_installation_app() as github:
                 yield github, LoginState.EXPIRED
             return
 
         # authenticate on behalf of the user
         auth = self.env.gh.get_user_auth(user_tokens)
-        async with GitHub(auth) as github:
+        async with GitHub(auth, throttler=self.github_throttler) as github:
             yield github, LoginState.LOGGED_IN
 
         # update stored credentials if the current ones were expired
@@ -117,11 +268,63 @@ class GHUtilsBot(Bot):
         if auth.token != user_tokens.token:
             with self.db_session() as session:
                 user_tokens.refresh(auth)
-                session.add(user_tokens)
+                # this might have come from the cache, so it isn't attached to a session
+                session.merge(user_tokens)
                 session.commit()
+            self.user_tokens_cache.set(user_id, user_tokens)
 
-    def _get_default_installation_app(self):
-        return GitHub(self.env.gh.get_default_installation_auth())
+    async def get_user_tokens(self, user_id: int) -> UserGitHubTokens | None:
+        if (cached := self.user_tokens_cache.get(user_id, MISSING)) is not MISSING:
+            return cached
+
+        with self.db_session() as session:
+            user_tokens = session.get(UserGitHubTokens, user_id)
+        self.user_tokens_cache.set(user_id, user_tokens)
+        return user_tokens
+
+    def invalidate_user_tokens(self, user_id: int):
+        """Removes a user's tokens from the cache. This must be called after the tokens
+        are changed in the database."""
+        self.user_tokens_cache.pop(user_id)
+
+    def _on_rows_committed(self, rows: set[RowKey]):
+        # sessions can be committed from the API server's thread
+        handle = LoopHandle(self.loop)
+        for row in rows:
+            handle.call_soon(self._invalidate_row, row)
+
+    def _invalidate_row(self, row: RowKey):
+        """Removes a row that was changed by this or another process from the caches."""
+        if row.table == get_table_name(UserGitHubTokens):
+            self.invalidate_user_tokens(row.key[0])
+        else:
+            self.config_cache.pop(row)
+
+    def _clear_invalidated_caches(self):
+        # we might have missed notifications while disconnected
+        self.config_cache.clear()
+        self.user_tokens_cache.clear()
+        # these are invalidated by webhook events
+        self.tree_shas.clear()
+        self.page_cache.clear()
+        self.artifact_cache.clear()
+
+    def get_default_installation_app(self):
+        return GitHub(
+            self.env.gh.get_default_installation_auth(),
+            throttler=self.default_installation_throttler,
+        )
+
+    def get_app(self):
+        """Returns a client authenticated as the GitHub app itself, rather than as one
+        of its installations."""
+        return GitHub(self.env.gh.get_app_auth(), throttler=self.github_throttler)
+
+    def get_installation_app(self, installation_id: int):
+        return GitHub(
+            self.env.gh.get_installation_auth(installation_id),
+            throttler=self.github_throttler,
+        )
 
     def _load_language_colors(self) -> dict[str, Color]:
         logger.info("Loading repo language colors")
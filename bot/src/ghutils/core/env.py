@@ -4,7 +4,11 @@ import logging
 from datetime import datetime
 from typing import ClassVar, Literal, Self
 
-from githubkit import AppInstallationAuthStrategy, OAuthAppAuthStrategy
+from githubkit import (
+    AppAuthStrategy,
+    AppInstallationAuthStrategy,
+    OAuthAppAuthStrategy,
+)
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings as PydanticBaseSettings, SettingsConfigDict
 from yarl import URL
@@ -42,6 +46,8 @@ class GitHubSettings(BaseSettings, env_prefix="github__"):
     private_key: SecretStr
     redirect_uri: str
     default_installation_id: int
+    webhook_secret: SecretStr | None = None
+    """Secret used to verify webhook deliveries. If not set, webhooks are disabled."""
 
     def get_login_url(self, state: str):
         """https://docs.github.com/en/apps/creating-github-apps/authenticating-with-a-github-app/generating-a-user-access-token-for-a-github-app#using-the-web-application-flow-to-generate-a-user-access-token"""
@@ -60,10 +66,21 @@ class GitHubSettings(BaseSettings, env_prefix="github__"):
     # if a user isn't logged in, authenticate using a specific installation
     # to get a higher ratelimit than unauthenticated requests
     def get_default_installation_auth(self):
+        return self.get_installation_auth(self.default_installation_id)
+
+    def get_app_auth(self):
+        return AppAuthStrategy(
+            app_id=self.app_id,
+            private_key=self.private_key.get_secret_value(),
+            client_id=self.client_id,
+            client_secret=self.client_secret.get_secret_value(),
+        )
+
+    def get_installation_auth(self, installation_id: int):
         return AppInstallationAuthStrategy(
             app_id=self.app_id,
             private_key=self.private_key.get_secret_value(),
-            installation_id=self.default_installation_id,
+            installation_id=installation_id,
             client_id=self.client_id,
             client_secret=self.client_secret.get_secret_value(),
         )
@@ -94,6 +111,53 @@ class GHUtilsEnv(BaseSettings):
 
     api_port: int
     api_root_path: str
+    api_thread: bool = True
+    """If true, the API server runs on a separate thread with its own event loop, so
+    HTTP requests don't compete with the Discord gateway for the bot's event loop."""
+
+    api_server: bool = True
+    """If false, the API server isn't started. The launcher uses this to make sure
+    only one process runs it."""
+
+    shard_count: int | None = None
+    """Total number of gateway shards. If not set, uses the number recommended by
+    Discord."""
+    shard_ids: list[int] | None = None
+    """Shards to run in this process. If not set, runs every shard.
+
+    This is usually set by the launcher, rather than manually.
+    """
+    health_shard_ids: list[int] | None = None
+    """Shards that make `/health` fail if they're unhealthy. If not set, only this
+    process's shards are checked, so other replicas don't restart when one of them has
+    a problem.
+
+    The launcher sets this to every shard it runs, since its processes are restarted
+    together anyway.
+    """
+    shard_processes: int = 1
+    """Number of processes to split the shards between. If greater than 1, the bot is
+    started by a launcher that runs each range of shards in a separate process."""
+
+    gateway: bool = True
+    """If false, the bot logs in without connecting to the gateway, so it can only
+    receive interactions over HTTP."""
+    http_interactions: bool = False
+    """If true, the API server accepts interactions from Discord at `/interactions`."""
+
+    worker_threads: int = 4
+    """Maximum number of threads to use for CPU-heavy work."""
+
+    cache_url: str | None = None
+    """URL of a Redis-compatible server for caches that are shared between instances
+    (eg. `redis://localhost:6379/0`). If not set, these caches are kept in memory."""
+
+    slow_callback_duration: float | None = None
+    """If set, enables asyncio's debug mode, and logs the stack of the event loop thread
+    whenever it's blocked for longer than this many seconds.
+
+    Debug mode has some overhead, so this is disabled by default.
+    """
 
     github: GitHubSettings = Field({})
     """GitHub-related environment variables."""
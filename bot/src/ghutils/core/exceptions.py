@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any
 
 from discord.app_commands import AppCommandError
@@ -26,3 +27,24 @@ class InvalidInputError(AppCommandError):
         self.value = value
         self.message = message
         super().__init__(f"{message} (value: {value})")
+
+
+class UnavailableError(AppCommandError):
+    """An exception raised when a feature (eg. live messages) can't be used in the
+    context of the current interaction, regardless of the input values."""
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class RateLimitedError(AppCommandError):
+    """An exception raised when a request can't be made using the bot's shared GitHub
+    rate limit, either because it's used up or because the guild (or user, outside of
+    guilds) has used more than its share.
+    """
+
+    def __init__(self, resource: str, reset_time: datetime):
+        self.resource = resource
+        self.reset_time = reset_time
+        super().__init__(f"Shared GitHub rate limit exceeded (resource: {resource})")
@@ -0,0 +1,87 @@
+# pyright: reportPrivateUsage=none
+
+"""Support for receiving interactions over HTTP instead of the gateway.
+
+https://discord.com/developers/docs/interactions/receiving-and-responding#receiving-an-interaction
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from discord import Interaction
+
+from .bot import GHUtilsBot
+from .ratelimit import current_consumer, get_consumer
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_TIMEOUT = 3
+"""Seconds that Discord waits for the initial response to an interaction."""
+
+RESPONSE_POLL_INTERVAL = 0.025
+
+
+def verify_interaction_signature(
+    public_key: str,
+    signature: str,
+    timestamp: str,
+    body: bytes,
+) -> bool:
+    """Returns true if an HTTP interaction request was signed by Discord."""
+    try:
+        key = Ed25519PublicKey.from_public_bytes(bytes.fromhex(public_key))
+        key.verify(bytes.fromhex(signature), timestamp.encode() + body)
+    except (ValueError, InvalidSignature):
+        return False
+    return True
+
+
+async def dispatch_http_interaction(bot: GHUtilsBot, data: Any) -> bool:
+    """Dispatches an interaction received over HTTP to the command tree and views, in
+    the same way that discord.py dispatches interactions from the gateway.
+
+    Waits until the initial response has been sent using the interaction callback
+    endpoint, and returns false if nothing responded in time.
+    """
+
+    state = bot._connection
+    interaction = Interaction(data=data, state=state)
+
+    # the view store's tasks copy this context, so requests made by components and
+    # modals are counted against the right consumer
+    consumer_token = current_consumer.set(get_consumer(interaction))
+    match data["type"]:
+        case 2 | 4:  # application command, autocomplete
+            bot.tree._from_interaction(interaction)  # pyright: ignore[reportArgumentType]
+        case 3:  # message component
+            state._view_store.dispatch_view(
+                data["data"]["component_type"],
+                data["data"]["custom_id"],
+                interaction,
+            )
+        case 5:  # modal submit
+            state._view_store.dispatch_modal(
+                data["data"]["custom_id"],
+                interaction,
+                data["data"]["components"],
+            )
+        case _:
+            pass
+    bot.dispatch("interaction", interaction)
+    current_consumer.reset(consumer_token)
+
+    try:
+        async with asyncio.timeout(RESPONSE_TIMEOUT):
+            while not interaction.response.is_done():
+                await asyncio.sleep(RESPONSE_POLL_INTERVAL)
+    except TimeoutError:
+        logger.warning(
+            f"No response to HTTP interaction {interaction.id} (type {data['type']})"
+        )
+        return False
+    return True
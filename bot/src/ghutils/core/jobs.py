@@ -0,0 +1,298 @@
+"""Periodic background jobs that only run in one instance of the bot at a time.
+
+Each job has a Postgres advisory lock. Every instance tries to take the locks of all
+jobs, and the instance that holds a job's lock (its leader) is the only one that runs
+it. The locks are held by a dedicated connection, so if the leader stops or loses its
+connection, the lock is released and another instance takes over.
+
+When a job runs, its status is stored in the database, so `/health` can report on jobs
+that are running in other instances, and a new leader can continue the job's schedule.
+
+Other databases don't support advisory locks, so every job runs in every instance.
+
+https://www.postgresql.org/docs/current/explicit-locking.html#ADVISORY-LOCKS
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from time import monotonic
+from timeit import default_timer as timer
+from typing import Any, Awaitable, Callable
+
+import psycopg2
+from sqlalchemy import Engine
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlmodel import Session
+
+from ghutils.db.models import JobStatus
+
+from .metrics import JOB_DURATION, JOB_LAST_SUCCESS, JOB_LEADER, JOB_RUNS
+
+logger = logging.getLogger(__name__)
+
+TICK = 5
+"""Seconds between checking for due jobs and trying to take the locks of jobs that
+another instance is running."""
+
+OVERDUE_INTERVALS = 3
+"""A job is unhealthy if it hasn't succeeded in this many intervals."""
+
+
+@dataclass
+class Job:
+    name: str
+    interval: timedelta
+    func: Callable[[], Awaitable[object]] = field(repr=False)
+
+    next_run: float = field(default=0, repr=False)
+    """Monotonic time when the job is next due."""
+    task: asyncio.Task[None] | None = field(default=None, repr=False)
+
+
+def get_lock_key(name: str) -> int:
+    """Returns the key of a job's advisory lock (a signed 64-bit integer)."""
+    digest = hashlib.blake2b(f"ghutils:job:{name}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), signed=True)
+
+
+@dataclass
+class JobRun:
+    """The result of running a job once."""
+
+    name: str
+    start_time: datetime
+    duration: float
+    error: BaseException | None
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        on_run: Callable[[JobRun], object] | None = None,
+        on_leader_change: Callable[[str, bool], object] | None = None,
+    ):
+        self.engine = engine
+        self.on_run = on_run
+        self.on_leader_change = on_leader_change
+        self.use_locks = engine.dialect.name == "postgresql"
+        self.start_time = datetime.now(UTC)
+
+        self.jobs = dict[str, Job]()
+        # names of jobs whose locks are held by this instance
+        self._held = set[str]()
+        # DBAPI connection that holds the locks
+        self._connection: Any = None
+        self._task: asyncio.Task[None] | None = None
+
+    def add_job(
+        self,
+        name: str,
+        interval: timedelta,
+        func: Callable[[], Awaitable[object]],
+    ):
+        """Adds a job that runs `func` every `interval` in one instance of the bot."""
+        if name in self.jobs:
+            raise ValueError(f"Job already added: {name}")
+        self.jobs[name] = Job(name, interval, func)
+
+    def remove_job(self, name: str):
+        """Removes a job. Its lock is released on the next tick."""
+        if (job := self.jobs.pop(name, None)) and job.task:
+            job.task.cancel()
+
+    def is_leader(self, name: str) -> bool:
+        """Returns true if this instance is currently running the given job."""
+        return name in self._held
+
+    def start(self):
+        if not self.use_locks:
+            logger.info("Advisory locks aren't supported, running every job here")
+        self.start_time = datetime.now(UTC)
+        self._task = asyncio.create_task(self._run(), name="job-scheduler")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for job in self.jobs.values():
+            if job.task:
+                job.task.cancel()
+        self._release_all()
+        # closing the connection releases the locks
+        await asyncio.to_thread(self._disconnect)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except (DBAPIError, psycopg2.Error, OSError) as e:
+                logger.warning(f"Lost connection for job locks: {e}")
+                self._release_all()
+                await asyncio.to_thread(self._disconnect)
+            await asyncio.sleep(TICK)
+
+    async def _tick(self):
+        if self.use_locks:
+            removed = self._held - self.jobs.keys()
+            candidates = {
+                name: get_lock_key(name) for name in self.jobs.keys() - self._held
+            }
+            acquired = await asyncio.to_thread(
+                self._update_locks,
+                [get_lock_key(name) for name in removed],
+                candidates,
+            )
+            for name in removed:
+                self._release(name)
+        else:
+            acquired = self.jobs.keys() - self._held
+
+        for name in acquired:
+            self._held.add(name)
+            if job := self.jobs.get(name):
+                logger.info(f"Running job {name} in this instance")
+                await self._load_schedule(job)
+                if self.on_leader_change:
+                    self.on_leader_change(name, True)
+
+        now = monotonic()
+        for job in self.jobs.values():
+            if job.name in self._held and job.task is None and job.next_run <= now:
+                job.next_run = now + job.interval.total_seconds()
+                job.task = asyncio.create_task(
+                    self._run_job(job), name=f"job-{job.name}"
+                )
+
+    async def _run_job(self, job: Job):
+        start_time = datetime.now(UTC)
+        start = timer()
+        error = None
+        try:
+            await job.func()
+        except Exception as e:
+            logger.exception(f"Job {job.name} failed")
+            error = e
+        finally:
+            job.task = None
+
+        run = JobRun(job.name, start_time, timer() - start, error)
+        if self.on_run:
+            self.on_run(run)
+        await asyncio.to_thread(self._save_status, run)
+
+    async def _load_schedule(self, job: Job):
+        """Continues the job's schedule from its last run in any instance."""
+
+        def get_status():
+            with Session(self.engine) as session:
+                return session.get(JobStatus, job.name)
+
+        try:
+            status = await asyncio.to_thread(get_status)
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to get status of job {job.name}: {e}")
+            status = None
+
+        if status is None:
+            job.next_run = monotonic()
+        else:
+            next_run_time = status.last_run_time + job.interval
+            delay = (next_run_time - datetime.now(UTC)).total_seconds()
+            job.next_run = monotonic() + max(delay, 0)
+
+    def _save_status(self, run: JobRun):
+        try:
+            with Session(self.engine) as session:
+                status = session.get(JobStatus, run.name) or JobStatus(
+                    name=run.name,
+                    last_run_time=run.start_time,
+                )
+                status.last_run_time = run.start_time
+                status.last_duration = run.duration
+                if run.error is None:
+                    status.last_success_time = run.start_time
+                    status.last_error = None
+                else:
+                    status.last_error = f"{run.error.__class__.__name__}: {run.error}"
+                session.add(status)
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to save status of job {run.name}: {e}")
+
+    def _release(self, name: str):
+        self._held.discard(name)
+        logger.info(f"No longer running job {name} in this instance")
+        if (job := self.jobs.get(name)) and job.task:
+            job.task.cancel()
+        if self.on_leader_change:
+            self.on_leader_change(name, False)
+
+    def _release_all(self):
+        for name in list(self._held):
+            self._release(name)
+
+    # runs in a worker thread
+
+    def _update_locks(self, unlock: list[int], candidates: dict[str, int]) -> set[str]:
+        """Releases the locks in `unlock`, and tries to take the locks of the jobs in
+        `candidates` (name -> lock key). Returns the names of the jobs whose locks were
+        acquired."""
+
+        connection = self._connection or self._connect()
+
+        acquired = set[str]()
+        with connection.cursor() as cursor:
+            # if the connection was lost, this fails and we stop running our jobs
+            cursor.execute("SELECT 1")
+
+            for key in unlock:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (key,))
+
+            for name, key in candidates.items():
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+                if cursor.fetchone()[0]:
+                    acquired.add(name)
+
+        return acquired
+
+    def _connect(self) -> Any:
+        # use a raw connection outside of the pool, since it's held open forever
+        pool_connection = self.engine.raw_connection()
+        pool_connection.detach()
+        connection = pool_connection.driver_connection
+        assert connection is not None
+        connection.autocommit = True
+        self._connection = connection
+        return connection
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except psycopg2.Error:
+                pass
+            self._connection = None
+
+
+def create_job_scheduler(engine: Engine) -> JobScheduler:
+    """Returns a scheduler that records job durations, results, and leadership."""
+
+    def on_run(run: JobRun):
+        JOB_DURATION.observe(run.duration, job=run.name)
+        if run.error is None:
+            JOB_RUNS.inc(job=run.name, result="success")
+            JOB_LAST_SUCCESS.set(run.start_time.timestamp(), job=run.name)
+        else:
+            JOB_RUNS.inc(job=run.name, result="failure")
+
+    def on_leader_change(name: str, leader: bool):
+        JOB_LEADER.set(1 if leader else 0, job=name)
+
+    return JobScheduler(engine, on_run=on_run, on_leader_change=on_leader_change)
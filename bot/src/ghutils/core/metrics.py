@@ -0,0 +1,337 @@
+"""Prometheus metrics for the bot, served by the API at `/metrics`.
+
+Command durations are broken down by phase (eg. `transform`, `db`, `github`, `render`,
+`discord`). The command being handled is tracked with a context variable, so phases
+that happen outside of a command (eg. background tasks, component callbacks) are
+recorded with `command="none"`.
+"""
+
+from __future__ import annotations
+
+import inspect
+import re
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from timeit import default_timer as timer
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator, cast
+
+import aiohttp
+import httpx
+from githubkit import Response
+from githubkit.throttling import BaseThrottler, LocalThrottler
+from sqlalchemy import Engine, event
+
+from ghutils.utils.event_loop import BlockedCall, EventLoopMonitor
+from ghutils.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_DURATION = REGISTRY.register(
+    Histogram(
+        "ghutils_command_duration_seconds",
+        "Time spent handling application commands, by phase. The total phase is the"
+        + " entire command, and the other phases may overlap.",
+        ["command", "phase"],
+    )
+)
+
+COMMAND_ERRORS = REGISTRY.register(
+    Counter(
+        "ghutils_command_errors",
+        "Number of application commands that failed with an unexpected exception.",
+        ["command"],
+    )
+)
+
+GITHUB_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "ghutils_github_request_duration_seconds",
+        "Time spent making GitHub API requests, by endpoint.",
+        ["command", "method", "endpoint"],
+    )
+)
+
+GITHUB_RATELIMIT_REMAINING = REGISTRY.register(
+    Gauge(
+        "ghutils_github_ratelimit_remaining",
+        "Requests remaining in the most recently seen GitHub rate limit window.",
+        ["resource"],
+    )
+)
+
+EVENT_LOOP_LAG = REGISTRY.register(
+    Histogram(
+        "ghutils_event_loop_lag_seconds",
+        "How late the event loop was to wake up a sleeping task.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    )
+)
+
+EVENT_LOOP_BLOCKED = REGISTRY.register(
+    Counter(
+        "ghutils_event_loop_blocked",
+        "Number of times the event loop was blocked for longer than the slow callback"
+        + " threshold, by call site.",
+        ["site"],
+    )
+)
+
+EVENT_LOOP_BLOCKED_SECONDS = REGISTRY.register(
+    Counter(
+        "ghutils_event_loop_blocked_seconds",
+        "Total seconds that the event loop was blocked for longer than the slow callback"
+        + " threshold, by call site.",
+        ["site"],
+    )
+)
+
+RESPONSE_OBSERVER = "ghutils_response_observer"
+"""Request extension for a function that should be called with the response, eg. to
+update a shared rate limit from the response headers."""
+
+JOB_DURATION = REGISTRY.register(
+    Histogram(
+        "ghutils_job_duration_seconds",
+        "Time spent running background jobs in this instance.",
+        ["job"],
+        buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 600),
+    )
+)
+
+JOB_RUNS = REGISTRY.register(
+    Counter(
+        "ghutils_job_runs",
+        "Number of times background jobs ran in this instance, by result.",
+        ["job", "result"],
+    )
+)
+
+JOB_LAST_SUCCESS = REGISTRY.register(
+    Gauge(
+        "ghutils_job_last_success_timestamp_seconds",
+        "Unix time when background jobs last succeeded in this instance.",
+        ["job"],
+    )
+)
+
+JOB_LEADER = REGISTRY.register(
+    Gauge(
+        "ghutils_job_leader",
+        "Whether this instance is currently the one running each background job.",
+        ["job"],
+    )
+)
+
+NO_COMMAND = "none"
+
+current_command = ContextVar[str]("current_command", default=NO_COMMAND)
+"""The qualified name of the command currently being handled in this context."""
+
+
+@contextmanager
+def record_phase(phase: str):
+    command = current_command.get()
+    start = timer()
+    try:
+        yield
+    finally:
+        COMMAND_DURATION.observe(timer() - start, command=command, phase=phase)
+
+
+def timed_phase[**P, R](phase: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator that records the duration of each call as the given phase.
+
+    Works with both normal and async functions.
+    """
+
+    def decorator(f: Callable[P, R]) -> Callable[P, R]:
+        if inspect.iscoroutinefunction(f):
+            async_f = cast(Callable[P, Awaitable[Any]], f)
+
+            @wraps(f)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs):
+                with record_phase(phase):
+                    return await async_f(*args, **kwargs)
+
+            return cast(Callable[P, R], async_wrapper)
+
+        @wraps(f)
+        def wrapper(*args: P.args, **kwargs: P.kwargs):
+            with record_phase(phase):
+                return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_github_response(response: Response[Any]):
+    """Records the rate limit headers of a GitHub response, if present."""
+    if observer := response.raw_request.extensions.get(RESPONSE_OBSERVER):
+        observer(response)
+
+    headers = response.headers
+    try:
+        remaining = int(headers["x-ratelimit-remaining"])
+    except (KeyError, ValueError):
+        return
+    GITHUB_RATELIMIT_REMAINING.set(
+        remaining,
+        resource=headers.get("x-ratelimit-resource", "core"),
+    )
+
+
+# segment -> names of the parameters that follow it
+_ENDPOINT_PARAMS: dict[str, tuple[str, ...]] = {
+    "repos": ("{owner}", "{repo}"),
+    "repositories": ("{repository_id}",),
+    "users": ("{username}",),
+    "orgs": ("{org}",),
+    "branches": ("{branch}",),
+    "commits": ("{ref}",),
+    "contents": ("{path}",),
+    "tags": ("{tag}",),
+    "trees": ("{tree_sha}",),
+    "workflows": ("{workflow_id}",),
+    "installations": ("{installation_id}",),
+}
+
+# parameters that can contain slashes
+_GREEDY_PARAMS = {"{branch}", "{ref}", "{path}", "{tag}"}
+
+# segments that can follow a greedy parameter
+_GREEDY_SUFFIXES = {"status", "statuses", "check-suites", "check-runs"}
+
+_NUMBER_PATTERN = re.compile(r"[0-9]+")
+
+
+def get_endpoint_template(path: str) -> str:
+    """Converts a GitHub API path (eg. `/repos/octocat/hello-world/issues/1`) into a
+    template (eg. `/repos/{owner}/{repo}/issues/{number}`), to keep the number of
+    distinct label values low."""
+
+    segments = iter(path.strip("/").split("/"))
+    result = list[str]()
+    for segment in segments:
+        if _NUMBER_PATTERN.fullmatch(segment):
+            result.append("{number}")
+            continue
+
+        result.append(segment)
+        for param in _ENDPOINT_PARAMS.get(segment, ()):
+            if next(segments, None) is None:
+                break
+            result.append(param)
+            if param in _GREEDY_PARAMS:
+                # skip the rest of the parameter, but keep a known suffix
+                for rest in segments:
+                    if rest in _GREEDY_SUFFIXES:
+                        result.append(rest)
+
+    return "/" + "/".join(result)
+
+
+class MetricsThrottler(BaseThrottler):
+    """Throttler that records the duration of every GitHub request.
+
+    githubkit calls the throttler around each request, which makes it a convenient
+    place to measure requests from all of the bot's clients.
+    """
+
+    def __init__(self, throttler: BaseThrottler | None = None):
+        # GitHub doesn't allow more than 100 concurrent requests
+        self.throttler = throttler or LocalThrottler(100)
+
+    @contextmanager
+    def acquire(self, request: httpx.Request) -> Generator[None, Any, Any]:
+        with self.throttler.acquire(request), self._record(request):
+            yield
+
+    @asynccontextmanager
+    async def async_acquire(self, request: httpx.Request) -> AsyncGenerator[None, Any]:
+        async with self.throttler.async_acquire(request):
+            with self._record(request):
+                yield
+
+    @contextmanager
+    def _record(self, request: httpx.Request):
+        command = current_command.get()
+        endpoint = get_endpoint_template(request.url.path)
+        start = timer()
+        try:
+            yield
+        finally:
+            duration = timer() - start
+            COMMAND_DURATION.observe(duration, command=command, phase="github")
+            GITHUB_REQUEST_DURATION.observe(
+                duration,
+                command=command,
+                method=request.method,
+                endpoint=endpoint,
+            )
+
+
+def create_discord_trace_config() -> aiohttp.TraceConfig:
+    """Returns a trace config that records the duration of Discord HTTP requests
+    (including interaction responses) as the `discord` phase."""
+
+    async def on_request_start(
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ):
+        context.start = timer()
+        context.command = current_command.get()
+
+    async def on_request_end(
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams | aiohttp.TraceRequestExceptionParams,
+    ):
+        COMMAND_DURATION.observe(
+            timer() - context.start,
+            command=context.command,
+            phase="discord",
+        )
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_end)
+    return trace_config
+
+
+def instrument_engine(engine: Engine):
+    """Records the duration of every database query as the `db` phase."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, *_: Any):
+        conn.info.setdefault("query_start_time", []).append(timer())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, *_: Any):
+        start = conn.info["query_start_time"].pop()
+        COMMAND_DURATION.observe(
+            timer() - start,
+            command=current_command.get(),
+            phase="db",
+        )
+
+
+def create_event_loop_monitor(block_threshold: float | None) -> EventLoopMonitor:
+    """Returns a monitor that records event loop lag and blocked calls."""
+
+    def on_lag(lag: float):
+        EVENT_LOOP_LAG.observe(lag)
+
+    def on_blocked_call(call: BlockedCall):
+        EVENT_LOOP_BLOCKED.inc(site=call.site)
+        EVENT_LOOP_BLOCKED_SECONDS.inc(call.duration, site=call.site)
+
+    return EventLoopMonitor(
+        block_threshold=block_threshold,
+        on_lag=on_lag,
+        on_blocked_call=on_blocked_call,
+    )
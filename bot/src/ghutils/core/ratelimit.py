@@ -0,0 +1,347 @@
+"""GitHub rate limit accounting for the default installation, shared by every instance
+of the bot using the database.
+
+Users who aren't logged in share the default installation's rate limits, so each
+request made with it is counted in the database before it's sent. To stop one busy
+guild from using up the limit for everyone else, each consumer (a guild, or a user
+outside of guilds) can only use an equal share of the limit per window, with one share
+kept free for consumers that haven't made any requests yet.
+
+The counts are corrected using the rate limit headers of the responses, which also
+include requests that were made without going through this module. Responses from
+the HTTP cache don't use the rate limit, so the requests they were counted as are
+refunded, and their (possibly stale) headers are ignored.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from time import monotonic
+from typing import Any, AsyncGenerator, Callable, Generator, Literal, get_args
+
+import httpx
+from discord import Interaction
+from githubkit import Response
+from githubkit.throttling import BaseThrottler
+from sqlalchemy import delete, func, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from ghutils.db.models import RateLimitBudget, RateLimitUsage
+
+from .exceptions import RateLimitedError
+from .metrics import RESPONSE_OBSERVER
+
+logger = logging.getLogger(__name__)
+
+type Resource = Literal["core", "search", "code_search", "graphql"]
+
+DEFAULT_LIMITS: dict[Resource, tuple[int, timedelta]] = {
+    "core": (5000, timedelta(hours=1)),
+    "search": (30, timedelta(minutes=1)),
+    "code_search": (10, timedelta(minutes=1)),
+    "graphql": (5000, timedelta(hours=1)),
+}
+"""The limit and window length of each resource, used until the actual values are
+seen in a response."""
+
+BACKGROUND_CONSUMER = "background"
+
+current_consumer = ContextVar[str]("current_consumer", default=BACKGROUND_CONSUMER)
+"""The consumer that the current context's GitHub requests are counted against."""
+
+SYNC_INTERVAL = 10
+"""Minimum seconds between updates to a budget from response headers, unless the
+window changed."""
+
+MAX_ATTEMPTS = 3
+
+
+def get_consumer(interaction: Interaction) -> str:
+    if interaction.guild_id:
+        return f"guild/{interaction.guild_id}"
+    return f"user/{interaction.user.id}"
+
+
+class ConsumerMixin:
+    """Mixin for views, modals, and dynamic items that counts the requests made by
+    their callbacks against the consumer of the interaction.
+
+    discord.py calls `interaction_check` in the same task as the callback, so setting
+    `current_consumer` here applies to the callback too. This must come before the
+    discord.py class in the bases.
+    """
+
+    async def interaction_check(self, interaction: Interaction, /) -> bool:
+        current_consumer.set(get_consumer(interaction))
+        return True
+
+
+def get_resource(path: str) -> Resource:
+    """Returns the rate limit resource that a request to a GitHub API path uses.
+
+    https://docs.github.com/en/rest/rate-limit/rate-limit#about-rate-limits
+    """
+    path = "/" + path.strip("/")
+    if path.startswith("/search/code"):
+        return "code_search"
+    if path.startswith("/search/"):
+        return "search"
+    if path == "/graphql":
+        return "graphql"
+    return "core"
+
+
+class SharedRateLimit:
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+        # resource -> (reset time, monotonic time) of the last update from headers
+        self._synced = dict[str, tuple[datetime, float]]()
+        self._tasks = set[asyncio.Task[None]]()
+
+    async def acquire(self, resource: Resource, consumer: str):
+        """Counts one request against the shared budget.
+
+        Raises `RateLimitedError` if the budget is used up, or if the consumer has
+        already used its share.
+        """
+        await asyncio.to_thread(self.acquire_sync, resource, consumer)
+
+    def acquire_sync(self, resource: Resource, consumer: str):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                with self.session_factory() as session:
+                    return self._acquire(session, resource, consumer)
+            except IntegrityError:
+                # another process inserted the same row first, so try again
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+            except SQLAlchemyError as e:
+                # the budget is only an estimate, so don't fail the request over it
+                logger.warning(f"Failed to update shared rate limit: {e}")
+                return
+
+    def observe(self, response: Response[Any], consumer: str | None = None):
+        """Updates the shared budget from the rate limit headers of a response.
+
+        If the response came from the HTTP cache and `consumer` is given, the request
+        that was counted against the consumer is refunded instead.
+        """
+
+        if response.raw_response.extensions.get("from_cache"):
+            if consumer is not None:
+                resource = get_resource(response.raw_request.url.path)
+                self._run_in_background(self._refund, resource, consumer)
+            return
+
+        headers = response.headers
+        try:
+            resource = headers.get("x-ratelimit-resource", "core")
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_time = datetime.fromtimestamp(int(headers["x-ratelimit-reset"]), UTC)
+        except (KeyError, ValueError):
+            return
+        if resource not in get_args(Resource.__value__):
+            return
+
+        # don't write to the database for every response
+        now = monotonic()
+        match self._synced.get(resource):
+            case (last_reset, last_sync) if (
+                last_reset > reset_time
+                or last_reset == reset_time
+                and now - last_sync < SYNC_INTERVAL
+            ):
+                return
+            case _:
+                self._synced[resource] = (reset_time, now)
+
+        self._run_in_background(self._sync, resource, limit, remaining, reset_time)
+
+    def _run_in_background[*Ts](self, func: Callable[[*Ts], None], *args: *Ts):
+        task = asyncio.create_task(asyncio.to_thread(func, *args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _acquire(self, session: Session, resource: Resource, consumer: str):
+        now = datetime.now(UTC)
+
+        budget = session.get(RateLimitBudget, resource)
+        if budget is None or budget.reset_time <= now:
+            if budget is None:
+                limit, window = DEFAULT_LIMITS[resource]
+            else:
+                limit, window = budget.limit, DEFAULT_LIMITS[resource][1]
+            budget = self._start_window(
+                session,
+                RateLimitBudget(
+                    resource=resource,
+                    limit=limit,
+                    remaining=limit,
+                    reset_time=now + window,
+                ),
+            )
+            session.commit()
+
+        usage = session.get(RateLimitUsage, (resource, consumer))
+        used = usage.used if usage else 0
+
+        consumers = session.exec(
+            select(func.count())
+            .select_from(RateLimitUsage)
+            .where(col(RateLimitUsage.resource) == resource)
+        ).one()
+        if usage is None:
+            consumers += 1
+
+        # keep a share for consumers that haven't made any requests in this window
+        share = max(budget.limit // (consumers + 1), 1)
+        if used >= share:
+            raise RateLimitedError(resource, budget.reset_time)
+
+        # decrement atomically, since other processes may be doing the same
+        result = session.exec(
+            update(RateLimitBudget)
+            .where(
+                col(RateLimitBudget.resource) == resource,
+                col(RateLimitBudget.remaining) > 0,
+            )
+            .values(remaining=RateLimitBudget.remaining - 1)
+        )
+        if result.rowcount == 0:
+            raise RateLimitedError(resource, budget.reset_time)
+
+        if usage is None:
+            session.add(RateLimitUsage(resource=resource, consumer=consumer, used=1))
+        else:
+            session.exec(
+                update(RateLimitUsage)
+                .where(
+                    col(RateLimitUsage.resource) == resource,
+                    col(RateLimitUsage.consumer) == consumer,
+                )
+                .values(used=RateLimitUsage.used + 1)
+            )
+
+        session.commit()
+
+    def _sync(self, resource: str, limit: int, remaining: int, reset_time: datetime):
+        try:
+            with self.session_factory() as session:
+                budget = session.get(RateLimitBudget, resource)
+                if _is_stale(resource, reset_time, budget):
+                    return
+                if budget is None or budget.reset_time != reset_time:
+                    self._start_window(
+                        session,
+                        RateLimitBudget(
+                            resource=resource,
+                            limit=limit,
+                            remaining=remaining,
+                            reset_time=reset_time,
+                        ),
+                        clear_usage=budget is None or reset_time > budget.reset_time,
+                    )
+                else:
+                    budget.limit = limit
+                    budget.remaining = min(budget.remaining, remaining)
+                    session.add(budget)
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to sync shared rate limit for {resource}: {e}")
+
+    def _refund(self, resource: Resource, consumer: str):
+        try:
+            with self.session_factory() as session:
+                session.exec(
+                    update(RateLimitBudget)
+                    .where(
+                        col(RateLimitBudget.resource) == resource,
+                        col(RateLimitBudget.remaining) < col(RateLimitBudget.limit),
+                    )
+                    .values(remaining=RateLimitBudget.remaining + 1)
+                )
+                session.exec(
+                    update(RateLimitUsage)
+                    .where(
+                        col(RateLimitUsage.resource) == resource,
+                        col(RateLimitUsage.consumer) == consumer,
+                        col(RateLimitUsage.used) > 0,
+                    )
+                    .values(used=RateLimitUsage.used - 1)
+                )
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to refund shared rate limit for {resource}: {e}")
+
+    def _start_window(
+        self,
+        session: Session,
+        budget: RateLimitBudget,
+        *,
+        clear_usage: bool = True,
+    ) -> RateLimitBudget:
+        budget = session.merge(budget)
+        if clear_usage:
+            session.exec(
+                delete(RateLimitUsage).where(
+                    col(RateLimitUsage.resource) == budget.resource
+                )
+            )
+        session.flush()
+        return budget
+
+
+def _is_stale(
+    resource: str,
+    reset_time: datetime,
+    budget: RateLimitBudget | None,
+) -> bool:
+    """Returns true if headers with this reset time are from an earlier window than
+    the stored budget (eg. from a cached response).
+
+    The stored reset time may only be an estimate made before any headers were seen,
+    so headers from the current window can have an earlier reset time than the budget,
+    but not by a whole window.
+    """
+    if reset_time <= datetime.now(UTC):
+        return True
+    if budget is None or resource not in DEFAULT_LIMITS:
+        return False
+    _, window = DEFAULT_LIMITS[resource]
+    return reset_time <= budget.reset_time - window
+
+
+class SharedRateLimitThrottler(BaseThrottler):
+    """Throttler that counts every request against a `SharedRateLimit`, using the
+    consumer from `current_consumer`."""
+
+    def __init__(self, rate_limit: SharedRateLimit, throttler: BaseThrottler):
+        self.rate_limit = rate_limit
+        self.throttler = throttler
+
+    @contextmanager
+    def acquire(self, request: httpx.Request) -> Generator[None, Any, Any]:
+        consumer = current_consumer.get()
+        self.rate_limit.acquire_sync(get_resource(request.url.path), consumer)
+        request.extensions[RESPONSE_OBSERVER] = partial(
+            self.rate_limit.observe, consumer=consumer
+        )
+        with self.throttler.acquire(request):
+            yield
+
+    @asynccontextmanager
+    async def async_acquire(self, request: httpx.Request) -> AsyncGenerator[None, Any]:
+        consumer = current_consumer.get()
+        await self.rate_limit.acquire(get_resource(request.url.path), consumer)
+        request.extensions[RESPONSE_OBSERVER] = partial(
+            self.rate_limit.observe, consumer=consumer
+        )
+        async with self.throttler.async_acquire(request):
+            yield
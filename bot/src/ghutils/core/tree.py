@@ -2,18 +2,43 @@
 
 from datetime import UTC, datetime
 
-from discord import Color, Embed, Interaction
+from discord import Color, Embed, Interaction, InteractionType
 from discord.app_commands import (
     AppCommandError,
     CommandTree,
     Transformer,
     TransformerError,
 )
+from discord.utils import format_dt
 
-from .exceptions import InvalidInputError, NotLoggedInError, SilentError
+from .exceptions import (
+    InvalidInputError,
+    NotLoggedInError,
+    RateLimitedError,
+    SilentError,
+    UnavailableError,
+)
+from .metrics import COMMAND_ERRORS, current_command, record_phase
+from .ratelimit import current_consumer, get_consumer
 
 
 class GHUtilsCommandTree(CommandTree):
+    async def _call(self, interaction: Interaction):
+        command = interaction.command
+        token = current_command.set(command.qualified_name if command else "unknown")
+        consumer_token = current_consumer.set(get_consumer(interaction))
+        try:
+            phase = (
+                "autocomplete"
+                if interaction.type is InteractionType.autocomplete
+                else "total"
+            )
+            with record_phase(phase):
+                await super()._call(interaction)
+        finally:
+            current_command.reset(token)
+            current_consumer.reset(consumer_token)
+
     async def on_error(self, interaction: Interaction, error: AppCommandError):
         if isinstance(error, SilentError):
             return
@@ -44,10 +69,20 @@ class GHUtilsCommandTree(CommandTree):
                     value=str(value),
                     inline=False,
                 )
+            case UnavailableError(message=message):
+                embed.title = "Not available!"
+                embed.description = message
+            case RateLimitedError(reset_time=reset_time):
+                embed.title = "Rate limited!"
+                embed.description = f"Too many GitHub requests have been made here by users who aren't logged in. Use `/gh login` to log in with your own rate limit, or try again {format_dt(reset_time, 'R')}."
             case NotLoggedInError():
                 embed.title = "Not logged in!"
                 embed.description = "You must be logged in with GitHub to use this command. Use `/gh login` to log in, then try again."
             case _:
+                command = interaction.command
+                COMMAND_ERRORS.inc(
+                    command=command.qualified_name if command else "unknown"
+                )
                 await super().on_error(interaction, error)
                 embed.title = "Command failed!"
                 embed.description = str(error)
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable, cast, overload
+from typing import Any, Callable, cast, overload
 
 from discord import Interaction
-from sqlmodel import Session
+from sqlmodel import Session, SQLModel
 
+from ghutils.utils.cache import TTLCache
 from ghutils.utils.github import RepositoryName
 
+from .invalidation import RowKey
 from .models import GuildConfig, UserConfig, UserGuildConfig
 
+type ConfigCache = TTLCache[RowKey, Any]
+"""Config rows (or the default config, if there isn't a row), by primary key.
+
+Cached rows are detached from their session, so they must not be modified.
+"""
+
 
 @dataclass
 class GlobalConfigs:
@@ -34,6 +42,8 @@ class GuildConfigs(GlobalConfigs):
 def get_configs(
     session: Session,
     interaction: Interaction,
+    *,
+    cache: ConfigCache | None = None,
 ) -> GlobalConfigs | GuildConfigs: ...
 
 
@@ -42,6 +52,8 @@ def get_configs(
     session: Session,
     interaction: Interaction,
     guild_id: int,
+    *,
+    cache: ConfigCache | None = None,
 ) -> GuildConfigs: ...
 
 
@@ -49,55 +61,87 @@ def get_configs(
     session: Session,
     interaction: Interaction,
     guild_id: int | None = None,
+    *,
+    cache: ConfigCache | None = None,
 ) -> GlobalConfigs | GuildConfigs:
+    """Returns the configs for the interaction's user and guild.
+
+    If `cache` is given, configs are read from and added to it. This should only be
+    used if the configs won't be modified.
+    """
+
     guild_id = guild_id or interaction.guild_id
 
     if not guild_id:
         return GlobalConfigs(
-            user=get_user_config(session, interaction),
+            user=get_user_config(session, interaction, cache),
         )
 
     return GuildConfigs(
-        user=get_user_config(session, interaction),
-        user_guild=get_user_guild_config(session, interaction),
-        guild=get_guild_config(session, interaction),
+        user=get_user_config(session, interaction, cache),
+        user_guild=get_user_guild_config(session, interaction, cache),
+        guild=get_guild_config(session, interaction, cache),
     )
 
 
-def get_user_config(session: Session, interaction: Interaction):
+def get_user_config(
+    session: Session,
+    interaction: Interaction,
+    cache: ConfigCache | None = None,
+):
     return _get_or_create(
         session,
+        cache,
         UserConfig,
         user_id=interaction.user.id,
     )
 
 
-def get_user_guild_config(session: Session, interaction: Interaction):
+def get_user_guild_config(
+    session: Session,
+    interaction: Interaction,
+    cache: ConfigCache | None = None,
+):
     if not interaction.guild_id:
         raise ValueError("get_user_guild_config can only be used in a guild")
     return _get_or_create(
         session,
+        cache,
         UserGuildConfig,
         user_id=interaction.user.id,
         guild_id=interaction.guild_id,
     )
 
 
-def get_guild_config(session: Session, interaction: Interaction):
+def get_guild_config(
+    session: Session,
+    interaction: Interaction,
+    cache: ConfigCache | None = None,
+):
     if not interaction.guild_id:
         raise ValueError("get_guild_config can only be used in a guild")
     return _get_or_create(
         session,
+        cache,
         GuildConfig,
         guild_id=interaction.guild_id,
     )
 
 
-def _get_or_create[**P, T](
+def _get_or_create[**P, T: SQLModel](
     session: Session,
+    cache: ConfigCache | None,
     model_type: Callable[P, T] | type[T],
     *args: P.args,
     **kwargs: P.kwargs,
 ) -> T:
     model_cls = cast(type[T], model_type)
-    return session.get(model_cls, kwargs) or model_cls(*args, **kwargs)
+    if cache is None:
+        return session.get(model_cls, kwargs) or model_cls(*args, **kwargs)
+
+    key = RowKey.for_model(model_cls, **kwargs)
+    config: T | None = cache.get(key)
+    if config is None:
+        config = session.get(model_cls, kwargs) or model_cls(*args, **kwargs)
+        cache.set(key, config)
+    return config
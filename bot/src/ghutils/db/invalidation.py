@@ -0,0 +1,223 @@
+"""Invalidates cached rows in every instance of the bot when they're changed.
+
+When a session flushes changes to a tracked table, the changed rows are sent with
+Postgres's `NOTIFY` in the same transaction, so they're delivered to every process that
+is listening (including this one) as soon as the transaction commits. Changes are also
+reported to the process that made them after committing, which is all that happens for
+other databases.
+
+Other notifications (eg. webhook events) can be broadcast to every process with
+`send_notification`, and are received by the same listener on their own channel.
+
+https://www.postgresql.org/docs/current/sql-notify.html
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Self, cast
+
+import psycopg2
+from sqlalchemy import Engine, Table, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import class_mapper, object_mapper, sessionmaker
+from sqlmodel import Session, SQLModel
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "ghutils_invalidate"
+
+MAX_PAYLOAD_SIZE = 7999
+"""The maximum size of a notification payload in bytes, in the default Postgres
+configuration."""
+
+_INFO_KEY = "ghutils_invalidated_rows"
+
+
+@dataclass(frozen=True)
+class RowKey:
+    """Identifies a row by its table and primary key."""
+
+    table: str
+    key: tuple[Any, ...]
+
+    @classmethod
+    def of(cls, instance: SQLModel) -> Self:
+        mapper = object_mapper(instance)
+        return cls(
+            table=get_table_name(mapper.class_),
+            key=tuple(mapper.primary_key_from_instance(instance)),
+        )
+
+    @classmethod
+    def for_model(cls, model_type: type[SQLModel], **ident: Any) -> Self:
+        mapper = class_mapper(model_type)
+        return cls(
+            table=get_table_name(model_type),
+            key=tuple(ident[column.name] for column in mapper.primary_key),
+        )
+
+    @classmethod
+    def from_payload(cls, payload: str) -> Self:
+        data = json.loads(payload)
+        return cls(table=data["table"], key=tuple(data["key"]))
+
+    def to_payload(self) -> str:
+        return json.dumps({"table": self.table, "key": list(self.key)})
+
+
+def get_table_name(model_type: type[SQLModel]) -> str:
+    return cast(Table, class_mapper(model_type).local_table).name
+
+
+def track_changes(
+    session_factory: sessionmaker[Session],
+    models: Iterable[type[SQLModel]],
+    on_commit: Callable[[set[RowKey]], object],
+):
+    """Sends a notification for each inserted, updated, or deleted row of `models` in
+    sessions created by `session_factory`, and calls `on_commit` with the changed rows
+    after each commit."""
+
+    models = tuple(models)
+
+    @event.listens_for(session_factory, "after_flush")
+    def after_flush(session: Session, *_: Any):
+        changed = {
+            RowKey.of(instance)
+            for instance in [*session.new, *session.dirty, *session.deleted]
+            if isinstance(instance, models)
+        }
+        if not changed:
+            return
+
+        connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            for row in changed:
+                connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": CHANNEL, "payload": row.to_payload()},
+                )
+
+        session.info.setdefault(_INFO_KEY, set[RowKey]()).update(changed)
+
+    @event.listens_for(session_factory, "after_commit")
+    def after_commit(session: Session):
+        if changed := session.info.pop(_INFO_KEY, None):
+            on_commit(changed)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def after_rollback(session: Session):
+        session.info.pop(_INFO_KEY, None)
+
+
+def send_notification(engine: Engine, channel: str, payload: str):
+    """Sends a notification to every process listening on `channel`.
+
+    Raises `ValueError` if the payload is too long.
+    """
+
+    if len(payload.encode()) > MAX_PAYLOAD_SIZE:
+        raise ValueError(f"Notification payload is too long: {len(payload)}")
+
+    with engine.begin() as connection:
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": payload},
+        )
+
+
+class InvalidationListener:
+    """Listens for notifications sent by `track_changes` or `send_notification` from
+    any process, using a dedicated Postgres connection.
+
+    `handlers` maps each channel to a function that is called with the payloads of its
+    notifications. Handlers may raise `ValueError`, `KeyError`, or `TypeError` if a
+    payload is invalid.
+
+    If the connection is lost, notifications sent while reconnecting are missed, so
+    `on_connect` is called after every connection to let the caller clear its caches.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        handlers: Mapping[str, Callable[[str], object]],
+        *,
+        on_connect: Callable[[], object] | None = None,
+        retry_interval: float = 5,
+    ):
+        self.engine = engine
+        self.handlers = handlers
+        self.on_connect = on_connect
+        self.retry_interval = retry_interval
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name="invalidation-listener")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except (DBAPIError, psycopg2.Error, OSError) as e:
+                logger.warning(
+                    "Invalidation listener disconnected, retrying in"
+                    + f" {self.retry_interval}s: {e}"
+                )
+            await asyncio.sleep(self.retry_interval)
+
+    async def _listen(self):
+        connection = await asyncio.to_thread(self._connect)
+        loop = asyncio.get_running_loop()
+        disconnected: asyncio.Future[None] = loop.create_future()
+
+        def on_readable():
+            try:
+                connection.poll()
+            except psycopg2.Error as e:
+                if not disconnected.done():
+                    disconnected.set_exception(e)
+                return
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                self._handle(notify.channel, notify.payload)
+
+        fd = connection.fileno()
+        loop.add_reader(fd, on_readable)
+        try:
+            logger.info(f"Listening for notifications on {', '.join(self.handlers)}")
+            if self.on_connect:
+                self.on_connect()
+            await disconnected
+        finally:
+            loop.remove_reader(fd)
+            connection.close()
+
+    def _connect(self) -> Any:
+        # use a raw connection outside of the pool, since it's held open forever
+        pool_connection = self.engine.raw_connection()
+        pool_connection.detach()
+        connection = pool_connection.driver_connection
+        assert connection is not None
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for channel in self.handlers:
+                cursor.execute(f"LISTEN {channel}")
+        return connection
+
+    def _handle(self, channel: str, payload: str):
+        if (handler := self.handlers.get(channel)) is None:
+            return
+        try:
+            handler(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid notification on {channel}: {e}")
@@ -1,10 +1,11 @@
 from datetime import UTC, datetime, timedelta
 
 from githubkit import OAuthTokenAuthStrategy
-from sqlalchemy import BigInteger, Engine
+from sqlalchemy import JSON, BigInteger, Engine
 from sqlmodel import Field, SQLModel  # pyright: ignore[reportUnknownVariableType]
 
 from ghutils.utils.github import RepositoryName
+from ghutils.utils.live import LiveResource, LiveResourceKind
 
 from .types import DatetimeType, RepositoryNameType
 
@@ -85,5 +86,103 @@ class GuildConfig(SQLModel, table=True):
     )
 
 
+class MessageIssueReferences(SQLModel, table=True):
+    """The issues referenced by a message that was used with "Show GitHub issues", so
+    that refreshing the embeds doesn't need to fetch and parse the message again."""
+
+    message_id: int = Field(primary_key=True, sa_type=BigInteger)
+
+    references: list[str] = Field(sa_type=JSON)
+    """Fully qualified references (`owner/repo#123`)."""
+
+
+class LiveMessage(SQLModel, table=True):
+    """A public message with an embed that is kept up to date, either using webhook
+    events or by polling."""
+
+    message_id: int = Field(primary_key=True, sa_type=BigInteger)
+    channel_id: int = Field(sa_type=BigInteger)
+
+    repo_id: int = Field(sa_type=BigInteger)
+    repo: RepositoryName = Field(sa_type=RepositoryNameType)
+    """The name of the repo, used for polling. Updated if a poll finds that the repo was
+    renamed."""
+    installation_id: int | None = Field(sa_type=BigInteger)
+    """The GitHub app installation that sends webhook events for this repo, or `None`
+    if the app isn't installed there (in which case the message is polled)."""
+    kind: str
+    """See `LiveResourceKind`."""
+    key: str
+    """Issue/PR number, or commit SHA."""
+
+    expire_time: datetime = Field(sa_type=DatetimeType)
+    embed_hash: str | None = None
+    """Hash of the embed that the message was last edited to show."""
+
+    @property
+    def resource(self) -> LiveResource:
+        return LiveResource(
+            repo_id=self.repo_id,
+            kind=LiveResourceKind(self.kind),
+            key=self.key,
+        )
+
+    def is_expired(self):
+        return self.expire_time <= datetime.now(UTC)
+
+
+class ShardStatus(SQLModel, table=True):
+    """The latest status of a gateway shard, so the API server can report on shards
+    that are running in other processes."""
+
+    shard_id: int = Field(primary_key=True)
+    shard_count: int
+    """The total number of shards when this was updated."""
+    latency: float | None
+    """WebSocket latency in seconds, or `None` if the shard isn't connected."""
+    update_time: datetime = Field(sa_type=DatetimeType)
+
+    def is_stale(self, max_age: timedelta):
+        return self.update_time <= datetime.now(UTC) - max_age
+
+
+class RateLimitBudget(SQLModel, table=True):
+    """The remaining requests in the current window of one of the default
+    installation's GitHub rate limits, shared by every instance of the bot."""
+
+    resource: str = Field(primary_key=True)
+    """GitHub rate limit resource (eg. `core`, `search`)."""
+    limit: int
+    remaining: int
+    reset_time: datetime = Field(sa_type=DatetimeType)
+
+
+class RateLimitUsage(SQLModel, table=True):
+    """The number of requests that one consumer (a guild, or a user outside of guilds)
+    has made using a `RateLimitBudget` in its current window."""
+
+    resource: str = Field(primary_key=True)
+    consumer: str = Field(primary_key=True)
+    used: int
+
+
+class JobStatus(SQLModel, table=True):
+    """The result of the latest run of a background job, from whichever instance of
+    the bot ran it."""
+
+    name: str = Field(primary_key=True)
+    last_run_time: datetime = Field(sa_type=DatetimeType)
+    last_success_time: datetime | None = Field(default=None, sa_type=DatetimeType)
+    last_duration: float | None = None
+    """Seconds taken by the latest run."""
+    last_error: str | None = None
+    """The error raised by the latest run, if it failed."""
+
+    def is_overdue(self, interval: timedelta, intervals: int):
+        """Returns true if the job hasn't succeeded in the last `intervals` intervals."""
+        cutoff = datetime.now(UTC) - interval * intervals
+        return self.last_success_time is None or self.last_success_time <= cutoff
+
+
 def create_db_and_tables(engine: Engine):
     SQLModel.metadata.create_all(engine)
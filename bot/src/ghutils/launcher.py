@@ -0,0 +1,135 @@
+"""Runs the bot's gateway shards in several processes.
+
+The shards are split into contiguous ranges, one per process. Only the first process
+runs the API server.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from typing import Any, Callable
+
+import httpx
+
+from ghutils.core.env import GHUtilsEnv
+from ghutils.utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = 30
+"""Seconds to wait for processes to exit after being interrupted."""
+
+
+def split_shards(shard_count: int, processes: int) -> list[list[int]]:
+    """Splits shards into contiguous ranges of (nearly) equal size.
+
+    Returns fewer ranges than `processes` if there are fewer shards than processes.
+    """
+    processes = min(processes, shard_count)
+    size, extra = divmod(shard_count, processes)
+    ranges = list[list[int]]()
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def get_recommended_shard_count(token: str) -> int:
+    """https://discord.com/developers/docs/events/gateway#get-gateway-bot"""
+    response = httpx.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}"},
+    )
+    response.raise_for_status()
+    return response.json()["shards"]
+
+
+def launch(env: GHUtilsEnv, run: Callable[[GHUtilsEnv], Any]):
+    """Starts one process per range of shards, each calling `run` with an updated copy
+    of `env`, and waits for them to exit.
+
+    If any process exits, the others are stopped too, so the container can be
+    restarted as a whole.
+    """
+
+    setup_logging()
+
+    shard_count = env.shard_count
+    if shard_count is None:
+        shard_count = get_recommended_shard_count(env.token.get_secret_value())
+        logger.info(f"Using recommended shard count: {shard_count}")
+
+    context = multiprocessing.get_context("spawn")
+    processes = list[BaseProcess]()
+    for i, shard_ids in enumerate(split_shards(shard_count, env.shard_processes)):
+        process_env = env.model_copy(
+            update={
+                "shard_count": shard_count,
+                "shard_ids": shard_ids,
+                "health_shard_ids": list(range(shard_count)),
+                "shard_processes": 1,
+                "api_server": env.api_server and i == 0,
+            }
+        )
+        process = context.Process(
+            target=run,
+            args=(process_env,),
+            name=f"ghutils-shards-{shard_ids[0]}-{shard_ids[-1]}",
+        )
+        logger.info(f"Starting process {process.name} for shards {shard_ids}")
+        process.start()
+        processes.append(process)
+
+    # on Ctrl+C, the processes are interrupted along with the launcher, but SIGTERM
+    # (eg. from Docker) is only sent to the launcher, so it needs to be forwarded
+    terminated = False
+
+    def on_sigterm(signum: int, frame: FrameType | None):
+        nonlocal terminated
+        terminated = True
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    interrupted = False
+    try:
+        ready = wait([process.sentinel for process in processes])
+        for process in processes:
+            if process.sentinel not in ready:
+                continue
+            process.join()
+            logger.error(f"Process {process.name} exited: {process.exitcode}")
+    except KeyboardInterrupt:
+        interrupted = not terminated
+
+    exit_code = _stop(processes, interrupt=not interrupted)
+    if not (interrupted or terminated):
+        # one of the processes stopped on its own, which shouldn't happen
+        exit_code = exit_code or 1
+    sys.exit(exit_code)
+
+
+def _stop(processes: list[BaseProcess], *, interrupt: bool) -> int:
+    if interrupt:
+        for process in processes:
+            if process.is_alive() and process.pid is not None:
+                os.kill(process.pid, signal.SIGINT)
+
+    exit_code = 0
+    for process in processes:
+        process.join(SHUTDOWN_TIMEOUT)
+        if process.is_alive():
+            logger.warning(f"Killing process {process.name}")
+            process.kill()
+            process.join()
+        exit_code = exit_code or process.exitcode or 0
+    return exit_code
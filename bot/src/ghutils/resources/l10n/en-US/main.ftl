@@ -9,6 +9,9 @@
 -parameter-description_visibility =
     Whether the message should be visible to everyone, or just you.
 
+-parameter-description_live =
+    Whether to keep the message up to date when it changes on GitHub. Requires visibility: public.
+
 # /gh issue
 
 gh-issue_description =
@@ -20,6 +23,9 @@ gh-issue_parameter-description_reference =
 gh-issue_parameter-description_visibility =
     {-parameter-description_visibility}
 
+gh-issue_parameter-description_live =
+    {-parameter-description_live}
+
 # /gh pr
 
 gh-pr_description =
@@ -31,6 +37,9 @@ gh-pr_parameter-description_reference =
 gh-pr_parameter-description_visibility =
     {-parameter-description_visibility}
 
+gh-pr_parameter-description_live =
+    {-parameter-description_live}
+
 # /gh commit
 
 gh-commit_description =
@@ -42,6 +51,9 @@ gh-commit_parameter-description_reference =
 gh-commit_parameter-description_visibility =
     {-parameter-description_visibility}
 
+gh-commit_parameter-description_live =
+    {-parameter-description_live}
+
 # /gh repo
 
 gh-repo_description =
@@ -143,6 +155,26 @@ gh-actions-artifact_description =
 gh-actions-artifact_parameter-description_repo =
     Repository to search in (`owner/repo`).
 
+# /gh actions latest_artifact
+
+gh-actions-latest-artifact_description =
+    Get an artifact from the latest successful run of a GitHub Actions workflow.
+
+gh-actions-latest-artifact_parameter-description_repo =
+    Repository to search in (`owner/repo`).
+
+gh-actions-latest-artifact_parameter-description_workflow =
+    Workflow file name (eg. `ci.yml`) or id.
+
+gh-actions-latest-artifact_parameter-description_artifact =
+    Name of the artifact to get.
+
+gh-actions-latest-artifact_parameter-description_branch =
+    Branch to get the latest workflow run from. Defaults to any branch.
+
+gh-actions-latest-artifact_parameter-description_visibility =
+    {-parameter-description_visibility}
+
 # /gh search
 
 gh-search_description =
@@ -166,7 +198,7 @@ gh-search-files_parameter-description_exact =
     If true, use exact search; otherwise use fuzzy search.
 
 gh-search-files_parameter-description_limit =
-    Maximum number of results to show.
+    Maximum number of results to show per page.
 
 gh-search-files_parameter-description_visibility =
     {-parameter-description_visibility}
@@ -12,10 +12,9 @@ from yarl import URL
 
 from ghutils.core.bot import GHUtilsBot
 from ghutils.core.types import CustomEmoji
+from ghutils.utils.actions import WORKFLOW_PREFIX
 from ghutils.utils.discord.mentions import relative_timestamp
 
-WORKFLOW_PREFIX = ".github/workflows/"
-
 
 class ArtifactContainer(Container[Any]):
     description_text = TextDisplay[Any]("")
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any, Callable, Literal, Self, override
 
 from discord import Interaction, SelectOption
 from discord.abc import MISSING
-from discord.ui import ActionRow, LayoutView, Select, View
+from discord.ui import ActionRow, LayoutView, Modal, Select, TextInput, View
 from discord.ui.item import ContainedItemCallbackType
 from discord.ui.select import SelectCallbackDecorator
 from githubkit import Response
 
-from ghutils.utils.github import is_last_page
+from ghutils.core.ratelimit import ConsumerMixin
+from ghutils.utils.github import get_ratelimit_remaining, is_last_page
+from ghutils.utils.github_cache import CachedResponse
+from ghutils.utils.strings import truncate_str
 from ghutils.utils.types import AsyncCallable
 
 logger = logging.getLogger(__name__)
@@ -18,23 +22,48 @@ logger = logging.getLogger(__name__)
 # randomly generated UUIDs
 PREVIOUS_PAGE_VALUE = "e4215656-23ba-4a3d-8386-795778944b4b"
 NEXT_PAGE_VALUE = "1e1f5d4c-e908-42cf-8d6c-8b66aadf0998"
+FILTER_VALUE = "5b0f7bd2-9c84-4ad4-a1a7-0f3e0d5a6c12"
+CLEAR_FILTER_VALUE = "c7a35e2e-3d1f-4a0b-8f0e-6d9b2f4e8a51"
+
+CONTROL_VALUES = {
+    PREVIOUS_PAGE_VALUE,
+    NEXT_PAGE_VALUE,
+    FILTER_VALUE,
+    CLEAR_FILTER_VALUE,
+}
 
 MAX_PER_PAGE = 23
 
+# don't spend requests on pages the user might not look at if we're running low
+MIN_PREFETCH_RATELIMIT_REMAINING = 100
+
 
 type PageGetter[V: View | LayoutView] = AsyncCallable[
     [V, Interaction, PaginatedSelect[V], int],
     list[SelectOption],
 ]
 
+type FilterGetter[V: View | LayoutView] = AsyncCallable[
+    [V, Interaction, PaginatedSelect[V], str],
+    list[SelectOption],
+]
+
 
 class PaginatedSelect[V: View | LayoutView](Select[V]):
     _inner_callback: ContainedItemCallbackType[V | ActionRow[Any], Self] | None
     _page_getter: PageGetter[V] | None
+    _filter_getter: FilterGetter[V] | None
     _page_cache: dict[int, list[SelectOption]]
     _placeholder: str | None
+    _prefetch: bool
+    _prefetch_task: asyncio.Task[None] | None
+    _prefetch_page: int | None
+    _ratelimit_remaining: int | None
 
     _page: int
+    """The current page. Pages less than 1 contain filter results."""
+    _filter_query: str | None
+    _filter_page: int
     _selected_page: int | None
     _selected_index: int | None
 
@@ -53,6 +82,8 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
         inner_callback: ContainedItemCallbackType[V | ActionRow[Any], Self]
         | None = None,
         page_getter: PageGetter[V] | None = None,
+        filter_getter: FilterGetter[V] | None = None,
+        prefetch: bool = False,
     ) -> None:
         # https://github.com/Rapptz/discord.py/issues/10291
         if required is MISSING:
@@ -76,9 +107,16 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
 
         self._inner_callback = inner_callback
         self._page_getter = page_getter
+        self._filter_getter = filter_getter
         self._page_cache = {}
         self._placeholder = placeholder
+        self._prefetch = prefetch
+        self._prefetch_task = None
+        self._prefetch_page = None
+        self._ratelimit_remaining = None
         self._page = 1
+        self._filter_query = None
+        self._filter_page = 1
         self._selected_page = None
         self._selected_index = None
 
@@ -88,10 +126,15 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
 
     async def fetch_first_page(self, interaction: Interaction):
         """Fetch and switch to page 1."""
+        self.cancel_prefetch()
         self._page_cache.pop(1, None)
         await self._switch_to_page(interaction, 1)
 
-    def set_last_page(self, page: int, response: Response[Any] | None = None) -> bool:
+    def set_last_page(
+        self,
+        page: int,
+        response: Response[Any] | CachedResponse[Any] | None = None,
+    ) -> bool:
         """Set the final page. The page after this one is assumed to be empty.
 
         Page getters can use this if they're returning a page with less than 23 options
@@ -99,16 +142,36 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
         adding a spurious "next page" option to that page.
 
         If a GitHub response is given, the pagination headers are checked
-        to see if this is the last page or not.
+        to see if this is the last page or not. The rate limit headers are also used
+        to decide whether to prefetch the next page.
         """
-        if response is not None and not is_last_page(response):
-            return False
+        match response:
+            case CachedResponse():
+                self._ratelimit_remaining = response.ratelimit_remaining
+                if not response.is_last_page:
+                    return False
+            case Response():
+                self._ratelimit_remaining = get_ratelimit_remaining(response)
+                if not is_last_page(response):
+                    return False
+            case None:
+                pass
         self._page_cache[page + 1] = []
         return True
 
     def clear_cached_pages(self):
+        self.cancel_prefetch()
         self._page_cache.clear()
 
+    def cancel_prefetch(self):
+        """Cancel the background fetch of the next page, if any.
+
+        Views using `prefetch=True` should call this when they time out or stop.
+        """
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+
     @property
     def page_getter(self):
         """A decorator to set the page getter function.
@@ -130,6 +193,29 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
 
         return decorator
 
+    @property
+    def filter_getter(self):
+        """A decorator to set the filter getter function, enabling the filter option.
+
+        The filter getter receives the query entered by the user, and should return up
+        to 23 select options matching that query. Filter results are not paginated, so
+        the user can enter a more specific query if the option they want isn't shown.
+        """
+        return self._decorate_filter_getter
+
+    @filter_getter.setter
+    def filter_getter(self, filter_getter: FilterGetter[V] | None):
+        self._filter_getter = filter_getter
+
+    def _decorate_filter_getter(
+        self,
+    ) -> Callable[[FilterGetter[V]], FilterGetter[V]]:
+        def decorator(filter_getter: FilterGetter[V]) -> FilterGetter[V]:
+            self._filter_getter = filter_getter
+            return filter_getter
+
+        return decorator
+
     @property
     @override
     def options(self) -> list[SelectOption]:
@@ -159,12 +245,36 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
         # sanity check: don't add page selection options if they're already added
         # (this hopefully shouldn't happen)
         if self.options and (
-            self.options[0].value == PREVIOUS_PAGE_VALUE
-            or self.options[-1].value == NEXT_PAGE_VALUE
+            self.options[0].value in CONTROL_VALUES
+            or self.options[-1].value in CONTROL_VALUES
             or len(self.options) > MAX_PER_PAGE
         ):
             return
 
+        if self._page < 1:
+            # filter results
+            self.options.insert(
+                0,
+                SelectOption(
+                    emoji="✖️",
+                    label="Clear filter",
+                    value=CLEAR_FILTER_VALUE,
+                    description=truncate_str(
+                        f"{'Showing' if self.options else 'No'} results for:"
+                        + f" {self._filter_query}",
+                        100,
+                    ),
+                ),
+            )
+            self.options.append(
+                SelectOption(
+                    emoji="🔍",
+                    label="Change filter",
+                    value=FILTER_VALUE,
+                )
+            )
+            return
+
         # NOTE: we need to check this *before* mutating self.options
         if (
             # only allow going to the next page if the current page is full
@@ -189,6 +299,16 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
                     value=PREVIOUS_PAGE_VALUE,
                 ),
             )
+        elif self._filter_getter:
+            # the first page doesn't need a back option, so use that space for this
+            self.options.insert(
+                0,
+                SelectOption(
+                    emoji="🔍",
+                    label="Filter",
+                    value=FILTER_VALUE,
+                ),
+            )
 
     @property
     def selected_option(self) -> SelectOption | None:
@@ -197,8 +317,8 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
 
         if self._selected_page == self._page:
             index = self._selected_index
-            if self._page > 1:
-                # skip the back option
+            if self._has_leading_option():
+                # skip the back/filter option
                 index += 1
             return self.options[index]
 
@@ -233,6 +353,18 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
                 else:
                     await interaction.response.edit_message(view=self.view)
 
+            elif FILTER_VALUE in selected:
+                await interaction.response.send_modal(
+                    FilterModal(self, default=self._filter_query)
+                )
+
+            elif CLEAR_FILTER_VALUE in selected:
+                await self.clear_filter(interaction)
+                if interaction.response.is_done():
+                    await interaction.edit_original_response(view=self.view)
+                else:
+                    await interaction.response.edit_message(view=self.view)
+
             else:
                 # normal selection
                 if self.selected_option:
@@ -242,7 +374,9 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
 
                 for i, option in enumerate(self.options):
                     if option.value in selected:
-                        self._selected_index = i - 1 if self._page > 1 else i
+                        self._selected_index = (
+                            i - 1 if self._has_leading_option() else i
+                        )
                         option.default = True
                         break
 
@@ -273,6 +407,14 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
         if page < 1:
             page = 1
 
+        if (task := self._prefetch_task) and page not in self._page_cache:
+            if self._prefetch_page == page:
+                # the page is already being fetched, so wait for that instead
+                # if it fails, fall through and try again below
+                await asyncio.wait([task])
+            else:
+                self.cancel_prefetch()
+
         if (options := self._page_cache.get(page)) is None:
             assert self._page_getter
             assert self.view
@@ -283,6 +425,38 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
                 )
             self._page_cache[page] = options
 
+        self._show_page(interaction, page, options)
+
+    async def apply_filter(self, interaction: Interaction, query: str):
+        """Fetch and switch to the options matching the given query."""
+        self.cancel_prefetch()
+
+        assert self._filter_getter
+        assert self.view
+        options = await self._filter_getter(self.view, interaction, self, query)
+        if len(options) > MAX_PER_PAGE:
+            raise ValueError(
+                f"Filter results must not contain more than {MAX_PER_PAGE} options (got {len(options)})"
+            )
+
+        # use a new page for each query so that an option selected from a previous
+        # query's results stays valid
+        self._filter_page -= 1
+        self._filter_query = query
+        self._page_cache[self._filter_page] = options
+
+        self._show_page(interaction, self._filter_page, options)
+
+    async def clear_filter(self, interaction: Interaction):
+        """Switch back to the first page after filtering."""
+        await self._switch_to_page(interaction, 1)
+
+    def _show_page(
+        self,
+        interaction: Interaction,
+        page: int,
+        options: list[SelectOption],
+    ):
         # if an option on the current page is selected, mark it as default
         # we use a loop to ensure *only* the selected option is marked
         for i, option in enumerate(options):
@@ -298,22 +472,89 @@ class PaginatedSelect[V: View | LayoutView](Select[V]):
             self.placeholder = self.selected_option.label
 
             assert self._selected_page is not None
-            self.options[
-                0 if self._selected_page < page else -1
-            ].description = f"(selected on page {self._selected_page})"
+            if self._selected_page < 1:
+                # selected from filter results
+                if self.options[0].value == FILTER_VALUE:
+                    self.options[0].description = "(selected from filter results)"
+            elif page >= 1:
+                self.options[
+                    0 if self._selected_page < page else -1
+                ].description = f"(selected on page {self._selected_page})"
         else:
             self.placeholder = self._placeholder
 
+        self._start_prefetch(interaction)
+
+    def _start_prefetch(self, interaction: Interaction):
+        page = self._page + 1
+        if (
+            not self._prefetch
+            or self._prefetch_task
+            or self.view is None
+            or self.view.is_finished()
+            # only prefetch if there's a next page option
+            or not self.options
+            or self.options[-1].value != NEXT_PAGE_VALUE
+            or page in self._page_cache
+            or (
+                self._ratelimit_remaining is not None
+                and self._ratelimit_remaining < MIN_PREFETCH_RATELIMIT_REMAINING
+            )
+        ):
+            return
+
+        assert self._page_getter
+        view = self.view
+        page_getter = self._page_getter
+
+        async def prefetch():
+            try:
+                options = await page_getter(view, interaction, self, page)
+                if len(options) <= MAX_PER_PAGE:
+                    self._page_cache[page] = options
+            except Exception:
+                logger.debug(f"Failed to prefetch page {page}", exc_info=True)
+            finally:
+                if self._prefetch_task is asyncio.current_task():
+                    self._prefetch_task = None
+
+        self._prefetch_task = asyncio.create_task(prefetch())
+        self._prefetch_page = page
+
+    def _has_leading_option(self) -> bool:
+        return self._page != 1 or self._filter_getter is not None
+
     def _clear_remote_page_selection(self):
         self.placeholder = self._placeholder
 
-        if self.options[0].value == PREVIOUS_PAGE_VALUE:
+        if self.options[0].value in {PREVIOUS_PAGE_VALUE, FILTER_VALUE}:
             self.options[0].description = None
 
         if self.options[-1].value == NEXT_PAGE_VALUE:
             self.options[-1].description = None
 
 
+class FilterModal(ConsumerMixin, Modal, title="Filter options"):
+    query = TextInput[Self](
+        label="Search",
+        placeholder="Enter part of the name of an option",
+        min_length=1,
+        max_length=100,
+    )
+
+    def __init__(self, select: PaginatedSelect[Any], default: str | None = None):
+        super().__init__()
+        self.select = select
+        self.query.default = default
+
+    async def on_submit(self, interaction: Interaction):
+        if query := self.query.value.strip():
+            await self.select.apply_filter(interaction, query)
+        else:
+            await self.select.clear_filter(interaction)
+        await interaction.response.edit_message(view=self.select.view)
+
+
 def paginated_select[
     S: View | LayoutView | ActionRow[Any],
     SelectT: PaginatedSelect[Any],
@@ -327,6 +568,7 @@ def paginated_select[
     disabled: bool = False,
     row: int | None = None,
     id: int | None = None,
+    prefetch: bool = False,
 ) -> SelectCallbackDecorator[S, SelectT]:
     def decorator(inner_callback: ContainedItemCallbackType[Any, Any]) -> SelectT:
         select = PaginatedSelect[Any](
@@ -339,6 +581,7 @@ def paginated_select[
             row=row,
             id=id,
             inner_callback=inner_callback,
+            prefetch=prefetch,
         )
 
         # hack: View only adds items as children if __discord_ui_model_type__ is set
@@ -1,9 +1,9 @@
-from dataclasses import dataclass
+import asyncio
 from datetime import UTC, datetime, timedelta
 from re import Match
 from typing import Any, override
 
-from discord import Color, Embed, Interaction, Message
+from discord import Color, Embed, Interaction
 from discord.ui import Button, DynamicItem, Item
 from githubkit import GitHub
 from githubkit.rest import Commit, Issue
@@ -11,12 +11,18 @@ from pydantic import TypeAdapter
 from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 from ghutils.core.bot import GHUtilsBot
+from ghutils.core.ratelimit import ConsumerMixin
 from ghutils.core.types import LoginState
+from ghutils.db.models import LiveMessage, MessageIssueReferences
 from ghutils.ui.embeds.commits import create_commit_embed
 from ghutils.ui.embeds.issues import (
     create_issue_embed,
     create_issue_embeds,
+    fetch_issue_references,
+    find_issue_references,
+    format_issue_reference,
 )
+from ghutils.utils.discord.embeds import hash_embed
 from ghutils.utils.discord.mentions import relative_timestamp
 from ghutils.utils.discord.references import (
     CommitReference,
@@ -28,6 +34,7 @@ from ghutils.utils.github import RepositoryName, gh_request
 
 @pydantic_dataclass
 class RefreshIssueButton(
+    ConsumerMixin,
     DynamicItem[Button[Any]],
     template=r"RefreshIssue:(?P<repo_id>[0-9]+):(?P<issue>[0-9]+)",
 ):
@@ -73,35 +80,25 @@ class RefreshIssueButton(
             if not await _check_ratelimit(interaction, state):
                 return
 
-            # NOTE: this is an undocumented endpoint, but it seems like it's probably stable (https://stackoverflow.com/a/75527854)
-            # we use this because user and repository names may be too long to fit in a custom id
-            issue = await gh_request(
-                github.arequest(  # pyright: ignore[reportUnknownMemberType]
-                    "GET",
-                    f"/repositories/{self.repo_id}/issues/{self.issue}",
-                    response_model=Issue,
-                )
-            )
-
-            repo = RepositoryName.from_url(issue.html_url)
+            embed = await fetch_issue_embed(github, self.repo_id, self.issue)
+            await interaction.response.edit_message(embed=embed)
+            await _update_live_message(interaction, embed)
 
-            await interaction.response.edit_message(
-                embed=create_issue_embed(repo, issue),
-            )
 
-
-@dataclass
+@pydantic_dataclass
 class RefreshIssuesButton(
+    ConsumerMixin,
     DynamicItem[Button[Any]],
     template=r"RefreshIssues:(?P<message_id>[0-9]+)",
 ):
-    message: Message
+    message_id: int
+    """The id of the message that the issue references were found in."""
 
     def __post_init__(self):
         super().__init__(
             Button(
                 emoji="🔄",
-                custom_id=f"RefreshIssues:{self.message.id}",
+                custom_id=f"RefreshIssues:{self.message_id}",
             )
         )
 
@@ -113,15 +110,12 @@ class RefreshIssuesButton(
         item: Item[Any],
         match: Match[str],
     ):
-        assert interaction.message is not None
-        message_id = int(match["message_id"])
-        return cls(
-            message=await interaction.message.channel.fetch_message(message_id),
-        )
+        return TypeAdapter(cls).validate_python(match.groupdict())
 
     @override
     async def callback(self, interaction: Interaction):
-        async with GHUtilsBot.github_app_of(interaction) as (github, state):
+        bot = GHUtilsBot.of(interaction)
+        async with bot.github_app(interaction) as (github, state):
             if not await _check_ratelimit(interaction, state):
                 return
 
@@ -131,15 +125,36 @@ class RefreshIssuesButton(
 
             self.item.disabled = False
             try:
-                contents = await create_issue_embeds(github, interaction, self.message)
+                with bot.db_session() as session:
+                    row = session.get(MessageIssueReferences, self.message_id)
+
+                if row is not None:
+                    issues = await fetch_issue_references(github, row.references)
+                else:
+                    # messages sent before references were stored in the database
+                    issues = await self._find_and_store_references(github, interaction)
+
+                contents = create_issue_embeds(interaction, issues)
                 await contents.edit_original_response(interaction, view=self.view)
             except Exception:
                 await interaction.edit_original_response(view=self.view)
                 raise
 
+    async def _find_and_store_references(
+        self,
+        github: GitHub[Any],
+        interaction: Interaction,
+    ):
+        assert interaction.message is not None
+        message = await interaction.message.channel.fetch_message(self.message_id)
+        issues = await find_issue_references(github, interaction, message)
+        store_issue_references(GHUtilsBot.of(interaction), message.id, issues)
+        return issues
+
 
 @pydantic_dataclass
 class RefreshCommitButton(
+    ConsumerMixin,
     DynamicItem[Button[Any]],
     template=r"RefreshCommit:(?P<repo_id>[0-9]+):(?P<sha>[^:]+)",
 ):
@@ -185,19 +200,50 @@ class RefreshCommitButton(
             if not await _check_ratelimit(interaction, state):
                 return
 
-            commit = await gh_request(
-                github.arequest(  # pyright: ignore[reportUnknownMemberType]
-                    "GET",
-                    f"/repositories/{self.repo_id}/commits/{self.sha}",
-                    response_model=Commit,
-                )
-            )
+            embed = await fetch_commit_embed(github, self.repo_id, self.sha)
+            await interaction.response.edit_message(embed=embed)
+            await _update_live_message(interaction, embed)
 
-            repo = RepositoryName.from_url(commit.html_url)
 
-            await interaction.response.edit_message(
-                embed=await create_commit_embed(github, repo, commit),
+async def fetch_issue_embed(github: GitHub[Any], repo_id: int, number: int):
+    # NOTE: this is an undocumented endpoint, but it seems like it's probably stable (https://stackoverflow.com/a/75527854)
+    # we use this because user and repository names may be too long to fit in a custom id
+    issue = await gh_request(
+        github.arequest(  # pyright: ignore[reportUnknownMemberType]
+            "GET",
+            f"/repositories/{repo_id}/issues/{number}",
+            response_model=Issue,
+        )
+    )
+    repo = RepositoryName.from_url(issue.html_url)
+    return create_issue_embed(repo, issue)
+
+
+async def fetch_commit_embed(github: GitHub[Any], repo_id: int, sha: str):
+    commit = await gh_request(
+        github.arequest(  # pyright: ignore[reportUnknownMemberType]
+            "GET",
+            f"/repositories/{repo_id}/commits/{sha}",
+            response_model=Commit,
+        )
+    )
+    repo = RepositoryName.from_url(commit.html_url)
+    return await create_commit_embed(github, repo, commit)
+
+
+def store_issue_references(
+    bot: GHUtilsBot,
+    message_id: int,
+    issues: list[IssueReference],
+):
+    with bot.db_session() as session:
+        session.merge(
+            MessageIssueReferences(
+                message_id=message_id,
+                references=[format_issue_reference(issue) for issue in issues],
             )
+        )
+        session.commit()
 
 
 async def _check_ratelimit(interaction: Interaction, state: LoginState) -> bool:
@@ -208,6 +254,8 @@ async def _check_ratelimit(interaction: Interaction, state: LoginState) -> bool:
         and (edited_at := interaction.message.edited_at)
         and (retry_time := edited_at + timedelta(seconds=60))
         and retry_time > now
+        # live messages are also edited by the bot, which shouldn't count
+        and await _get_live_message(interaction) is None
     ):
         await interaction.response.send_message(
             embed=Embed(
@@ -222,3 +270,37 @@ async def _check_ratelimit(interaction: Interaction, state: LoginState) -> bool:
         )
         return False
     return True
+
+
+async def _get_live_message(interaction: Interaction) -> LiveMessage | None:
+    if interaction.message is None:
+        return None
+
+    bot = GHUtilsBot.of(interaction)
+    message_id = interaction.message.id
+
+    def get():
+        with bot.db_session() as session:
+            return session.get(LiveMessage, message_id)
+
+    return await asyncio.to_thread(get)
+
+
+async def _update_live_message(interaction: Interaction, embed: Embed):
+    """If the message is a live message, stores the hash of the embed that it now
+    shows, so the next update doesn't edit it again with the same content."""
+
+    if interaction.message is None:
+        return
+
+    bot = GHUtilsBot.of(interaction)
+    message_id = interaction.message.id
+
+    def update():
+        with bot.db_session() as session:
+            if row := session.get(LiveMessage, message_id):
+                row.embed_hash = hash_embed(embed)
+                session.add(row)
+                session.commit()
+
+    await asyncio.to_thread(update)
@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from re import Match
 from typing import Any, Awaitable, Callable, Literal, Sequence, overload
 
-from discord import Embed, Interaction
+from discord import Embed, Emoji, Interaction, PartialEmoji
 from discord.app_commands import Command
 from discord.ui import Button, DynamicItem, Item, LayoutView, View
 from discord.utils import MISSING
@@ -11,9 +11,14 @@ from ghutils.core.bot import GHUtilsBot
 from ghutils.core.types import CustomEmoji
 from ghutils.utils.discord.commands import AnyInteractionCommand
 from ghutils.utils.discord.components import AnyComponentParent
+from ghutils.utils.discord.views import DynamicItemsView
 
 type MessageVisibility = Literal["public", "private"]
 
+# interaction tokens expire after 15 minutes, after which SendAsPublicButton can't
+# delete the original message anymore
+PRIVATE_VIEW_TIMEOUT = 15 * 60
+
 
 @dataclass(kw_only=True)
 class MessageContents:
@@ -93,7 +98,12 @@ class MessageContents:
         visibility: MessageVisibility,
         show_usage: bool,
     ):
-        view = View(timeout=None)
+        # public views only contain links and dynamic items, so discord.py doesn't
+        # need to keep them in memory
+        view = DynamicItemsView(
+            interaction.client,
+            timeout=PRIVATE_VIEW_TIMEOUT if visibility == "private" else None,
+        )
         for item in self.items:
             view.add_item(item)
         add_visibility_buttons(
@@ -230,18 +240,48 @@ def add_visibility_buttons(
                 parent.add_item(get_command_usage_button(interaction, command))
 
 
+class CommandUsageButton(
+    DynamicItem[Button[Any]],
+    template=r"CommandUsage",
+):
+    """A disabled button showing who sent a message.
+
+    This is a dynamic item so that public messages (which usually only contain links
+    and other dynamic items) don't need discord.py to keep their views in memory.
+    """
+
+    def __init__(self, label: str | None, emoji: PartialEmoji | Emoji | str | None):
+        super().__init__(
+            Button(
+                emoji=emoji,
+                label=label,
+                disabled=True,
+                custom_id="CommandUsage",
+            )
+        )
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: Interaction,
+        item: Item[Any],
+        match: Match[str],
+    ):
+        assert isinstance(item, Button)
+        return cls(label=item.label, emoji=item.emoji)
+
+
 def get_command_usage_button(
     interaction: Interaction,
     command: AnyInteractionCommand,
-) -> Button[Any]:
+) -> CommandUsageButton:
     match command:
         case Command(qualified_name=command_name):
             label = f"{interaction.user.name} used /{command_name}"
         case _:
             label = f"Sent by {interaction.user.name}"
     bot = GHUtilsBot.of(interaction)
-    return Button(
-        emoji=bot.get_custom_emoji(CustomEmoji.apps_icon),
+    return CommandUsageButton(
         label=label,
-        disabled=True,
+        emoji=bot.get_custom_emoji(CustomEmoji.apps_icon),
     )
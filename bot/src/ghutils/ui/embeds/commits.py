@@ -8,6 +8,7 @@ from githubkit import GitHub
 from githubkit.exception import GitHubException
 from githubkit.rest import Commit, SimpleUser
 
+from ghutils.core.metrics import timed_phase
 from ghutils.utils.discord.embeds import set_embed_author, truncate_markdown_description
 from ghutils.utils.github import (
     CommitCheckState,
@@ -20,6 +21,7 @@ from ghutils.utils.strings import truncate_str
 logger = logging.getLogger(__name__)
 
 
+@timed_phase("render")
 async def create_commit_embed(
     github: GitHub[Any],
     repo: RepositoryName,
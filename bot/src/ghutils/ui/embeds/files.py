@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from discord import Color, Embed
+from githubkit.rest import FullRepository
+from yarl import URL
+
+from ghutils.core.metrics import timed_phase
+from ghutils.utils.file_search import PathMatch, PathSearchResults, highlight_path
+
+# embeds can have up to 6000 characters total, so leave some room for everything else
+MAX_FIELDS_SIZE = 5000
+
+type EmbedField = tuple[str, str]
+"""`(name, value)`"""
+
+
+def create_file_search_fields(
+    repo: FullRepository,
+    tree_sha: str,
+    matches: list[PathMatch],
+) -> list[EmbedField]:
+    sha = tree_sha[:12]
+
+    fields = list[EmbedField]()
+    for match in matches:
+        icon = "📁" if match.type == "tree" else "📄"
+        url = f"https://github.com/{repo.full_name}/{match.type}/{sha}/{match.path}"
+        fields.append((
+            f"{icon} {Path(match.path).name}",
+            f"[{highlight_path(match)}]({url})",
+        ))
+    return fields
+
+
+def paginate_fields(fields: list[EmbedField], per_page: int) -> list[list[EmbedField]]:
+    """Splits fields into pages of up to `per_page` fields and `MAX_FIELDS_SIZE`
+    characters."""
+
+    pages = list[list[EmbedField]]()
+    page = list[EmbedField]()
+    size = 0
+
+    for name, value in fields:
+        field_size = len(name) + len(value)
+        if page and (len(page) >= per_page or size + field_size > MAX_FIELDS_SIZE):
+            pages.append(page)
+            page = []
+            size = 0
+        page.append((name, value))
+        size += field_size
+
+    if page:
+        pages.append(page)
+    return pages
+
+
+@timed_phase("render")
+def create_file_search_embed(
+    repo: FullRepository,
+    ref: str,
+    query: str,
+    results: PathSearchResults,
+    fields: list[EmbedField],
+    *,
+    page: int = 1,
+    page_count: int = 1,
+):
+    footer = f"{repo.full_name}@{ref}  •  Total results: {results.total}"
+    if not results.complete:
+        footer += f"+  •  ⚠️ Tree too large, only searched {results.searched} paths"
+    if page_count > 1:
+        footer += f"  •  Page {page}/{page_count}"
+
+    embed = (
+        Embed(
+            title="File search results",
+        )
+        .set_author(
+            name=repo.full_name,
+            url=repo.html_url,
+            icon_url=repo.owner.avatar_url,
+        )
+        .set_footer(
+            text=footer,
+        )
+    )
+
+    # code search only works on the default branch
+    # so don't add the link otherwise, since it won't be useful
+    if ref == repo.default_branch:
+        embed.url = str(
+            URL("https://github.com/search").with_query(
+                type="code",
+                q=f'repo:{repo.full_name} path:"{query}"',
+            )
+        )
+
+    if results.matches:
+        embed.color = Color.green()
+    else:
+        embed.description = "⚠️ No matches found."
+        embed.color = Color.red()
+
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=False)
+
+    return embed
@@ -1,22 +1,31 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
 from typing import Any
 
 from discord import Embed, Interaction, Message
 from githubkit import GitHub
+from githubkit.exception import GitHubException
 from githubkit.rest import Issue, IssuePropPullRequest, PullRequest
 
+from ghutils.core.metrics import timed_phase
 from ghutils.ui.components.visibility import MessageContents
 from ghutils.utils.discord.embeds import set_embed_author, truncate_markdown_description
 from ghutils.utils.discord.references import IssueReference, IssueReferenceTransformer
-from ghutils.utils.github import IssueState, PullRequestState, RepositoryName
+from ghutils.utils.github import (
+    IssueState,
+    PullRequestState,
+    RepositoryName,
+    gh_request,
+)
 from ghutils.utils.strings import truncate_str
 
 logger = logging.getLogger(__name__)
 
 
+@timed_phase("render")
 def create_issue_embed(
     repo: RepositoryName,
     issue: Issue | PullRequest,
@@ -64,11 +73,13 @@ _ISSUE_PATTERN = re.compile(
 )
 
 
-async def create_issue_embeds(
+async def find_issue_references(
     github: GitHub[Any],
     interaction: Interaction,
     message: Message,
-):
+) -> list[IssueReference]:
+    """Finds and resolves all of the unique issue references in a message."""
+
     seen = set[str]()
     issues = list[IssueReference]()
     transformer = IssueReferenceTransformer()
@@ -91,6 +102,37 @@ async def create_issue_embeds(
         seen.add(issue.html_url)
         issues.append((repo, issue))
 
+    return issues
+
+
+async def fetch_issue_references(
+    github: GitHub[Any],
+    references: list[str],
+) -> list[IssueReference]:
+    """Fetches issues from fully qualified references (`owner/repo#123`), skipping any
+    that no longer exist."""
+
+    async def fetch(reference: str) -> IssueReference | None:
+        raw_repo, number = reference.rsplit("#", maxsplit=1)
+        repo = RepositoryName.parse(raw_repo)
+        try:
+            issue = await gh_request(
+                github.rest.issues.async_get(repo.owner, repo.repo, int(number))
+            )
+        except GitHubException:
+            logger.warning(f"Failed to fetch issue: {reference}", exc_info=True)
+            return None
+        return repo, issue
+
+    results = await asyncio.gather(*(fetch(reference) for reference in references))
+    return [result for result in results if result is not None]
+
+
+@timed_phase("render")
+def create_issue_embeds(
+    interaction: Interaction,
+    issues: list[IssueReference],
+):
     content = None
     embeds = list[Embed]()
     match issues:
@@ -107,3 +149,8 @@ async def create_issue_embeds(
         content=content,
         embeds=embeds,
     )
+
+
+def format_issue_reference(reference: IssueReference) -> str:
+    repo, issue = reference
+    return f"{repo}#{issue.number}"
@@ -7,11 +7,13 @@ from discord import Embed
 from discord.ui import Button, Item
 from githubkit.rest import Release
 
+from ghutils.core.metrics import timed_phase
 from ghutils.utils.discord.embeds import set_embed_author, truncate_markdown_description
 from ghutils.utils.github import ReleaseState, RepositoryName, get_reactions_by_emoji
 from ghutils.utils.strings import truncate_str
 
 
+@timed_phase("render")
 def create_release_embed(
     repo: RepositoryName,
     release: Release,
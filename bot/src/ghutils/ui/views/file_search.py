@@ -0,0 +1,202 @@
+from typing import Any, Self
+
+from discord import ButtonStyle, HTTPException, Interaction
+from discord.ui import Button, button
+from githubkit.rest import FullRepository
+
+from ghutils.core.bot import GHUtilsBot
+from ghutils.ui.components.visibility import (
+    MessageVisibility,
+    SendAsPublicButton,
+    add_visibility_buttons,
+)
+from ghutils.ui.embeds.files import (
+    EmbedField,
+    create_file_search_embed,
+    create_file_search_fields,
+    paginate_fields,
+)
+from ghutils.utils.discord.commands import AnyInteractionCommand
+from ghutils.utils.discord.views import DynamicItemsView
+from ghutils.utils.file_search import PathSearchResults
+
+MAX_RESULTS = 200
+"""Maximum number of matches to keep for paging through."""
+
+
+class FileSearchView(DynamicItemsView):
+    """Paginated results for `/gh search files`.
+
+    All of the matches are formatted up front, so switching pages doesn't make any
+    requests to GitHub.
+    """
+
+    repo: FullRepository
+    ref: str
+    query: str
+    results: PathSearchResults
+    pages: list[list[EmbedField]]
+    visibility: MessageVisibility
+
+    page: int
+    command: AnyInteractionCommand
+    interaction: Interaction | None
+
+    def __init__(
+        self,
+        *,
+        interaction: Interaction,
+        repo: FullRepository,
+        ref: str,
+        query: str,
+        results: PathSearchResults,
+        pages: list[list[EmbedField]],
+        visibility: MessageVisibility,
+        command: AnyInteractionCommand,
+        show_usage: bool = False,
+        page: int = 1,
+    ):
+        """Do not use this constructor directly!"""
+
+        super().__init__(interaction.client, timeout=10 * 60)
+
+        self.repo = repo
+        self.ref = ref
+        self.query = query
+        self.results = results
+        self.pages = pages
+        self.visibility = visibility
+
+        self.page = page
+        self.command = command
+        self.interaction = None
+
+        self._page_buttons = [self.previous_button, self.page_button, self.next_button]
+        if len(self.pages) > 1:
+            self._update_page_buttons()
+        else:
+            for item in self._page_buttons:
+                self.remove_item(item)
+
+        add_visibility_buttons(
+            self,
+            interaction,
+            visibility,
+            command=command,
+            show_usage=show_usage,
+            send_as_public=self._send_as_public,
+        )
+
+    @classmethod
+    async def new(
+        cls,
+        interaction: Interaction,
+        *,
+        repo: FullRepository,
+        ref: str,
+        query: str,
+        tree_sha: str,
+        results: PathSearchResults,
+        per_page: int,
+        visibility: MessageVisibility,
+    ) -> Self:
+        pages = await GHUtilsBot.of(interaction).workers.run(
+            lambda: paginate_fields(
+                create_file_search_fields(repo, tree_sha, results.matches),
+                per_page,
+            )
+        )
+        return cls(
+            interaction=interaction,
+            repo=repo,
+            ref=ref,
+            query=query,
+            results=results,
+            pages=pages,
+            visibility=visibility,
+            command=interaction.command,
+        )
+
+    def create_embed(self):
+        return create_file_search_embed(
+            self.repo,
+            self.ref,
+            self.query,
+            self.results,
+            self.pages[self.page - 1] if self.pages else [],
+            page=self.page,
+            page_count=len(self.pages),
+        )
+
+    async def send(self, interaction: Interaction):
+        self.interaction = interaction
+        if interaction.response.is_done():
+            await interaction.followup.send(
+                embed=self.create_embed(),
+                view=self,
+                ephemeral=self.visibility == "private",
+            )
+        else:
+            await interaction.response.send_message(
+                embed=self.create_embed(),
+                view=self,
+                ephemeral=self.visibility == "private",
+            )
+
+    async def on_timeout(self):
+        await super().on_timeout()
+        if self.interaction is None:
+            return
+
+        # these buttons stop working when the view times out, so remove them
+        # the delete button is a dynamic item, so it still works
+        removed = False
+        for item in self.children:
+            if item in self._page_buttons or isinstance(item, SendAsPublicButton):
+                self.remove_item(item)
+                removed = True
+
+        if removed:
+            try:
+                await self.interaction.edit_original_response(view=self)
+            except HTTPException:
+                pass
+
+    async def _switch_to_page(self, interaction: Interaction, page: int):
+        self.page = max(1, min(page, len(self.pages)))
+        self._update_page_buttons()
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+
+    def _update_page_buttons(self):
+        self.previous_button.disabled = self.page <= 1
+        self.page_button.label = f"{self.page}/{len(self.pages)}"
+        self.next_button.disabled = self.page >= len(self.pages)
+
+    async def _send_as_public(self, interaction: Interaction):
+        self.stop()
+        view = type(self)(
+            interaction=interaction,
+            repo=self.repo,
+            ref=self.ref,
+            query=self.query,
+            results=self.results,
+            pages=self.pages,
+            visibility="public",
+            # the button's interaction doesn't have the command
+            command=self.command,
+            show_usage=True,
+            page=self.page,
+        )
+        await view.send(interaction)
+
+    @button(emoji="⬅️", style=ButtonStyle.secondary)
+    async def previous_button(self, interaction: Interaction, button: Button[Any]):
+        await self._switch_to_page(interaction, self.page - 1)
+
+    @button(label="1/1", style=ButtonStyle.secondary, disabled=True)
+    async def page_button(self, interaction: Interaction, button: Button[Any]):
+        await interaction.response.defer()
+
+    @button(emoji="➡️", style=ButtonStyle.secondary)
+    async def next_button(self, interaction: Interaction, button: Button[Any]):
+        await self._switch_to_page(interaction, self.page + 1)
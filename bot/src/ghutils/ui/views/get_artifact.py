@@ -14,22 +14,28 @@ from githubkit.rest import Artifact, FullRepository, Workflow, WorkflowRun
 from yarl import URL
 
 from ghutils.core.bot import GHUtilsBot
-from ghutils.ui.components.artifacts import WORKFLOW_PREFIX, ArtifactContainer
+from ghutils.core.ratelimit import ConsumerMixin
+from ghutils.ui.components.artifacts import ArtifactContainer
 from ghutils.ui.components.paginated_select import (
     MAX_PER_PAGE,
     PaginatedSelect,
     paginated_select,
 )
 from ghutils.ui.components.visibility import add_visibility_buttons
+from ghutils.utils.actions import WORKFLOW_PREFIX
 from ghutils.utils.discord.commands import AnyInteractionCommand
+from ghutils.utils.discord.transformers import get_cache_scope
+from ghutils.utils.discord.views import AsyncInitMixin
+from ghutils.utils.github import RepositoryName, search_branches
 from ghutils.utils.strings import join_truthy, truncate_str
 
 
-class GetArtifactView(LayoutView):
+class GetArtifactView(ConsumerMixin, AsyncInitMixin, LayoutView):
     bot: GHUtilsBot
     github: GitHub[Any]
     command: AnyInteractionCommand
     repo: FullRepository
+    cache_scope: str
 
     workflows: dict[int, Workflow]
     artifacts: dict[str, Artifact]
@@ -47,6 +53,7 @@ class GetArtifactView(LayoutView):
         github: GitHub[Any],
         command: AnyInteractionCommand,
         repo: FullRepository,
+        cache_scope: str,
     ):
         """Do not use this constructor directly!"""
 
@@ -56,6 +63,7 @@ class GetArtifactView(LayoutView):
         self.github = github
         self.command = command
         self.repo = repo
+        self.cache_scope = cache_scope
 
         self.workflows = {}
         self.artifacts = {}
@@ -76,21 +84,26 @@ class GetArtifactView(LayoutView):
         self.add_item(self.branch_label_text)
         self.add_item(self.branch_row)
 
-    async def async_init(self, interaction: Interaction) -> Self:
-        await self.workflow_select.fetch_first_page(interaction)
-        await self.branch_select.fetch_first_page(interaction)
-        return self
+    def initial_loads(self, interaction: Interaction):
+        yield self.workflow_select.fetch_first_page(interaction)
+        yield self.branch_select.fetch_first_page(interaction)
 
     @classmethod
     async def new(cls, interaction: Interaction, repo: FullRepository) -> Self:
-        async with GHUtilsBot.github_app_of(interaction) as (github, _):
+        async with GHUtilsBot.github_app_of(interaction) as (github, state):
             return await cls(
                 bot=GHUtilsBot.of(interaction),
                 github=github,
                 command=interaction.command,
                 repo=repo,
+                cache_scope=get_cache_scope(interaction, state),
             ).async_init(interaction)
 
+    async def on_timeout(self):
+        self.workflow_select.cancel_prefetch()
+        self.branch_select.cancel_prefetch()
+        self.artifact_select.cancel_prefetch()
+
     async def refresh_artifacts(self, interaction: Interaction):
         if self.workflow is None:
             return
@@ -108,19 +121,15 @@ class GetArtifactView(LayoutView):
         self.remove_item(self.send_as_public_row)
 
         async with self.github as github:
-            runs = (
-                await github.rest.actions.async_list_workflow_runs(
-                    owner=self.repo.owner.login,
-                    repo=self.repo.name,
-                    workflow_id=self.workflow.id,
-                    branch=self.branch,
-                    status="success",
-                    exclude_pull_requests=True,
-                    per_page=1,
-                )
-            ).parsed_data.workflow_runs
+            run = await self.bot.artifact_cache.get_latest_run(
+                github,
+                RepositoryName.from_repo(self.repo),
+                self.workflow.id,
+                self.branch,
+                scope=self.cache_scope,
+            )
 
-            if not runs:
+            if run is None:
                 self.set_error(
                     "❌ No workflow runs found.",
                     URL(self.repo.html_url)
@@ -131,7 +140,7 @@ class GetArtifactView(LayoutView):
                 )
                 return
 
-            self.workflow_run = run = runs[0]
+            self.workflow_run = run
 
             await self.artifact_select.fetch_first_page(interaction)
             if not self.artifact_select.options:
@@ -184,7 +193,7 @@ class GetArtifactView(LayoutView):
 
     workflow_row = ActionRow[Any]()
 
-    @paginated_select()
+    @paginated_select(prefetch=True)
     async def workflow_select(
         self,
         interaction: Interaction,
@@ -207,16 +216,26 @@ class GetArtifactView(LayoutView):
         select: PaginatedSelect[Any],
         page: int,
     ) -> list[SelectOption]:
-        response = await self.github.rest.actions.async_list_repo_workflows(
-            owner=self.repo.owner.login,
-            repo=self.repo.name,
-            per_page=MAX_PER_PAGE,
-            page=page,
+        response = await self.bot.page_cache.get(
+            (
+                self.cache_scope,
+                self.repo.full_name.lower(),
+                "actions/workflows",
+                page,
+                MAX_PER_PAGE,
+            ),
+            lambda headers: self.github.rest.actions.async_list_repo_workflows(
+                owner=self.repo.owner.login,
+                repo=self.repo.name,
+                per_page=MAX_PER_PAGE,
+                page=page,
+                headers=headers,
+            ),
         )
         select.set_last_page(page, response)
 
         options = list[SelectOption]()
-        for workflow in response.parsed_data.workflows:
+        for workflow in response.data.workflows:
             self.workflows[workflow.id] = workflow
             options.append(
                 SelectOption(
@@ -235,7 +254,7 @@ class GetArtifactView(LayoutView):
 
     branch_row = ActionRow[Any]()
 
-    @paginated_select(min_values=0)
+    @paginated_select(min_values=0, prefetch=True)
     async def branch_select(
         self,
         interaction: Interaction,
@@ -257,14 +276,39 @@ class GetArtifactView(LayoutView):
         select: PaginatedSelect[Any],
         page: int,
     ) -> list[SelectOption]:
-        response = await self.github.rest.repos.async_list_branches(
-            owner=self.repo.owner.login,
-            repo=self.repo.name,
-            per_page=MAX_PER_PAGE,
-            page=page,
+        response = await self.bot.page_cache.get(
+            (
+                self.cache_scope,
+                self.repo.full_name.lower(),
+                "branches",
+                page,
+                MAX_PER_PAGE,
+            ),
+            lambda headers: self.github.rest.repos.async_list_branches(
+                owner=self.repo.owner.login,
+                repo=self.repo.name,
+                per_page=MAX_PER_PAGE,
+                page=page,
+                headers=headers,
+            ),
         )
         select.set_last_page(page, response)
-        return [SelectOption(label=branch.name) for branch in response.parsed_data]
+        return [SelectOption(label=branch.name) for branch in response.data]
+
+    @branch_select.filter_getter()
+    async def branch_select_filter_getter(
+        self,
+        interaction: Interaction,
+        select: PaginatedSelect[Any],
+        query: str,
+    ) -> list[SelectOption]:
+        branches = await search_branches(
+            self.github,
+            RepositoryName.from_repo(self.repo),
+            query,
+            limit=MAX_PER_PAGE,
+        )
+        return [SelectOption(label=branch) for branch in branches]
 
     # artifact
 
@@ -272,7 +316,7 @@ class GetArtifactView(LayoutView):
 
     artifact_select_row = ActionRow[Any]()
 
-    @paginated_select()
+    @paginated_select(prefetch=True)
     async def artifact_select(
         self,
         interaction: Interaction,
@@ -296,14 +340,15 @@ class GetArtifactView(LayoutView):
         if not self.workflow_run:
             return []
 
-        response = await self.github.rest.actions.async_list_workflow_run_artifacts(
-            owner=self.repo.owner.login,
-            repo=self.repo.name,
-            run_id=self.workflow_run.id,
-            per_page=MAX_PER_PAGE,
+        response = await self.bot.artifact_cache.list_artifacts(
+            self.github,
+            RepositoryName.from_repo(self.repo),
+            self.workflow_run.id,
+            scope=self.cache_scope,
             page=page,
+            per_page=MAX_PER_PAGE,
         )
-        artifacts = response.parsed_data.artifacts
+        artifacts = response.data.artifacts
 
         if not artifacts:
             return []
@@ -341,22 +386,23 @@ class GetArtifactView(LayoutView):
         interaction: Interaction,
         button: Button[Any],
     ):
-        self.timeout = None
-
-        self.clear_items()
-
-        self.add_item(self.result_container)
+        # the public message only contains links and dynamic items, so it doesn't
+        # need this view (or any of its state) to stay in memory
+        self.stop()
+        self.remove_item(self.result_container)
 
-        self.send_as_public_row.clear_items()
+        row = ActionRow[Any]()
         add_visibility_buttons(
-            self.send_as_public_row,
+            row,
             interaction,
             visibility="public",
             command=self.command,
             show_usage=True,
         )
-        self.add_item(self.send_as_public_row)
+        view = LayoutView(timeout=None)
+        view.add_item(self.result_container)
+        view.add_item(row)
 
         await interaction.response.edit_message()
         await interaction.delete_original_response()
-        await interaction.followup.send(view=self, ephemeral=False)
+        await interaction.followup.send(view=view, ephemeral=False)
@@ -7,6 +7,7 @@ from githubkit import GitHub
 from githubkit.rest import FullRepository, Release
 
 from ghutils.core.bot import GHUtilsBot
+from ghutils.core.ratelimit import ConsumerMixin
 from ghutils.ui.components.paginated_select import (
     MAX_PER_PAGE,
     PaginatedSelect,
@@ -15,18 +16,22 @@ from ghutils.ui.components.paginated_select import (
 from ghutils.ui.components.visibility import MessageContents, MessageVisibility
 from ghutils.ui.embeds.releases import create_release_embed, create_release_items
 from ghutils.utils.discord.commands import AnyInteractionCommand
+from ghutils.utils.discord.transformers import get_cache_scope
+from ghutils.utils.discord.views import AsyncInitMixin
 from ghutils.utils.github import ReleaseState, RepositoryName
 from ghutils.utils.strings import truncate_str
 
 
-class GetReleaseView(View):
+class GetReleaseView(ConsumerMixin, AsyncInitMixin, View):
     bot: GHUtilsBot
     github: GitHub[Any]
     command: AnyInteractionCommand
     repo: FullRepository
     visibility: MessageVisibility
+    cache_scope: str
 
     releases: dict[int, Release]
+    all_releases: list[Release] | None
     release: Release | None
 
     def __init__(
@@ -37,6 +42,7 @@ class GetReleaseView(View):
         command: AnyInteractionCommand,
         repo: FullRepository,
         visibility: MessageVisibility,
+        cache_scope: str,
     ):
         """Do not use this constructor directly!"""
 
@@ -47,13 +53,14 @@ class GetReleaseView(View):
         self.command = command
         self.repo = repo
         self.visibility = visibility
+        self.cache_scope = cache_scope
 
         self.releases = {}
+        self.all_releases = None
         self.release = None
 
-    async def async_init(self, interaction: Interaction) -> Self:
-        await self.release_select.fetch_first_page(interaction)
-        return self
+    def initial_loads(self, interaction: Interaction):
+        yield self.release_select.fetch_first_page(interaction)
 
     @classmethod
     async def new(
@@ -62,16 +69,20 @@ class GetReleaseView(View):
         repo: FullRepository,
         visibility: MessageVisibility,
     ) -> Self:
-        async with GHUtilsBot.github_app_of(interaction) as (github, _):
+        async with GHUtilsBot.github_app_of(interaction) as (github, state):
             return await cls(
                 bot=GHUtilsBot.of(interaction),
                 github=github,
                 command=interaction.command,
                 repo=repo,
                 visibility=visibility,
+                cache_scope=get_cache_scope(interaction, state),
             ).async_init(interaction)
 
-    @paginated_select(placeholder="Select a release")
+    async def on_timeout(self):
+        self.release_select.cancel_prefetch()
+
+    @paginated_select(placeholder="Select a release", prefetch=True)
     async def release_select(
         self,
         interaction: Interaction,
@@ -89,36 +100,74 @@ class GetReleaseView(View):
         select: PaginatedSelect[Any],
         page: int,
     ) -> list[SelectOption]:
-        response = await self.github.rest.repos.async_list_releases(
-            owner=self.repo.owner.login,
-            repo=self.repo.name,
-            per_page=MAX_PER_PAGE,
-            page=page,
+        response = await self.bot.page_cache.get(
+            (
+                self.cache_scope,
+                self.repo.full_name.lower(),
+                "releases",
+                page,
+                MAX_PER_PAGE,
+            ),
+            lambda headers: self.github.rest.repos.async_list_releases(
+                owner=self.repo.owner.login,
+                repo=self.repo.name,
+                per_page=MAX_PER_PAGE,
+                page=page,
+                headers=headers,
+            ),
         )
         select.set_last_page(page, response)
+        return [self._create_release_option(release) for release in response.data]
 
-        options = list[SelectOption]()
-        for release in response.parsed_data:
-            self.releases[release.id] = release
-
-            date = release.published_at or release.created_at
-
-            if release.draft:
-                release_type = " (draft)"
-            elif release.prerelease:
-                release_type = " (pre-release)"
-            else:
-                release_type = ""
-
-            options.append(
-                SelectOption(
-                    label=truncate_str(release.name or release.tag_name, 100),
-                    value=str(release.id),
-                    description=format_date(date, format="long") + release_type,
+    @release_select.filter_getter()
+    async def release_select_filter_getter(
+        self,
+        interaction: Interaction,
+        select: PaginatedSelect[Any],
+        query: str,
+    ) -> list[SelectOption]:
+        # the API can't search releases, so fetch all of them once and filter locally
+        if self.all_releases is None:
+            self.all_releases = [
+                release
+                async for release in self.github.rest.paginate(
+                    self.github.rest.repos.async_list_releases,
+                    owner=self.repo.owner.login,
+                    repo=self.repo.name,
+                    per_page=100,
                 )
-            )
+            ]
+
+        query = query.casefold()
+        options = list[SelectOption]()
+        for release in self.all_releases:
+            if (
+                query in (release.name or "").casefold()
+                or query in release.tag_name.casefold()
+            ):
+                options.append(self._create_release_option(release))
+                if len(options) >= MAX_PER_PAGE:
+                    break
         return options
 
+    def _create_release_option(self, release: Release) -> SelectOption:
+        self.releases[release.id] = release
+
+        date = release.published_at or release.created_at
+
+        if release.draft:
+            release_type = " (draft)"
+        elif release.prerelease:
+            release_type = " (pre-release)"
+        else:
+            release_type = ""
+
+        return SelectOption(
+            label=truncate_str(release.name or release.tag_name, 100),
+            value=str(release.id),
+            description=format_date(date, format="long") + release_type,
+        )
+
     @button(
         label="Confirm",
         style=ButtonStyle.green,
@@ -144,3 +193,4 @@ class GetReleaseView(View):
             await contents.send_followup(interaction, "public", show_usage=True)
 
         self.stop()
+        self.release_select.cancel_prefetch()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Collection
+
+from githubkit import GitHub
+from githubkit.rest import (
+    Artifact,
+    ReposOwnerRepoActionsRunsRunIdArtifactsGetResponse200,
+    Workflow,
+    WorkflowRun,
+)
+from githubkit.utils import UNSET
+
+from ghutils.utils.github import RepositoryName
+from ghutils.utils.github_cache import CachedResponse, ResponseCache
+
+WORKFLOW_PREFIX = ".github/workflows/"
+
+type WorkflowKey = tuple[str, str, int | str]
+"""`(cache scope, lowercase repo name, workflow id or file name)`"""
+
+type WorkflowRunKey = tuple[str, str, int | str, str | None]
+"""`(cache scope, lowercase repo name, workflow id or file name, branch)`"""
+
+type RunArtifactsKey = tuple[str, str, int, str | None, int, int]
+"""`(cache scope, lowercase repo name, run id, artifact name, page, per_page)`"""
+
+
+@dataclass
+class LatestArtifact:
+    workflow_run: WorkflowRun
+    artifact: Artifact
+
+
+def parse_workflow_id(value: str) -> int | str:
+    """Parses a workflow id, file name, or path (eg. `.github/workflows/ci.yml`) into
+    a value that can be used as `workflow_id` in API requests."""
+    if value.isdigit():
+        return int(value)
+    return value.removeprefix(WORKFLOW_PREFIX)
+
+
+class ArtifactCache:
+    """Caches the latest successful run of each workflow, and the artifacts of those
+    runs, so switching between workflows and branches doesn't refetch them.
+
+    Runs are only cached for a short time, since a new run could finish at any moment.
+    Artifacts belong to a specific run, so they can be cached for longer.
+
+    Every method takes a cache scope (see `get_cache_scope`) for the credentials that
+    `github` uses, so private repos' data is only reused for the same user.
+    """
+
+    def __init__(
+        self,
+        *,
+        workflow_ttl: float = 5 * 60,
+        run_ttl: float = 30,
+        artifacts_ttl: float = 5 * 60,
+    ):
+        self.workflows = ResponseCache[WorkflowKey](maxsize=1024, ttl=workflow_ttl)
+        self.runs = ResponseCache[WorkflowRunKey](maxsize=1024, ttl=run_ttl)
+        self.artifacts = ResponseCache[RunArtifactsKey](maxsize=1024, ttl=artifacts_ttl)
+
+    def clear(self):
+        self.workflows.clear()
+        self.runs.clear()
+        self.artifacts.clear()
+
+    async def get_workflow(
+        self,
+        github: GitHub[Any],
+        repo: RepositoryName,
+        workflow: int | str,
+        *,
+        scope: str,
+    ) -> Workflow:
+        response = await self.workflows.get(
+            (scope, str(repo).lower(), workflow),
+            lambda headers: github.rest.actions.async_get_workflow(
+                owner=repo.owner,
+                repo=repo.repo,
+                workflow_id=workflow,
+                headers=headers,
+            ),
+        )
+        return response.data
+
+    async def get_latest_run(
+        self,
+        github: GitHub[Any],
+        repo: RepositoryName,
+        workflow: int | str,
+        branch: str | None,
+        *,
+        scope: str,
+    ) -> WorkflowRun | None:
+        """Returns the latest successful run of a workflow, optionally on a specific
+        branch."""
+
+        response = await self.runs.get(
+            (scope, str(repo).lower(), workflow, branch),
+            lambda headers: github.rest.actions.async_list_workflow_runs(
+                owner=repo.owner,
+                repo=repo.repo,
+                workflow_id=workflow,
+                branch=branch or UNSET,
+                status="success",
+                exclude_pull_requests=True,
+                per_page=1,
+                headers=headers,
+            ),
+        )
+        runs = response.data.workflow_runs
+        return runs[0] if runs else None
+
+    async def list_artifacts(
+        self,
+        github: GitHub[Any],
+        repo: RepositoryName,
+        run_id: int,
+        *,
+        scope: str,
+        name: str | None = None,
+        page: int = 1,
+        per_page: int = 100,
+    ) -> CachedResponse[ReposOwnerRepoActionsRunsRunIdArtifactsGetResponse200]:
+        """Returns a page of the artifacts of a workflow run, optionally filtered by
+        name."""
+
+        return await self.artifacts.get(
+            (scope, str(repo).lower(), run_id, name, page, per_page),
+            lambda headers: github.rest.actions.async_list_workflow_run_artifacts(
+                owner=repo.owner,
+                repo=repo.repo,
+                run_id=run_id,
+                name=name or UNSET,
+                page=page,
+                per_page=per_page,
+                headers=headers,
+            ),
+        )
+
+    async def get_latest_artifact(
+        self,
+        github: GitHub[Any],
+        repo: RepositoryName,
+        workflow: int | str,
+        branch: str | None,
+        name: str,
+        *,
+        scope: str,
+    ) -> LatestArtifact | None:
+        """Returns the artifact with the given name from the latest successful run of
+        a workflow, or `None` if there is no such run or artifact."""
+
+        run = await self.get_latest_run(github, repo, workflow, branch, scope=scope)
+        if run is None:
+            return None
+
+        response = await self.list_artifacts(
+            github, repo, run.id, scope=scope, name=name
+        )
+        for artifact in response.data.artifacts:
+            if artifact.name == name:
+                return LatestArtifact(workflow_run=run, artifact=artifact)
+        return None
+
+    def invalidate_workflows(self, repo: RepositoryName) -> int:
+        repo_key = str(repo).lower()
+        return self.workflows.pop_where(lambda key: key[1] == repo_key)
+
+    def invalidate_runs(
+        self,
+        repo: RepositoryName,
+        *,
+        workflows: Collection[int | str] | None = None,
+        branch: str | None = None,
+    ) -> int:
+        """Removes the cached latest runs of a repo's workflows.
+
+        If `workflows` is given, only runs of those workflows are removed. If `branch`
+        is given, only runs on that branch (and runs on any branch) are removed.
+        """
+
+        repo_key = str(repo).lower()
+        return self.runs.pop_where(
+            lambda key: key[1] == repo_key
+            and (workflows is None or key[2] in workflows)
+            and (branch is None or key[3] in (branch, None))
+        )
+
+    def invalidate_artifacts(self, repo: RepositoryName, run_id: int) -> int:
+        repo_key = str(repo).lower()
+        return self.artifacts.pop_where(lambda key: key[1:3] == (repo_key, run_id))
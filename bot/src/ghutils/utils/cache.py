@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, overload
+
+
+class LRUCache[K, V]:
+    """A simple in-memory cache that evicts the least recently used entry when full."""
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1 (got {maxsize})")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict[K, V]()
+
+    @overload
+    def get(self, key: K) -> V | None: ...
+
+    @overload
+    def get[D](self, key: K, default: D) -> V | D: ...
+
+    def get[D](self, key: K, default: D | None = None) -> V | D | None:
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self._data[key]
+
+    def set(self, key: K, value: V):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        return self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[K], bool]) -> int:
+        """Removes every entry whose key matches `predicate`, and returns the number of
+        entries removed."""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TTLCache[K, V]:
+    """An LRU cache where entries also expire a fixed number of seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = LRUCache[K, tuple[float, V]](maxsize)
+
+    @overload
+    def get(self, key: K) -> V | None: ...
+
+    @overload
+    def get[D](self, key: K, default: D) -> V | D: ...
+
+    def get[D](self, key: K, default: D | None = None) -> V | D | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expire_time, value = entry
+        if expire_time <= monotonic():
+            self._entries.pop(key)
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None):
+        if ttl is None:
+            ttl = self.ttl
+        self._entries.set(key, (monotonic() + ttl, value))
+
+    def pop(self, key: K) -> V | None:
+        if entry := self._entries.pop(key):
+            return entry[1]
+
+    def pop_where(self, predicate: Callable[[K], bool]) -> int:
+        return self._entries.pop_where(predicate)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 from typing import overload
 
@@ -18,6 +20,12 @@ def set_embed_author(embed: Embed, user: SimpleUser):
     return embed
 
 
+def hash_embed(embed: Embed) -> str:
+    """Returns a hash of the contents of an embed, to check if it changed."""
+    data = json.dumps(embed.to_dict(), sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
 _NEWLINE_PATTERN = re.compile(r"\n[ \t]*\n([ \t]*\n)+")
 
 # remove extra newlines before heading, and fix double newline after heading
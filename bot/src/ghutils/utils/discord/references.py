@@ -12,6 +12,7 @@ from githubkit.exception import GitHubException, RequestFailed
 from githubkit.rest import Commit, Issue, PullRequest
 
 from ghutils.core.bot import GHUtilsBot
+from ghutils.core.metrics import timed_phase
 from ghutils.core.types import LoginState
 from ghutils.db.config import get_configs
 from ghutils.utils.github import RepositoryName, gh_request, shorten_sha
@@ -57,6 +58,7 @@ class ReferenceTransformer[T](Transformer, ABC):
         For example, issues would return a list of `(issue_number, issue_title)`.
         """
 
+    @timed_phase("transform")
     async def transform(
         self,
         interaction: Interaction,
@@ -132,8 +134,9 @@ class ReferenceTransformer[T](Transformer, ABC):
         rest = rest.strip()
 
         if not raw_repo:
-            with GHUtilsBot.db_session_of(interaction) as session:
-                configs = get_configs(session, interaction)
+            bot = GHUtilsBot.of(interaction)
+            with bot.db_session() as session:
+                configs = get_configs(session, interaction, cache=bot.config_cache)
                 if repo := configs.default_repo:
                     return repo, rest
             raise ValueError(f"Missing username and repository: {value}")
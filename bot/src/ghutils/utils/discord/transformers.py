@@ -11,6 +11,7 @@ from githubkit.exception import GitHubException, RequestFailed
 from githubkit.rest import FullRepository, PrivateUser, PublicUser
 
 from ghutils.core.bot import GHUtilsBot
+from ghutils.core.metrics import timed_phase
 from ghutils.core.types import LoginState
 from ghutils.db.config import get_configs
 from ghutils.utils.github import RepositoryName, gh_request
@@ -24,15 +25,20 @@ USER_URL_PATTERN = re.compile(r"(?:https?://)?github.com/(?P<value>[\w-]+)")
 
 
 class RepositoryTransformer(Transformer):
+    @timed_phase("transform")
     async def transform(self, interaction: Interaction, value: str) -> FullRepository:
         if match := REPO_URL_PATTERN.match(value):
             value = match["value"]
 
         repo = RepositoryName.parse(value)
-        async with GHUtilsBot.github_app_of(interaction) as (github, _):
+        bot = GHUtilsBot.of(interaction)
+        async with bot.github_app(interaction) as (github, state):
             try:
-                return await gh_request(
-                    github.rest.repos.async_get(repo.owner, repo.repo)
+                return await bot.repo_cache.get_or_fetch(
+                    f"{get_cache_scope(interaction, state)}:{str(repo).lower()}",
+                    lambda: gh_request(
+                        github.rest.repos.async_get(repo.owner, repo.repo)
+                    ),
                 )
             except GitHubException as e:
                 match e:
@@ -47,42 +53,48 @@ class RepositoryTransformer(Transformer):
         interaction: Interaction,
         value: str,
     ) -> list[Choice[str]]:
+        bot = GHUtilsBot.of(interaction)
+
         value = value.strip()
         if value:
             if match := REPO_URL_PATTERN.match(value):
                 value = match["value"]
             query = f"{value} in:name fork:true"
         else:
-            with GHUtilsBot.db_session_of(interaction) as session:
-                configs = get_configs(session, interaction)
+            with bot.db_session() as session:
+                configs = get_configs(session, interaction, cache=bot.config_cache)
                 if repo := configs.default_repo:
                     return [Choice(name=str(repo), value=str(repo))]
             return []
 
-        async with GHUtilsBot.github_app_of(interaction) as (github, state):
+        async with bot.github_app(interaction) as (github, state):
             if state != LoginState.LOGGED_IN:
                 return []
 
-            try:
+            async def search():
                 result = await gh_request(
                     github.rest.search.async_repos(
                         q=query,
                         per_page=25,
                     )
                 )
+                return [repo.full_name for repo in result.items]
+
+            try:
+                names = await bot.search_cache.get_or_fetch(
+                    f"repos:{get_cache_scope(interaction, state)}:{query}", search
+                )
             except RequestFailed:
                 return []
             except GitHubException as e:
                 logger.warning(e)
                 return []
 
-            return [
-                Choice(name=repo.full_name, value=repo.full_name)
-                for repo in result.items
-            ]
+            return [Choice(name=name, value=name) for name in names]
 
 
 class UserTransformer(Transformer):
+    @timed_phase("transform")
     async def transform(
         self,
         interaction: Interaction,
@@ -91,9 +103,13 @@ class UserTransformer(Transformer):
         if match := USER_URL_PATTERN.match(value):
             value = match["value"]
 
-        async with GHUtilsBot.github_app_of(interaction) as (github, _):
+        bot = GHUtilsBot.of(interaction)
+        async with bot.github_app(interaction) as (github, state):
             try:
-                return await gh_request(github.rest.users.async_get_by_username(value))
+                return await bot.user_cache.get_or_fetch(
+                    f"{get_cache_scope(interaction, state)}:{value.lower()}",
+                    lambda: gh_request(github.rest.users.async_get_by_username(value)),
+                )
             except GitHubException as e:
                 match e:
                     case RequestFailed(response=Response(status_code=404)):
@@ -107,7 +123,8 @@ class UserTransformer(Transformer):
         interaction: Interaction,
         value: str,
     ) -> list[Choice[str]]:
-        async with GHUtilsBot.github_app_of(interaction) as (github, state):
+        bot = GHUtilsBot.of(interaction)
+        async with bot.github_app(interaction) as (github, state):
             if state != LoginState.LOGGED_IN:
                 return []
 
@@ -119,20 +136,38 @@ class UserTransformer(Transformer):
             if match := USER_URL_PATTERN.match(value):
                 value = match["value"]
 
-            try:
+            async def search():
                 result = await gh_request(
                     github.rest.search.async_users(
                         q=value,
                         per_page=25,
                     )
                 )
+                return [user.login for user in result.items]
+
+            try:
+                logins = await bot.search_cache.get_or_fetch(
+                    f"users:{get_cache_scope(interaction, state)}:{value}", search
+                )
             except RequestFailed:
                 return []
             except GitHubException as e:
                 logger.warning(e)
                 return []
 
-            return [Choice(name=user.login, value=user.login) for user in result.items]
+            return [Choice(name=login, value=login) for login in logins]
+
+
+APP_CACHE_SCOPE = "app"
+"""Cache scope for requests made with the default installation."""
+
+
+def get_cache_scope(interaction: Interaction, state: LoginState) -> str:
+    """Returns a prefix for shared cache keys, so responses that depend on who made the
+    request (eg. private repos) are only reused for the same user."""
+    if state == LoginState.LOGGED_IN:
+        return f"user/{interaction.user.id}"
+    return APP_CACHE_SCOPE
 
 
 RepositoryOption = Transform[FullRepository, RepositoryTransformer]
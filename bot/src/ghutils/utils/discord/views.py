@@ -0,0 +1,64 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Coroutine, Iterable, Self
+
+from discord import Client, Interaction
+from discord.ui import DynamicItem, View
+
+from ghutils.core.ratelimit import ConsumerMixin
+
+
+class AsyncInitMixin(ABC):
+    """Mixin for views that need to fetch some data before they can be sent.
+
+    Subclasses return the independent loads from `initial_loads`, and callers await
+    `async_init` to run all of them concurrently. This way, the time until the view is
+    ready is only as long as the slowest request, rather than the sum of all of them.
+    """
+
+    @abstractmethod
+    def initial_loads(
+        self,
+        interaction: Interaction,
+    ) -> Iterable[Coroutine[Any, Any, Any]]:
+        """Returns the loads to run when initializing the view.
+
+        These are run concurrently, so they must not depend on each other.
+        """
+
+    async def async_init(self, interaction: Interaction) -> Self:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for load in self.initial_loads(interaction):
+                    tg.create_task(load)
+        except ExceptionGroup as e:
+            # the other loads are cancelled when one fails, so just raise the first
+            # error, which lets the command error handler display it normally
+            raise e.exceptions[0] from None
+        return self
+
+
+class DynamicItemsView(ConsumerMixin, View):
+    """A view that can contain dynamic items and still time out.
+
+    When a view stops or times out, discord.py unregisters every dynamic item that is
+    a direct child of it, which breaks those items on every message until the bot
+    restarts. This view registers them again afterwards.
+    """
+
+    def __init__(self, client: Client, *, timeout: float | None = 180):
+        super().__init__(timeout=timeout)
+        self.client = client
+
+    def stop(self):
+        super().stop()
+        self._register_dynamic_items()
+
+    async def on_timeout(self):
+        self._register_dynamic_items()
+
+    def _register_dynamic_items(self):
+        if item_types := {
+            type(item) for item in self.children if isinstance(item, DynamicItem)
+        }:
+            self.client.add_dynamic_items(*item_types)
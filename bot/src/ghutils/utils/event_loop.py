@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from dataclasses import dataclass, field
+from time import monotonic
+from types import FrameType
+from typing import Any, Callable, Coroutine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LoopHandle:
+    """Thread-safe handle for running code in an event loop from other threads (and
+    their event loops)."""
+
+    loop: asyncio.AbstractEventLoop
+
+    async def run[T](self, coro: Coroutine[Any, Any, T]) -> T:
+        """Runs a coroutine in the handle's loop, and waits for the result in the
+        current loop.
+
+        If the current task is cancelled, the coroutine is cancelled too.
+        """
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return await asyncio.wrap_future(future)
+
+    def call_soon[*Ts](self, callback: Callable[[*Ts], object], *args: *Ts):
+        """Schedules a callback to be called in the handle's loop."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+
+@dataclass
+class BlockedCall:
+    """A single time that the event loop was blocked for too long."""
+
+    site: str
+    """The innermost frame of the stack in this package (or the innermost frame, if
+    there isn't one), formatted like `module:line (function)`."""
+    duration: float
+    """How many seconds late the loop was to run the monitor's callback, which is
+    slightly less than the time the loop was actually blocked for."""
+    stack: str
+    """The loop thread's stack, captured while it was blocked."""
+
+
+@dataclass
+class BlockingSite:
+    """Statistics for all blocked calls at the same call site."""
+
+    site: str
+    count: int = 0
+    total_duration: float = 0
+    max_duration: float = 0
+    stack: str = field(default="", repr=False)
+    """The stack of the longest blocked call."""
+
+    def add(self, call: BlockedCall):
+        self.count += 1
+        self.total_duration += call.duration
+        if call.duration > self.max_duration:
+            self.max_duration = call.duration
+            self.stack = call.stack
+
+
+class EventLoopMonitor:
+    """Measures how late the event loop is to run a callback scheduled every
+    `interval` seconds.
+
+    If `block_threshold` is set, a watchdog thread also captures the loop thread's stack
+    whenever the loop doesn't run the callback for more than `block_threshold` seconds,
+    and groups these blocked calls by call site. Since the stack is captured while the
+    loop is still blocked, it shows the code that is actually blocking, unlike the
+    warnings logged by asyncio's debug mode. In this case, the callback runs at least
+    four times per `block_threshold`, so short blocking calls aren't missed.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.5,
+        block_threshold: float | None = None,
+        report_interval: float = 10 * 60,
+        package: str = __name__.partition(".")[0],
+        on_lag: Callable[[float], object] | None = None,
+        on_blocked_call: Callable[[BlockedCall], object] | None = None,
+    ):
+        if block_threshold is not None:
+            interval = min(interval, block_threshold / 4)
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.report_interval = report_interval
+        self.package = package
+        self.on_lag = on_lag
+        self.on_blocked_call = on_blocked_call
+
+        # site -> stats
+        self.sites = dict[str, BlockingSite]()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._last_beat = 0.0
+        self._last_report = 0.0
+        self._unreported = False
+
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        # stack captured by the watchdog during the current beat, if any
+        self._captured: str | None = None
+        self._captured_site: str | None = None
+
+    def start(self):
+        """Starts monitoring the running event loop."""
+
+        self._loop = asyncio.get_running_loop()
+        self._last_beat = self._last_report = monotonic()
+        self._stopped.clear()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+        if self.block_threshold is not None:
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(threading.get_ident(),),
+                name="ghutils-loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if self._watchdog:
+            self._watchdog.join()
+            self._watchdog = None
+        self.report()
+
+    def worst_sites(self, n: int = 5) -> list[BlockingSite]:
+        """Returns the `n` call sites that blocked the loop for the longest in total."""
+        return sorted(self.sites.values(), key=lambda s: s.total_duration)[::-1][:n]
+
+    def report(self):
+        """Logs the worst blocking call sites seen so far, if there are any new ones
+        since the last report."""
+
+        self._last_report = monotonic()
+        if not self._unreported:
+            return
+        self._unreported = False
+
+        lines = [
+            f"  {s.site}: {s.count} times, {s.total_duration:.2f}s total,"
+            + f" {s.max_duration:.2f}s max"
+            for s in self.worst_sites()
+        ]
+        logger.info("Worst event loop blocking call sites:\n" + "\n".join(lines))
+
+    # runs in the loop thread
+
+    def _beat(self):
+        now = monotonic()
+        lag = max(now - self._last_beat - self.interval, 0)
+        self._last_beat = now
+
+        if self.on_lag:
+            self.on_lag(lag)
+
+        with self._lock:
+            stack, site = self._captured, self._captured_site
+            self._captured = self._captured_site = None
+        # the watchdog may have raced with this beat, so ignore stacks captured for a
+        # call that didn't actually block for long enough
+        if (
+            stack is not None
+            and site is not None
+            and self.block_threshold is not None
+            and lag >= self.block_threshold
+        ):
+            self._record(BlockedCall(site=site, duration=lag, stack=stack))
+
+        if now - self._last_report >= self.report_interval:
+            self.report()
+
+        if not self._stopped.is_set() and self._loop:
+            self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _record(self, call: BlockedCall):
+        stats = self.sites.get(call.site)
+        if stats is None:
+            stats = self.sites[call.site] = BlockingSite(call.site)
+            # only log the full stack the first time, to keep the logs readable
+            logger.warning(
+                f"Event loop blocked for {call.duration:.3f}s at {call.site}:\n"
+                + call.stack
+            )
+        else:
+            logger.warning(
+                f"Event loop blocked for {call.duration:.3f}s at {call.site}"
+            )
+
+        stats.add(call)
+        self._unreported = True
+        if self.on_blocked_call:
+            self.on_blocked_call(call)
+
+    # runs in the watchdog thread
+
+    def _watch(self, loop_thread_id: int):
+        assert self.block_threshold is not None
+        threshold = self.block_threshold
+        # check a few times per threshold, so we capture the stack soon after the loop
+        # becomes blocked
+        poll_interval = threshold / 4
+        captured_beat = None
+
+        while not self._stopped.wait(poll_interval):
+            last_beat = self._last_beat
+            if last_beat == captured_beat:
+                continue  # already captured this one
+            if monotonic() - last_beat - self.interval < threshold:
+                continue
+
+            frame = sys._current_frames().get(loop_thread_id)  # pyright: ignore[reportPrivateUsage]
+            if frame is None:
+                continue
+
+            captured_beat = last_beat
+            stack = "".join(traceback.format_stack(frame))
+            site = self._find_call_site(frame)
+            with self._lock:
+                # if the loop beat while we were capturing, the stack may not be from
+                # the blocking call
+                if self._last_beat == last_beat:
+                    self._captured, self._captured_site = stack, site
+
+    def _find_call_site(self, frame: FrameType) -> str:
+        innermost = frame
+        current: FrameType | None = frame
+        while current is not None:
+            module = current.f_globals.get("__name__", "")
+            if module == self.package or module.startswith(self.package + "."):
+                return _format_frame(current)
+            current = current.f_back
+        return _format_frame(innermost)
+
+
+def _format_frame(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", frame.f_code.co_filename)
+    return f"{module}:{frame.f_lineno} ({frame.f_code.co_qualname})"
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from array import array
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Iterable, Self
+
+import pfzy
+from githubkit import GitHub
+from githubkit.rest import GitTree
+from githubkit.utils import UNSET
+from more_itertools import consecutive_groups
+
+from ghutils.utils.github import RepositoryName
+from ghutils.utils.workers import WorkerPool
+
+type PathItem = tuple[str, str]
+"""`(path, type)`"""
+
+
+@dataclass(frozen=True)
+class PathMatch:
+    path: str
+    type: str
+    score: float
+    indices: list[int]
+
+
+@dataclass(frozen=True)
+class PathSearchResults:
+    total: int
+    """Total number of matches found."""
+    matches: list[PathMatch]
+    """The best matches, sorted by score."""
+    searched: int
+    """Number of paths that were searched."""
+    complete: bool = True
+    """If false, only part of the tree was searched."""
+
+
+class PathMatcher:
+    """Incrementally scores paths against a query, keeping only the best `limit`
+    matches."""
+
+    def __init__(self, query: str, *, exact: bool, limit: int):
+        self.query = query
+        self.limit = limit
+        self.scorer = pfzy.substr_scorer if exact else pfzy.fzy_scorer
+
+        self.total = 0
+        self.searched = 0
+        # number of matches found entirely within a file name
+        # these are what fzy scores the highest, so callers searching a partial tree
+        # can use this to decide when to stop looking
+        self.strong_matches = 0
+        # min-heap of (score, -insertion order, match)
+        # so on ties, matches found earlier are kept
+        self._heap = list[tuple[float, int, PathMatch]]()
+
+    def add(self, path: str, item_type: str):
+        self.searched += 1
+
+        score, indices = self.scorer(self.query, path)
+        if indices is None:
+            return
+
+        self.total += 1
+        if indices and indices[0] > path.rfind("/"):
+            self.strong_matches += 1
+
+        entry = (
+            score,
+            -self.searched,
+            PathMatch(path=path, type=item_type, score=score, indices=indices),
+        )
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def add_all(self, items: Iterable[PathItem]):
+        for path, item_type in items:
+            self.add(path, item_type)
+
+    def results(
+        self,
+        *,
+        searched: int | None = None,
+        complete: bool = True,
+    ) -> PathSearchResults:
+        return PathSearchResults(
+            total=self.total,
+            matches=[match for *_, match in sorted(self._heap, reverse=True)],
+            searched=self.searched if searched is None else searched,
+            complete=complete,
+        )
+
+
+class PathIndex:
+    """An index over the paths in a Git tree, used by `/gh search files`.
+
+    Each path is indexed by the lowercase characters and trigrams it contains. Searches
+    use the index to find the paths that could possibly match the query, and only run
+    the (much slower) scorer on those.
+    """
+
+    sha: str
+    paths: list[str]
+    types: list[str]
+
+    def __init__(self, sha: str, items: Iterable[tuple[str, str]]):
+        self.sha = sha
+        self.paths = []
+        self.types = []
+        self._postings = dict[str, array[int]]()
+
+        for i, (path, item_type) in enumerate(items):
+            self.paths.append(path)
+            self.types.append(item_type)
+
+            lower_path = path.lower()
+            for gram in set(lower_path) | _trigrams(lower_path):
+                if (posting := self._postings.get(gram)) is None:
+                    posting = self._postings[gram] = array("I")
+                posting.append(i)
+
+    @classmethod
+    def from_tree(cls, tree: GitTree) -> Self:
+        return cls(
+            sha=tree.sha,
+            items=((item.path, item.type) for item in tree.tree if item.path),
+        )
+
+    def __len__(self):
+        return len(self.paths)
+
+    def search(self, query: str, *, exact: bool, limit: int) -> PathSearchResults:
+        """Returns the total number of matches, and the `limit` best matches."""
+
+        matcher = PathMatcher(query, exact=exact, limit=limit)
+        for i in self._get_candidates(query, exact):
+            matcher.add(self.paths[i], self.types[i])
+        return matcher.results(searched=len(self))
+
+    def _get_candidates(self, query: str, exact: bool) -> Iterable[int]:
+        """Returns the ids of all paths that contain every gram of the query.
+
+        This is a necessary (but not sufficient) condition for the scorer to match.
+        """
+
+        query = query.lower()
+        if exact:
+            # substr_scorer matches each space-separated part of the query in order
+            grams = set[str]()
+            for part in query.split(" "):
+                grams |= _trigrams(part) if len(part) >= 3 else set(part)
+        else:
+            # fzy_scorer matches the query as a subsequence, so only characters are
+            # guaranteed to appear in the path
+            grams = set(query)
+
+        if not grams:
+            return range(len(self.paths))
+
+        postings = list[array[int]]()
+        for gram in grams:
+            if (posting := self._postings.get(gram)) is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        return sorted(candidates)
+
+
+async def walk_tree(
+    github: GitHub[Any],
+    repo: RepositoryName,
+    tree_sha: str,
+    *,
+    workers: WorkerPool,
+    concurrency: int = 8,
+) -> AsyncGenerator[list[PathItem]]:
+    """Yields batches of `(path, type)` for every item in a tree that is too large to
+    fetch with a single recursive request.
+
+    Each subtree is fetched recursively, falling back to listing its direct children
+    (and walking those) if that response is also truncated. Up to `concurrency`
+    requests are made at once, and responses are parsed using `workers`. Outstanding
+    requests are cancelled if the caller stops iterating early.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue[list[PathItem] | Exception]()
+    tasks = set[asyncio.Task[None]]()
+    remaining = 0
+
+    async def get_tree(sha: str, recursive: bool) -> GitTree:
+        async with semaphore:
+            response = await github.rest.git.async_get_tree(
+                repo.owner,
+                repo.repo,
+                sha,
+                recursive="1" if recursive else UNSET,
+            )
+        return await workers.run(lambda: response.parsed_data)
+
+    async def walk(sha: str, prefix: str, recursive: bool):
+        try:
+            tree = await get_tree(sha, recursive) if recursive else None
+            if tree is None or tree.truncated:
+                tree = await get_tree(sha, recursive=False)
+                for item in tree.tree:
+                    if item.type == "tree" and item.path and item.sha:
+                        spawn(item.sha, f"{prefix}{item.path}/", recursive=True)
+
+            await queue.put([
+                (prefix + item.path, item.type) for item in tree.tree if item.path
+            ])
+        except Exception as e:
+            await queue.put(e)
+
+    def spawn(sha: str, prefix: str, recursive: bool):
+        nonlocal remaining
+        remaining += 1
+        task = asyncio.create_task(walk(sha, prefix, recursive))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    # the caller already knows the root is truncated, so don't fetch it recursively
+    spawn(tree_sha, "", recursive=False)
+
+    try:
+        while remaining:
+            batch = await queue.get()
+            remaining -= 1
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def highlight_path(match: PathMatch) -> str:
+    """Returns the matched path with the matched characters in bold."""
+
+    path = match.path
+    parts = list[str]()
+    index = 0
+    for group in consecutive_groups(match.indices):
+        group = list(group)
+        parts += [
+            # everything before the start of the group
+            path[index : group[0]],
+            "**",
+            # everything in the group
+            path[group[0] : group[-1] + 1],
+            "**",
+        ]
+        index = group[-1] + 1
+    # everything after the last group
+    parts.append(path[index:])
+    return "".join(parts)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
@@ -17,6 +17,8 @@ from githubkit.rest import (
     Release,
 )
 
+from ghutils.core.metrics import record_github_response
+
 
 class IssueState(Enum):
     OPEN = Color.from_rgb(63, 185, 80)
@@ -175,9 +177,49 @@ class RepositoryName:
         return f"{self.owner}/{self.repo}"
 
 
+_SEARCH_BRANCHES_QUERY = """
+query ($owner: String!, $name: String!, $query: String!, $first: Int!) {
+  repository(owner: $owner, name: $name) {
+    refs(
+      refPrefix: "refs/heads/"
+      query: $query
+      first: $first
+      orderBy: { field: ALPHABETICAL, direction: ASC }
+    ) {
+      nodes {
+        name
+      }
+    }
+  }
+}
+"""
+
+
+async def search_branches(
+    github: GitHub[Any],
+    repo: RepositoryName,
+    query: str,
+    limit: int,
+) -> list[str]:
+    """Returns the names of up to `limit` branches containing the query."""
+
+    # the REST API can't search branches, so use GraphQL instead
+    data = await github.async_graphql(
+        _SEARCH_BRANCHES_QUERY,
+        {
+            "owner": repo.owner,
+            "name": repo.repo,
+            "query": query,
+            "first": limit,
+        },
+    )
+    return [node["name"] for node in data["repository"]["refs"]["nodes"]]
+
+
 async def gh_request[T](future: Awaitable[Response[T]]) -> T:
     """Helper function to simplify extracting the parsed data from GitHub requests."""
     resp = await future
+    record_github_response(resp)
     return resp.parsed_data
 
 
@@ -215,6 +257,15 @@ def is_last_page(response: Response[Any]) -> bool:
     return "next" not in get_page_urls(response)
 
 
+def get_ratelimit_remaining(response: Response[Any]) -> int | None:
+    """Returns the number of requests remaining in the current rate limit window, or
+    `None` if the response doesn't include rate limit headers."""
+    try:
+        return int(response.headers["x-ratelimit-remaining"])
+    except (KeyError, ValueError):
+        return None
+
+
 def get_reactions_by_emoji(reactions: ReactionRollup) -> dict[str, int]:
     return {
         "👍": reactions.plus_one,
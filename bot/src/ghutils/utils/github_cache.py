@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Awaitable, Callable, Mapping
+
+from githubkit import Response
+
+from ghutils.core.metrics import record_github_response
+from ghutils.utils.cache import LRUCache
+from ghutils.utils.github import get_ratelimit_remaining, is_last_page
+
+logger = logging.getLogger(__name__)
+
+type ConditionalRequest[T] = Callable[[Mapping[str, str]], Awaitable[Response[T]]]
+"""A function that makes a GitHub request with the given extra headers."""
+
+type PageKey = tuple[str, str, str, int, int]
+"""`(cache scope, lowercase repo name, endpoint, page, per_page)`
+
+The cache scope (see `get_cache_scope`) stops pages fetched with a user's token from
+being shown to other users."""
+
+
+@dataclass
+class CachedResponse[T]:
+    data: T
+    """The parsed response body."""
+    etag: str | None
+    is_last_page: bool
+    """True if the response had no link to a next page."""
+    ratelimit_remaining: int | None
+    """Requests remaining in the rate limit window when this was last fetched."""
+    fresh_until: float
+    """Timestamp (from `time.monotonic`) until which this can be used without
+    revalidating it."""
+
+    @property
+    def is_fresh(self) -> bool:
+        return monotonic() < self.fresh_until
+
+
+class ResponseCache[K]:
+    """A shared cache of parsed GitHub responses, with conditional revalidation.
+
+    Entries are used as-is for `ttl` seconds. After that, the next lookup sends the
+    entry's ETag with the request; if GitHub responds with `304 Not Modified`, the
+    cached data is reused, and the request doesn't count against the rate limit.
+
+    Concurrent lookups for the same key share a single request.
+
+    Entries can also be invalidated early (eg. when a webhook event is received) using
+    `pop_where`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._entries = LRUCache[K, CachedResponse[Any]](maxsize)
+        self._pending = dict[K, asyncio.Future[CachedResponse[Any]]]()
+        # pending keys that were invalidated while their request was in flight
+        self._stale = set[K]()
+
+    async def get[T](
+        self,
+        key: K,
+        request: ConditionalRequest[T],
+    ) -> CachedResponse[T]:
+        entry: CachedResponse[T] | None = self._entries.get(key)
+        if entry is not None and entry.is_fresh:
+            self.hits += 1
+            return entry
+
+        while (pending := self._pending.get(key)) is not None:
+            # someone else is already fetching this, so wait for them
+            # if they were cancelled, try again (or fetch it ourselves)
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                self.hits += 1
+                return pending.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            entry = await self._fetch(key, request, entry)
+        except Exception as e:
+            future.set_exception(e)
+            # don't warn about the exception never being retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(entry)
+            return entry
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._pending[key]
+            if key in self._stale:
+                # the response might be older than the invalidation, so don't keep it
+                self._stale.discard(key)
+                self._entries.pop(key)
+
+    def pop(self, key: K) -> CachedResponse[Any] | None:
+        return self._entries.pop(key)
+
+    def pop_where(self, predicate: Callable[[K], bool]) -> int:
+        """Removes every entry whose key matches `predicate`, and returns the number of
+        entries removed.
+
+        Requests that are currently in flight for matching keys still complete, but
+        their responses aren't cached.
+        """
+        self._stale.update(key for key in self._pending if predicate(key))
+        return self._entries.pop_where(predicate)
+
+    def clear(self):
+        self._entries.clear()
+        self._stale.update(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _fetch[T](
+        self,
+        key: K,
+        request: ConditionalRequest[T],
+        entry: CachedResponse[T] | None,
+    ) -> CachedResponse[T]:
+        headers = dict[str, str]()
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        response = await request(headers)
+        record_github_response(response)
+
+        if entry is not None and response.status_code == 304:
+            logger.debug(f"Revalidated cached response: {key}")
+            self.revalidations += 1
+            entry.ratelimit_remaining = get_ratelimit_remaining(response)
+            entry.fresh_until = monotonic() + self.ttl
+            self._entries.set(key, entry)
+            return entry
+
+        self.misses += 1
+        entry = CachedResponse(
+            data=response.parsed_data,
+            etag=response.headers.get("etag"),
+            is_last_page=is_last_page(response),
+            ratelimit_remaining=get_ratelimit_remaining(response),
+            fresh_until=monotonic() + self.ttl,
+        )
+        self._entries.set(key, entry)
+        return entry
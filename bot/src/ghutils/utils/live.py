@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic
+from typing import Any, Awaitable, Callable, Sequence
+
+from githubkit import GitHub
+from githubkit.exception import GraphQLFailed
+
+from ghutils.utils.github import RepositoryName
+
+logger = logging.getLogger(__name__)
+
+
+class LiveResourceKind(Enum):
+    ISSUE = "issue"
+    """An issue or pull request."""
+    COMMIT = "commit"
+
+
+@dataclass(frozen=True)
+class LiveResource:
+    """Something on GitHub that is displayed by one or more live messages."""
+
+    repo_id: int
+    kind: LiveResourceKind
+    key: str
+    """Issue/PR number, or commit SHA."""
+
+
+@dataclass
+class PollSchedule:
+    """Adaptive polling interval for a group of resources.
+
+    Starts at `min_interval`, doubles every time a poll finds no changes (up to
+    `max_interval`), and resets whenever something changes.
+    """
+
+    min_interval: float
+    max_interval: float
+    interval: float = field(init=False)
+    next_poll: float = field(default=0, init=False)
+    """Timestamp (from `time.monotonic`) of the next poll."""
+
+    def __post_init__(self):
+        self.interval = self.min_interval
+
+    @property
+    def is_due(self) -> bool:
+        return monotonic() >= self.next_poll
+
+    def update(self, changed: bool):
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.next_poll = monotonic() + self.interval
+
+
+_SHA_PATTERN = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+_ISSUE_FINGERPRINT = """issueOrPullRequest(number: {number}) {{
+  ... on Issue {{ updatedAt }}
+  ... on PullRequest {{ updatedAt }}
+}}
+"""
+
+_COMMIT_FINGERPRINT = """object(oid: "{sha}") {{
+  ... on Commit {{
+    statusCheckRollup {{
+      state
+      contexts {{ totalCount }}
+    }}
+  }}
+}}
+"""
+
+
+async def get_fingerprints(
+    github: GitHub[Any],
+    repo: RepositoryName,
+    resources: Sequence[LiveResource],
+) -> list[str | None]:
+    """Returns a cheap fingerprint for each resource, in the same order, using a single
+    GraphQL query with one aliased field per resource.
+
+    A resource's fingerprint changes when the resource (probably) needs to be rendered
+    again, eg. when an issue is updated or a commit's checks change state. It is `None`
+    if the resource wasn't found.
+    """
+
+    fields = list[str]()
+    for i, resource in enumerate(resources):
+        match resource.kind:
+            case LiveResourceKind.ISSUE:
+                value = _ISSUE_FINGERPRINT.format(number=int(resource.key))
+            case LiveResourceKind.COMMIT:
+                if not _SHA_PATTERN.fullmatch(resource.key):
+                    raise ValueError(f"Invalid commit SHA: {resource.key}")
+                value = _COMMIT_FINGERPRINT.format(sha=resource.key)
+        fields.append(f"r{i}: {value.strip()}")
+
+    try:
+        data = await github.async_graphql(
+            "query ($owner: String!, $name: String!) {\n"
+            + "  repository(owner: $owner, name: $name) {\n"
+            + "\n".join(fields)
+            + "  }\n}",
+            {"owner": repo.owner, "name": repo.repo},
+        )
+    except GraphQLFailed as e:
+        # missing issues/commits are reported as errors, but the rest of the data is
+        # still there
+        if not (e.response.data and e.response.data.get("repository")):
+            raise
+        data = e.response.data
+
+    results = list[str | None]()
+    for i in range(len(resources)):
+        node = data["repository"].get(f"r{i}")
+        results.append(json.dumps(node, sort_keys=True) if node else None)
+    return results
+
+
+type ApplyEdit[T] = Callable[[int, int, T], Awaitable[Any]]
+"""`(channel id, message id, value) -> Any`"""
+
+
+class ChannelEditQueue[T]:
+    """Applies message edits in the background, one at a time per channel, with at
+    least `interval` seconds between edits in the same channel.
+
+    If a message is edited again before its previous edit was applied, only the latest
+    value is used.
+    """
+
+    def __init__(self, apply: ApplyEdit[T], *, interval: float):
+        self.interval = interval
+        self._apply = apply
+        # channel id -> message id -> value
+        self._pending = dict[int, dict[int, T]]()
+        self._tasks = dict[int, asyncio.Task[None]]()
+
+    def put(self, channel_id: int, message_id: int, value: T):
+        self._pending.setdefault(channel_id, {})[message_id] = value
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.create_task(self._drain(channel_id))
+
+    def close(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    def __len__(self) -> int:
+        return sum(len(pending) for pending in self._pending.values())
+
+    async def _drain(self, channel_id: int):
+        pending = self._pending[channel_id]
+        try:
+            while pending:
+                message_id = next(iter(pending))
+                value = pending.pop(message_id)
+                try:
+                    await self._apply(channel_id, message_id, value)
+                except Exception:
+                    logger.exception(
+                        f"Failed to edit message {message_id} in channel {channel_id}"
+                    )
+                await asyncio.sleep(self.interval)
+        finally:
+            del self._tasks[channel_id]
+            del self._pending[channel_id]
@@ -0,0 +1,219 @@
+"""A minimal implementation of Prometheus metrics and the text exposition format.
+
+Metrics are thread-safe, since they're updated from both the bot and the API server.
+
+https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from timeit import default_timer as timer
+from typing import ClassVar, Iterable, Literal, Sequence
+
+type MetricType = Literal["counter", "gauge", "histogram"]
+
+type LabelValues = tuple[str, ...]
+
+type Sample = tuple[str, dict[str, str], float]
+"""`(name suffix, labels, value)`"""
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+
+class Metric(ABC):
+    type: ClassVar[MetricType]
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]: ...
+
+    def render(self) -> Iterable[str]:
+        # in the 0.0.4 format, the metadata name must match the sample name, and
+        # counter samples end with _total
+        name = f"{self.name}_total" if self.type == "counter" else self.name
+        yield f"# HELP {name} {_escape_help(self.documentation)}"
+        yield f"# TYPE {name} {self.type}"
+        with self._lock:
+            samples = list(self.samples())
+        for suffix, labels, value in samples:
+            yield f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(
+                f"Expected labels {self.labelnames} for {self.name}, got {tuple(labels)}"
+            )
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _labels(self, values: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = dict[LabelValues, float]()
+
+    def inc(self, amount: float = 1, **labels: str):
+        if amount < 0:
+            raise ValueError(f"Counters can only be incremented (got {amount})")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield "_total", self._labels(key), value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = dict[LabelValues, float]()
+
+    def set(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield "", self._labels(key), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets)
+        # label values -> (non-cumulative bucket counts, sum)
+        # the last bucket is +Inf
+        self._values = dict[LabelValues, tuple[list[int], float]]()
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            if (entry := self._values.get(key)) is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), 0)
+            counts, total = entry
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = timer()
+        try:
+            yield
+        finally:
+            self.observe(timer() - start, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total) in self._values.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], counts):
+                cumulative += count
+                yield "_bucket", labels | {"le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class Snapshot(Metric):
+    """A metric whose samples are collected when it's created, for values that are
+    tracked elsewhere (eg. cache sizes)."""
+
+    def __init__(
+        self,
+        type: MetricType,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        values: Iterable[tuple[LabelValues, float]],
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.type = type  # pyright: ignore[reportAttributeAccessIssue]
+        self._values = list(values)
+
+    def samples(self) -> Iterable[Sample]:
+        suffix = "_total" if self.type == "counter" else ""
+        for key, value in self._values:
+            yield suffix, self._labels(key), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = dict[str, Metric]()
+
+    def register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        lines = list[str]()
+        for metric in [*self._metrics.values(), *extra]:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,311 @@
+"""Caches that can be shared between instances of the bot.
+
+Values are stored as bytes in a `CacheBackend`, which is either in-process (the
+default) or a Redis-compatible server. `ModelCache` stores pydantic models (or anything
+else that pydantic can serialize) in a backend as compressed JSON.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import ssl
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Final
+
+from pydantic import TypeAdapter
+from yarl import URL
+
+from ghutils.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+type RedisValue = bytes | int | str | list[RedisValue] | None
+
+
+class CacheBackend(ABC):
+    """A key-value store where every entry has a TTL."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float): ...
+
+    @abstractmethod
+    async def delete(self, *keys: str): ...
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process backend, for when the bot only runs in one process."""
+
+    def __init__(self, maxsize: int = 4096):
+        # every entry is set with its own TTL
+        self._entries = TTLCache[str, bytes](maxsize=maxsize, ttl=0)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries.set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    """An error response from a Redis server."""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend that stores entries in a Redis-compatible server (eg. Redis, Valkey,
+    KeyDB), so they can be shared between instances of the bot.
+
+    This only implements the few commands needed for caching, using the RESP2 protocol
+    over a small pool of connections.
+
+    https://redis.io/docs/latest/develop/reference/protocol-spec/
+    """
+
+    def __init__(self, url: str, *, max_connections: int = 8, timeout: float = 5):
+        parsed = URL(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme}")
+
+        self.host = parsed.host or "localhost"
+        self.port = parsed.port or 6379
+        self.ssl = parsed.scheme == "rediss"
+        self.username = parsed.user or None
+        self.password = parsed.password or None
+        self.db = int(parsed.path.strip("/") or 0)
+        self.timeout = timeout
+
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._connections = list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]()
+
+    async def get(self, key: str) -> bytes | None:
+        result = await self.execute("GET", key)
+        assert result is None or isinstance(result, bytes)
+        return result
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.execute("SET", key, value, "PX", max(int(ttl * 1000), 1))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.execute("DEL", *keys)
+
+    async def close(self):
+        connections, self._connections = self._connections, []
+        for _, writer in connections:
+            writer.close()
+
+    async def execute(self, *args: str | bytes | int) -> RedisValue:
+        """Sends a command, and returns the response.
+
+        Raises `RedisError` if the server responded with an error, or `OSError` or
+        `EOFError` if the connection failed.
+
+        If a pooled connection was closed by the server (eg. after a restart or an idle
+        timeout), the command is retried once on a new connection.
+        """
+
+        async with self._semaphore:
+            reader, writer, reused = await self._acquire()
+            try:
+                return await self._execute(reader, writer, args)
+            except (ConnectionError, EOFError) as e:
+                if not reused:
+                    raise
+                logger.debug(f"Reconnecting to cache server after error: {e}")
+
+            reader, writer, _ = await self._acquire(fresh=True)
+            return await self._execute(reader, writer, args)
+
+    async def _execute(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        args: tuple[str | bytes | int, ...],
+    ) -> RedisValue:
+        try:
+            async with asyncio.timeout(self.timeout):
+                writer.write(_encode_command(args))
+                await writer.drain()
+                result = await _read_response(reader)
+        except RedisError:
+            # the connection is still usable after an error response
+            self._connections.append((reader, writer))
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        self._connections.append((reader, writer))
+        return result
+
+    async def _acquire(
+        self,
+        *,
+        fresh: bool = False,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        if self._connections and not fresh:
+            return *self._connections.pop(), True
+
+        async with asyncio.timeout(self.timeout):
+            reader, writer = await asyncio.open_connection(
+                self.host,
+                self.port,
+                ssl=ssl.create_default_context() if self.ssl else None,
+            )
+            try:
+                setup = list[tuple[str | bytes | int, ...]]()
+                if self.password is not None:
+                    if self.username is not None:
+                        setup.append(("AUTH", self.username, self.password))
+                    else:
+                        setup.append(("AUTH", self.password))
+                if self.db:
+                    setup.append(("SELECT", self.db))
+                for command in setup:
+                    writer.write(_encode_command(command))
+                    await writer.drain()
+                    await _read_response(reader)
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer, False
+
+
+def _encode_command(args: tuple[str | bytes | int, ...]) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        match arg:
+            case bytes():
+                data = arg
+            case str():
+                data = arg.encode()
+            case int():
+                data = str(arg).encode()
+        parts += [f"${len(data)}\r\n".encode(), data, b"\r\n"]
+    return b"".join(parts)
+
+
+async def _read_response(reader: asyncio.StreamReader) -> RedisValue:
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    match kind:
+        case b"+":
+            return rest.decode()
+        case b"-":
+            raise RedisError(rest.decode())
+        case b":":
+            return int(rest)
+        case b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        case b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [await _read_response(reader) for _ in range(length)]
+        case _:
+            raise RedisError(f"Invalid response from server: {line!r}")
+
+
+def create_cache_backend(url: str | None) -> CacheBackend:
+    if url is None:
+        return MemoryCacheBackend()
+    return RedisCacheBackend(url)
+
+
+_MISSING: Final = object()
+
+
+class ModelCache[T]:
+    """A cache of values of type `T` (usually pydantic models) in a `CacheBackend`.
+
+    Values are stored as JSON (omitting unset fields), compressed with zlib. Entries
+    that fail to validate (eg. after a model changes) are treated as missing.
+
+    If the backend fails, errors are logged and every lookup is a miss, so a cache
+    server outage doesn't break commands.
+
+    SQLModel table models aren't validated properly by `TypeAdapter`, so for those,
+    pass a `validate` function that calls `model_validate`.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        type_: Any,
+        *,
+        ttl: float,
+        validate: Callable[[Any], T] | None = None,
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.prefix = f"ghutils:{namespace}:"
+        self.hits = 0
+        self.misses = 0
+        self._adapter: TypeAdapter[T] = TypeAdapter(type_)
+        self._validate = validate or self._adapter.validate_python
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Returns the cached value for `key`, or calls `fetch` and caches the result
+        if there isn't one."""
+
+        value = await self._get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value  # pyright: ignore[reportReturnType]
+
+        self.misses += 1
+        result = await fetch()
+        await self.set(key, result)
+        return result
+
+    async def set(self, key: str, value: T):
+        data = self._adapter.dump_json(value, by_alias=True, exclude_unset=True)
+        try:
+            await self.backend.set(self._key(key), zlib.compress(data), self.ttl)
+        except (OSError, EOFError, TimeoutError, RedisError) as e:
+            logger.warning(f"Failed to write to cache {self.namespace}: {e}")
+
+    async def delete(self, *keys: str):
+        try:
+            await self.backend.delete(*(self._key(key) for key in keys))
+        except (OSError, EOFError, TimeoutError, RedisError) as e:
+            logger.warning(f"Failed to delete from cache {self.namespace}: {e}")
+
+    async def _get(self, key: str) -> T | object:
+        try:
+            data = await self.backend.get(self._key(key))
+        except (OSError, EOFError, TimeoutError, RedisError) as e:
+            logger.warning(f"Failed to read from cache {self.namespace}: {e}")
+            return _MISSING
+
+        if data is None:
+            return _MISSING
+
+        try:
+            return self._validate(json.loads(zlib.decompress(data)))
+        except (zlib.error, ValueError) as e:
+            logger.debug(f"Ignoring invalid entry in cache {self.namespace}: {e}")
+            return _MISSING
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
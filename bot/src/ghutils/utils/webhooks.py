@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Self
+
+from pydantic import BaseModel
+
+from ghutils.utils.actions import WORKFLOW_PREFIX
+from ghutils.utils.github import RepositoryName
+
+WEBHOOK_CHANNEL = "ghutils_webhook"
+"""Notification channel used to send webhook events to every process."""
+
+
+class WebhookInstallation(BaseModel):
+    id: int
+
+
+class WebhookRepository(BaseModel):
+    id: int
+    full_name: str
+
+    @property
+    def name(self) -> RepositoryName:
+        return RepositoryName.parse(self.full_name)
+
+
+class WebhookCommit(BaseModel):
+    added: list[str] = []
+    removed: list[str] = []
+    modified: list[str] = []
+
+    @property
+    def paths(self) -> list[str]:
+        return self.added + self.removed + self.modified
+
+
+class WebhookWorkflowRun(BaseModel):
+    id: int
+    workflow_id: int
+    path: str
+    head_branch: str | None = None
+    head_sha: str
+
+
+class WebhookCheckSuite(BaseModel):
+    head_branch: str | None = None
+    head_sha: str
+
+
+class WebhookNumbered(BaseModel):
+    number: int
+
+
+class WebhookPayload(BaseModel):
+    """The parts of a GitHub webhook payload that the bot uses.
+
+    This is intentionally much smaller than githubkit's webhook models, since we only
+    need a few fields to decide what to invalidate, and push payloads can be large.
+    """
+
+    action: str | None = None
+    installation: WebhookInstallation | None = None
+    repository: WebhookRepository | None = None
+
+    # push
+    ref: str | None = None
+    created: bool = False
+    deleted: bool = False
+    commits: list[WebhookCommit] = []
+
+    # workflow_run, check_suite
+    workflow_run: WebhookWorkflowRun | None = None
+    check_suite: WebhookCheckSuite | None = None
+
+    # issues, pull_request
+    issue: WebhookNumbered | None = None
+    pull_request: WebhookNumbered | None = None
+
+    def compact(self) -> WebhookPayload:
+        """Returns a copy without the commit paths that the bot doesn't use (everything
+        except workflow files), since push payloads can be too large to broadcast."""
+        if not self.commits:
+            return self
+        paths = [
+            path
+            for commit in self.commits
+            for path in commit.paths
+            if path.startswith(WORKFLOW_PREFIX)
+        ]
+        return self.model_copy(update={"commits": [WebhookCommit(modified=paths)]})
+
+
+@dataclass
+class GitHubWebhookEvent:
+    """A webhook event received from GitHub.
+
+    Dispatched to cogs as `on_github_webhook(event)`.
+    """
+
+    name: str
+    """The value of the `X-GitHub-Event` header, eg. `push`."""
+    delivery_id: str | None
+    """The value of the `X-GitHub-Delivery` header."""
+    payload: WebhookPayload
+
+    @classmethod
+    def from_payload(cls, payload: str) -> Self:
+        data = json.loads(payload)
+        return cls(
+            name=data["name"],
+            delivery_id=data["delivery_id"],
+            payload=WebhookPayload.model_validate(data["payload"]),
+        )
+
+    def to_payload(self) -> str:
+        """Returns this event as a notification payload for `WEBHOOK_CHANNEL`."""
+        return json.dumps({
+            "name": self.name,
+            "delivery_id": self.delivery_id,
+            "payload": self.payload.compact().model_dump(
+                mode="json", exclude_defaults=True
+            ),
+        })
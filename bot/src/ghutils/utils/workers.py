@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from timeit import default_timer as timer
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkerPoolStats:
+    submitted: int = 0
+    """Total number of tasks submitted to the pool."""
+    completed: int = 0
+    """Total number of tasks that finished running (successfully or not)."""
+    queued: int = 0
+    """Number of tasks currently waiting for a free worker."""
+    running: int = 0
+    """Number of tasks currently running."""
+    wait_time: float = 0
+    """Total seconds that completed tasks spent waiting for a free worker."""
+    run_time: float = 0
+    """Total seconds that completed tasks spent running."""
+
+
+class WorkerPool:
+    """A bounded thread pool for CPU-heavy work that would otherwise block the event
+    loop (eg. parsing large API responses or scoring fuzzy matches).
+
+    Threads are used instead of processes because the data involved is usually large
+    and cached in this process, so it would be expensive to send to another process.
+    """
+
+    def __init__(self, max_workers: int, name: str = "ghutils-worker"):
+        self.max_workers = max_workers
+        self.stats = WorkerPoolStats()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+
+    async def run[**P, R](
+        self,
+        func: Callable[P, R],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        """Run `func` in a worker thread and wait for the result."""
+
+        submit_time = timer()
+        with self._lock:
+            self.stats.submitted += 1
+            self.stats.queued += 1
+
+        def wrapper() -> R:
+            start_time = timer()
+            with self._lock:
+                self.stats.queued -= 1
+                self.stats.running += 1
+                self.stats.wait_time += start_time - submit_time
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end_time = timer()
+                with self._lock:
+                    self.stats.running -= 1
+                    self.stats.completed += 1
+                    self.stats.run_time += end_time - start_time
+                logger.debug(
+                    f"Ran {getattr(func, '__qualname__', func)} in worker thread:"
+                    + f" waited {start_time - submit_time:.3f}s,"
+                    + f" ran {end_time - start_time:.3f}s"
+                )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, wrapper)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)